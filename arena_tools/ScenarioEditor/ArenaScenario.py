@@ -1,15 +1,72 @@
 import numpy as np
 import os
-import yaml
-import json
-from .Pedestrian.Pedestrian import Pedestrian
+from typing import List, Tuple
+from .Pedestrian.PedestrianStore import PedestrianStore
 from .Robot.Robot import Robot
 from ..utils.HelperFunctions import *
+from ..utils.Serialization import get_codec
+
+
+class AgentDiff:
+    '''
+    Differences between two lists of agents. Agents are matched by name, agents with
+    the same name in the order they appear.
+    - added: agents that are only in the other list
+    - removed: agents that are only in this list
+    - changed: (agent, other agent) pairs that have the same name but differ
+    '''
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed: List[Tuple] = []
+
+    def __bool__(self):
+        return len(self.added) > 0 or len(self.removed) > 0 or len(self.changed) > 0
+
+
+class ScenarioDiff:
+    '''
+    Differences between two scenarios, see ArenaScenario.diff.
+    '''
+
+    def __init__(self):
+        self.pedestrianAgents = AgentDiff()
+        self.robotAgents = AgentDiff()
+        self.mapChanged = False
+
+    def __bool__(self):
+        return bool(self.pedestrianAgents) or bool(self.robotAgents) or self.mapChanged
+
+
+def matchByName(agents: list, other_agents: list):
+    '''
+    Pairs agents of two lists by name. Returns the indices of the pairs in both lists
+    and the indices of the agents without partner in each list.
+    '''
+    positions = {}
+    for i, agent in enumerate(other_agents):
+        positions.setdefault(agent.name, []).append(i)
+    for indices in positions.values():
+        indices.reverse()
+
+    indices, other_indices, removed = [], [], []
+    for i, agent in enumerate(agents):
+        candidates = positions.get(agent.name)
+        if candidates:
+            indices.append(i)
+            other_indices.append(candidates.pop())
+        else:
+            removed.append(i)
+    added = sorted(i for candidates in positions.values() for i in candidates)
+
+    return indices, other_indices, removed, added
 
 
 class ArenaScenario:
     def __init__(self):
         self.pedestrianAgents = []  # list of Pedestrian objects
+        self.pedestrianStore = PedestrianStore()  # columnar storage of loaded pedestrian agents
         self.interactiveObstacles = []  # list of InteractiveObstacle messages
         self.staticObstacles = []  # list of 
         self.robotAgents = [] # list of Robot object
@@ -26,7 +83,10 @@ class ArenaScenario:
         d["robots"] = [a.toDict() for a in self.robotAgents]
         d["obstacles"]["static"] = [o.toDict() for o in self.staticObstacles]
         d["obstacles"]["interactive"] = [o.toDict() for o in self.interactiveObstacles]
-        d["obstacles"]["dynamic"] = [a.toDict() for a in self.pedestrianAgents]
+        if self.pedestrianStore.isStoreOf(self.pedestrianAgents):
+            d["obstacles"]["dynamic"] = self.pedestrianStore.toDicts()
+        else:
+            d["obstacles"]["dynamic"] = [a.toDict() for a in self.pedestrianAgents]
 
         return d
 
@@ -38,10 +98,11 @@ class ArenaScenario:
 
     def loadFromDict(self, d: dict):
         if d.get("obstacles") and d.get("obstacles").get("dynamic"):
-            self.pedestrianAgents = [Pedestrian.fromDict(
-                a) for a in d["obstacles"]["dynamic"]]
+            self.pedestrianStore = PedestrianStore.fromDicts(d["obstacles"]["dynamic"])
+            self.pedestrianAgents = self.pedestrianStore.views()
         else:
             print("There are no dynamic obstacles in this scenario!")
+            self.pedestrianStore = PedestrianStore()
             self.pedestrianAgents = []
             # self.interactiveObstacles = ...TODO
         if d.get("robots"):
@@ -50,11 +111,69 @@ class ArenaScenario:
             print("There are no robots in this scenario!")
             self.robotAgents = []
 
+    def getPedestrianStore(self) -> PedestrianStore:
+        '''
+        Returns the pedestrian agents in columnar form, for vectorized bulk operations.
+        If self.pedestrianAgents are not the views of self.pedestrianStore (e.g. because
+        agents have been added), a new store with copies of the agents is returned.
+        '''
+        if self.pedestrianStore.isStoreOf(self.pedestrianAgents):
+            return self.pedestrianStore
+        return PedestrianStore.fromPedestrians(self.pedestrianAgents)
+
+    def diff(self, other: "ArenaScenario") -> ScenarioDiff:
+        '''
+        Compares this scenario with 'other'. The agents are compared with batched
+        array operations, so this is fast enough for change detection on scenarios
+        with thousands of agents.
+        Returns a ScenarioDiff, which is falsy if the scenarios are equal.
+        '''
+        diff = ScenarioDiff()
+        diff.mapChanged = self.mapPath != other.mapPath
+
+        indices, other_indices, removed, added = matchByName(
+            self.pedestrianAgents, other.pedestrianAgents
+        )
+        equal = self.getPedestrianStore().compare(
+            other.getPedestrianStore(), indices, other_indices
+        )
+        diff.pedestrianAgents.removed = [self.pedestrianAgents[i] for i in removed]
+        diff.pedestrianAgents.added = [other.pedestrianAgents[i] for i in added]
+        diff.pedestrianAgents.changed = [
+            (self.pedestrianAgents[indices[i]], other.pedestrianAgents[other_indices[i]])
+            for i in np.nonzero(~equal)[0]
+        ]
+
+        indices, other_indices, removed, added = matchByName(self.robotAgents, other.robotAgents)
+        equal = np.ones(len(indices), dtype=bool)
+        if len(indices) > 0:
+            robots = [self.robotAgents[i] for i in indices]
+            other_robots = [other.robotAgents[i] for i in other_indices]
+            try:
+                equal &= np.array([
+                    a.id == b.id and a.model == b.model for a, b in zip(robots, other_robots)
+                ])
+                for field in ["start", "goal"]:
+                    values = np.array([getattr(a, field) for a in robots], dtype=float)
+                    other_values = np.array([getattr(b, field) for b in other_robots], dtype=float)
+                    equal &= np.isclose(values, other_values).all(axis=1)
+            except ValueError:
+                # positions of different dimensions
+                equal = np.array([a == b for a, b in zip(robots, other_robots)])
+        diff.robotAgents.removed = [self.robotAgents[i] for i in removed]
+        diff.robotAgents.added = [other.robotAgents[i] for i in added]
+        diff.robotAgents.changed = [
+            (self.robotAgents[indices[i]], other.robotAgents[other_indices[i]])
+            for i in np.nonzero(~equal)[0]
+        ]
+
+        return diff
+
     def saveToFile(self, path_in: str = "") -> bool:
         '''
         Save Scenario in file.
         - path_in: path to save file
-        - format: format of save file, can be "json" or "yaml"
+        The format is chosen by the file ending, see utils.Serialization.codecs.
         '''
         if os.path.exists(path_in):  # TODO is this not always false when it's a new filename?
             self.path = path_in
@@ -62,34 +181,16 @@ class ArenaScenario:
         if self.path == "":
             return False
 
-        _, file_extension = os.path.splitext(self.path)
-        with open(self.path, "w") as file:
-            data = self.toDict()
-            if file_extension == ".json":
-                json.dump(data, file, indent=4)
-            elif file_extension == ".yaml":
-                yaml.dump(data, file, default_flow_style=None)
-            else:
-                raise Exception(
-                    "wrong format. file needs to have 'json' or 'yaml' file ending.")
+        codec = get_codec(self.path)
+        codec.save(self.toDict(), self.path)
 
         return True
 
     def loadFromFile(self, path_in: str):
         if os.path.exists(path_in):
-            _, file_extension = os.path.splitext(path_in)
-            with open(path_in, "r") as f:
-                data = None
-                if file_extension == ".json":
-                    data = json.load(f)
-                elif file_extension == ".yaml":
-                    data = yaml.safe_load(f)
-                else:
-                    raise Exception(
-                        "wrong format. file needs to have 'json' or 'yaml' file ending.")
-
-                self.loadFromDict(data)
-                self.path = path_in
+            data = get_codec(path_in).read(path_in)
+            self.loadFromDict(data)
+            self.path = path_in
 
         else:
             raise Exception(f"file '{path_in}' does not exist")
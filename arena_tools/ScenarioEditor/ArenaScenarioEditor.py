@@ -2,6 +2,7 @@ import pathlib
 from PyQt5 import QtGui, QtCore, QtWidgets
 import os
 import time
+import yaml
 import copy
 from typing import Tuple, List
 from .Pedestrian.Pedestrian import Pedestrian
@@ -11,6 +12,7 @@ from .Robot.RobotEditor import RobotAgentEditor
 from .ArenaScenario import *
 from arena_tools.utils.QtExtensions import *
 from arena_tools.utils.HelperFunctions import *
+from arena_tools.utils.Serialization import get_codec
 import arena_simulation_setup.world
 import arena_simulation_setup.entities.obstacles.static
 
@@ -35,120 +37,100 @@ class RosMapData():
                 self.origin = [float(value) for value in data["origin"]]
 
 
-class WaypointWidget(QtWidgets.QWidget):
-    def __init__(self, pedestrianAgentWidget, graphicsScene: QtWidgets.QGraphicsScene, posIn: QtCore.QPointF = None, **kwargs):
-        super().__init__(**kwargs)
-        self.id = 0
-        self.pedestrianAgentWidget = pedestrianAgentWidget  # needed so the ellipse item can trigger a waypoint path redraw
+class WaypointRow(ArenaTreeRow):
+    '''
+    A waypoint of a pedestrian agent, shown as a child row of its PedestrianAgentRow.
+    The x and y coordinates are held by the ellipse item in the scene.
+    '''
+
+    def __init__(
+        self, pedestrianAgentRow, graphicsScene: QtWidgets.QGraphicsScene,
+        posIn: QtCore.QPointF = None, z: float = 0.0
+    ):
+        # needed so the ellipse item can trigger a waypoint path redraw
+        self.pedestrianAgentRow = pedestrianAgentRow
+        self.z = z
         # create circle and add to scene
         self.ellipseItem = WaypointGraphicsEllipseItem(self, None, None, -0.25, -0.25, 0.5, 0.5)
         self.graphicsScene = graphicsScene
         graphicsScene.addItem(self.ellipseItem)
-        # setup widgets
-        self.setupUI()
-        self.setId(self.id)
         # set initial position
         if posIn is not None:
             self.setPos(posIn)
 
-    def setupUI(self):
-        self.setLayout(QtWidgets.QHBoxLayout())
-        self.setSizePolicy(QtWidgets.QSizePolicy.Policy.Maximum, QtWidgets.QSizePolicy.Policy.Maximum)
-
-        # x value
-        # label
-        label = QtWidgets.QLabel("x")
-        self.layout().addWidget(label)
-        # spinbox
-        self.posXSpinBox = ArenaQDoubleSpinBox()
-        self.posXSpinBox.valueChanged.connect(self.updateEllipseItemFromSpinBoxes)
-        self.layout().addWidget(self.posXSpinBox)
-
-        # y value
-        # label
-        label = QtWidgets.QLabel("y")
-        self.layout().addWidget(label)
-        # spinbox
-        self.posYSpinBox = ArenaQDoubleSpinBox()
-        self.posYSpinBox.valueChanged.connect(self.updateEllipseItemFromSpinBoxes)
-        self.layout().addWidget(self.posYSpinBox)
-
-        # z value
-        # label
-        label = QtWidgets.QLabel("z")
-        self.layout().addWidget(label)
-        # spinbox
-        self.posZSpinBox = ArenaQDoubleSpinBox()
-        self.layout().addWidget(self.posZSpinBox)
-
-        # delete button
-        delete_button = QtWidgets.QPushButton("X")
-        delete_button.setFixedWidth(30)
-        delete_button.setStyleSheet("background-color: red")
-        delete_button.clicked.connect(self.remove)
-        self.layout().addWidget(delete_button)
-
-    def setId(self, id: int):
-        self.id = id
+    def rowValues(self) -> list:
+        x, y, z = self.getPos()
+        return [f"Waypoint {self.row}", x, y, z]
+
+    def setRowData(self, column: int, value) -> bool:
+        x, y, z = self.getPos()
+        if column == 1:
+            self.setPos(QtCore.QPointF(value, y))
+        elif column == 2:
+            self.setPos(QtCore.QPointF(x, value))
+        elif column == 3:
+            self.z = value
+        else:
+            return False
+        self.pedestrianAgentRow.markDirty()
+        return True
 
     def setPos(self, posIn: QtCore.QPointF):
-        # set values of spin boxes (and ellipse item)
-        # since spin boxes are connected to the ellipse item, the change will be propagated
-        self.posXSpinBox.setValue(posIn.x())
-        self.posYSpinBox.setValue(posIn.y())
+        # set without event to prevent recursion between the row and the graphics item
+        self.ellipseItem.setPosNoEvent(posIn.x(), posIn.y())
 
-    def getPos(self) -> Tuple[float, float]:
-        return self.posXSpinBox.value(), self.posYSpinBox.value(), self.posZSpinBox.value()
+    def getPos(self) -> Tuple[float, float, float]:
+        pos = self.ellipseItem.pos()
+        return pos.x(), pos.y(), self.z
 
-    def updateEllipseItemFromSpinBoxes(self):
-        if not self.ellipseItem.isDragged:  # do this to prevent recursion between spin boxes and graphics item
-            x = self.posXSpinBox.value()
-            y = self.posYSpinBox.value()
-            self.ellipseItem.setPosNoEvent(x, y)  # set without event to prevent recursion between spin boxes and graphics item
+    def handleItemChange(self):
+        # function will be called by the graphics item
+        self.rowChanged()
+        self.pedestrianAgentRow.scheduleWaypointPathRedraw()
+        self.pedestrianAgentRow.markDirty()
 
-    def updateSpinBoxesFromGraphicsItem(self):
-        new_pos = self.ellipseItem.mapToScene(self.ellipseItem.transformOriginPoint())
-        self.posXSpinBox.setValue(new_pos.x())
-        self.posYSpinBox.setValue(new_pos.y())
+    def removeItems(self):
+        self.graphicsScene.removeItem(self.ellipseItem)
 
     def remove(self):
-        self.ellipseItem.scene().removeItem(self.ellipseItem)
-        del self.ellipseItem.keyPressEater  # delete to remove event filter
-
-        self.parent().layout().removeWidget(self)
-        self.pedestrianAgentWidget.updateWaypointIdLabels()
-        self.pedestrianAgentWidget.drawWaypointPath()
-        self.deleteLater()
+        self.pedestrianAgentRow.removeWaypoint(self)
 
 
-class PedestrianAgentWidget(QtWidgets.QFrame):
+class PedestrianAgentRow(QtCore.QObject, ArenaTreeRow):
     '''
-    This is a row in the obstacles frame.
+    A row in the pedestrian agents side bar, with the waypoints as child rows.
+    Owns the graphics items of the agent. The agent editor is only created when it is first shown.
+    self.dirty is True if the row has been changed since the pedestrian agent was last saved.
     '''
+    modified = QtCore.pyqtSignal()
+    WAYPOINT_PATH_REDRAW_INTERVAL = 16  # ms, about one frame
 
     def __init__(self, id: int, pedestrianAgentIn: Pedestrian, graphicsScene: QtWidgets.QGraphicsScene, graphicsView: ArenaQGraphicsView, **kwargs):
         super().__init__(**kwargs)
         self.id = id
+        self.dirty = False
         self.graphicsScene = graphicsScene
         self.graphicsView = graphicsView
         self.pedestrianAgent = pedestrianAgentIn
+        self.rowChildren = []  # WaypointRows
+        self.z = 0.0
+        self.pedestrian_editor = None
 
         # create path item
         self.graphicsPathItem = ArenaGraphicsPathItem(self)
         # add to scene
         self.graphicsScene.addItem(self.graphicsPathItem)
-        # setup widgets
-        self.setup_ui()
-        # setup pedestrian agent editor
-        self.pedestrian_editor = PedestrianAgentEditor(self, parent=self.parent(), flags=QtCore.Qt.WindowType.Window)
-        self.pedestrian_editor.editorSaved.connect(self.handleEditorSaved)
 
         # setup waypoints
         self.addWaypointModeActive = False
-        self.activeModeWindow = ActiveModeWindow(self)
-        graphicsView.clickedPos.connect(self.handleGraphicsViewClick)
+        self.activeModeWindow = None
         # GraphicsItem for drawing a path connecting the waypoints
         self.waypointPathItem = QtWidgets.QGraphicsPathItem()
+        # coalesces redraws of the waypoint path
+        self.waypointPathTimer = QtCore.QTimer(self)
+        self.waypointPathTimer.setSingleShot(True)
+        self.waypointPathTimer.setInterval(self.WAYPOINT_PATH_REDRAW_INTERVAL)
+        self.waypointPathTimer.timeout.connect(self.drawWaypointPath)
         # create brush
         brush = QtGui.QBrush(QtGui.QColor(), QtCore.Qt.BrushStyle.NoBrush)
         self.waypointPathItem.setBrush(brush)
@@ -164,47 +146,25 @@ class PedestrianAgentWidget(QtWidgets.QFrame):
         graphicsScene.addItem(self.waypointPathItem)
 
         self.updateEverythingFromPedestrianAgent()
-
-    def setup_ui(self):
-        self.setLayout(QtWidgets.QGridLayout())
-        self.setFrameStyle(QtWidgets.QFrame.Shape.Box | QtWidgets.QFrame.Shadow.Raised)
-
-        # name label
-        self.name_label = QtWidgets.QLabel(self.pedestrianAgent.name)
-        self.layout().addWidget(self.name_label, 0, 0)
-
-        # edit button
-        self.edit_button = QtWidgets.QPushButton("Edit")
-        self.edit_button.clicked.connect(self.onEditClicked)
-        self.layout().addWidget(self.edit_button, 0, 1, 1, 2)
-
-        # delete button
-        self.delete_button = QtWidgets.QPushButton("Delete")
-        self.delete_button.clicked.connect(self.onDeleteClicked)
-        self.delete_button.setStyleSheet("background-color: red")
-        self.layout().addWidget(self.delete_button, 0, 3, 1, 1)
-
-        # position
-        label = QtWidgets.QLabel("Position:")
-        self.layout().addWidget(label, 1, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
-        self.posXSpinBox = ArenaQDoubleSpinBox()
-        self.posXSpinBox.valueChanged.connect(self.updateGraphicsPathItemFromSpinBoxes)
-        self.layout().addWidget(self.posXSpinBox, 1, 1)
-        self.posYSpinBox = ArenaQDoubleSpinBox()
-        self.posYSpinBox.valueChanged.connect(self.updateGraphicsPathItemFromSpinBoxes)
-        self.layout().addWidget(self.posYSpinBox, 1, 2)
-        self.posZSpinBox = ArenaQDoubleSpinBox()
-        self.layout().addWidget(self.posZSpinBox, 1, 3)
-
-        # waypoints
-        label = QtWidgets.QLabel("Waypoints:")
-        self.layout().addWidget(label, 2, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
-        button = QtWidgets.QPushButton("Add Waypoints...")
-        button.clicked.connect(self.onAddWaypointClicked)
-        self.layout().addWidget(button, 2, 1, 1, -1)
-        self.waypointListWidget = QtWidgets.QWidget()
-        self.waypointListWidget.setLayout(QtWidgets.QVBoxLayout())
-        self.layout().addWidget(self.waypointListWidget, 3, 0, 1, -1)
+        # the row has just been set from the agent
+        self.dirty = False
+
+    def rowValues(self) -> list:
+        pos = self.getCurrentAgentPosition()
+        return [self.pedestrianAgent.name, pos.x(), pos.y(), self.z]
+
+    def setRowData(self, column: int, value) -> bool:
+        pos = self.getCurrentAgentPosition()
+        if column == 1:
+            self.setPosition(value, pos.y())
+        elif column == 2:
+            self.setPosition(pos.x(), value)
+        elif column == 3:
+            self.z = value
+        else:
+            return False
+        self.markDirty()
+        return True
 
     def handleMouseDoubleClick(self):
         # function will be called by the graphics item
@@ -212,43 +172,38 @@ class PedestrianAgentWidget(QtWidgets.QFrame):
 
     def handleItemChange(self):
         # function will be called by the graphics item
-        self.updateSpinBoxesFromGraphicsItem()
-        self.drawWaypointPath()
+        self.rowChanged()
+        self.scheduleWaypointPathRedraw()
+        self.markDirty()
+
+    def scheduleWaypointPathRedraw(self):
+        '''
+        Redraws the waypoint path at most once per frame, moving many waypoints or agents
+        or adding many waypoints only rebuilds the path once.
+        '''
+        if not self.waypointPathTimer.isActive():
+            self.waypointPathTimer.start()
 
     def drawWaypointPath(self):
         path = QtGui.QPainterPath()
         path.moveTo(self.getCurrentAgentPosition())
-        for w in self.getWaypointWidgets():
+        for w in self.getWaypointRows():
             w_pos = w.ellipseItem.mapToScene(w.ellipseItem.transformOriginPoint())
             path.lineTo(w_pos)
 
         self.waypointPathItem.setPath(path)
 
-    def getCurrentAgentPosition(self):
-        x = self.posXSpinBox.value()
-        y = self.posYSpinBox.value()
-        return QtCore.QPointF(x, y)
-
-    def getWaypointWidgets(self):
-        widgets = []
-        for i in range(self.waypointListWidget.layout().count()):
-            w = self.waypointListWidget.layout().itemAt(i).widget()
-            if w is not None:
-                widgets.append(w)
-        return widgets
-
-    def updateSpinBoxesFromGraphicsItem(self):
-        new_pos = self.graphicsPathItem.mapToScene(self.graphicsPathItem.transformOriginPoint())
-        self.posXSpinBox.setValue(new_pos.x())
-        self.posYSpinBox.setValue(new_pos.y())
-
-    def updateGraphicsPathItemFromSpinBoxes(self):
-        if not self.graphicsPathItem.isDragged:  # prevents recursive loop (spin box <-> moving item)
-            x = self.posXSpinBox.value()
-            y = self.posYSpinBox.value()
-            self.graphicsPathItem.setPosNoEvent(x, y)
-            self.drawWaypointPath()
-            self.graphicsPathItem.updateTextItemPos()
+    def getCurrentAgentPosition(self) -> QtCore.QPointF:
+        return self.graphicsPathItem.pos()
+
+    def getWaypointRows(self) -> List[WaypointRow]:
+        return list(self.rowChildren)
+
+    def setPosition(self, x: float, y: float):
+        # set without event to prevent recursion between the row and the graphics item
+        self.graphicsPathItem.setPosNoEvent(x, y)
+        self.graphicsPathItem.updateTextItemPos()
+        self.scheduleWaypointPathRedraw()
 
     def updateGraphicsPathItemFromPedestrianAgent(self):
         # update path
@@ -262,88 +217,126 @@ class PedestrianAgentWidget(QtWidgets.QFrame):
         painter_path.addEllipse(center, radius, radius)
         self.graphicsPathItem.setPath(painter_path)
         # update text
-        self.graphicsPathItem.textItem.setPlainText(self.name_label.text())
+        self.graphicsPathItem.textItem.setPlainText(self.pedestrianAgent.name)
         self.graphicsPathItem.updateTextItemPos()
 
     def setPedestrianAgent(self, agent: Pedestrian):
+        '''
+        Shows another pedestrian agent in this row, reusing the waypoint rows and graphics items.
+        '''
+        # like a new row, the row is not adding waypoints for the other agent
+        self.setAddWaypointMode(False)
         self.pedestrianAgent = agent
+        if self.pedestrian_editor is not None:
+            self.pedestrian_editor.pedestrianAgent = agent
+            self.pedestrian_editor.updateValuesFromPedestrianAgent()
         self.updateEverythingFromPedestrianAgent()
+        # the row has just been set from the agent
+        self.dirty = False
 
     def updateEverythingFromPedestrianAgent(self):
         # position
-        self.posXSpinBox.setValue(self.pedestrianAgent.pos[0])
-        self.posYSpinBox.setValue(self.pedestrianAgent.pos[1])
+        self.setPosition(self.pedestrianAgent.pos[0], self.pedestrianAgent.pos[1])
+        # 2D positions have no z coordinate
+        pos = self.pedestrianAgent.pos
+        self.z = float(pos[2]) if len(pos) > 2 else 0.0
         # waypoints
-        # remove all waypoint widgets
-        for w in self.getWaypointWidgets():
-            w.remove()
-        # add new waypoints
-        for wp in self.pedestrianAgent.waypoints:
-            pos = QtCore.QPointF(wp[0], wp[1])
-            self.addWaypoint(pos)
-        # update name label
-        self.updateNameLabelFromPedestrianAgent()
-        # update item scene
+        # reuse the existing waypoint rows and only remove or add the difference
+        waypoint_rows = self.getWaypointRows()
+        waypoints = self.pedestrianAgent.waypoints
+        for w in waypoint_rows[len(waypoints):]:
+            self.removeWaypoint(w)
+        for w, wp in zip(waypoint_rows, waypoints):
+            w.setPos(QtCore.QPointF(wp[0], wp[1]))
+            w.z = float(wp[2]) if len(wp) > 2 else 0.0
+            w.rowChanged()
+        new_rows = [
+            WaypointRow(
+                self, self.graphicsScene, QtCore.QPointF(wp[0], wp[1]),
+                float(wp[2]) if len(wp) > 2 else 0.0
+            )
+            for wp in waypoints[len(waypoint_rows):]
+        ]
+        self.appendChildRows(new_rows)
+        self.scheduleWaypointPathRedraw()
+        # update row and item scene
+        self.rowChanged()
         self.updateGraphicsPathItemFromPedestrianAgent()
 
-    def updateNameLabelFromPedestrianAgent(self):
-        self.name_label.setText(self.pedestrianAgent.name)
-
     def handleEditorSaved(self):
         # editor was saved, update possibly changed values
-        self.updateNameLabelFromPedestrianAgent()
+        self.rowChanged()
         self.updateGraphicsPathItemFromPedestrianAgent()
+        self.markDirty()
 
-    def updateWaypointIdLabels(self):
-        widgets = self.getWaypointWidgets()
-        for i, w in enumerate(widgets):
-            w.setId(i)
+    def markDirty(self):
+        self.dirty = True
+        self.modified.emit()
 
     # @pyqtSlot(QtCore.QPointF)
     def handleGraphicsViewClick(self, pos: QtCore.QPointF):
         if self.addWaypointModeActive:
             self.addWaypoint(pos)
 
-    def addWaypoint(self, pos: QtCore.QPointF = None):
-        w = WaypointWidget(self, self.graphicsScene, pos, parent=self)
-        self.waypointListWidget.layout().addWidget(w)
-        self.updateWaypointIdLabels()
-        self.drawWaypointPath()
+    def addWaypoint(self, pos: QtCore.QPointF = None) -> WaypointRow:
+        w = WaypointRow(self, self.graphicsScene, pos)
+        self.appendChildRows([w])
+        self.scheduleWaypointPathRedraw()
+        self.markDirty()
+        return w
 
-    def removeWaypoint(self, waypointWidget: WaypointWidget):
-        self.waypointListWidget.layout().removeWidget(waypointWidget)
-        self.updateWaypointIdLabels()
-        self.drawWaypointPath()
+    def removeWaypoint(self, waypointRow: WaypointRow):
+        waypointRow.removeItems()
+        self.removeChildRow(waypointRow)
+        self.scheduleWaypointPathRedraw()
+        self.markDirty()
 
     def setAddWaypointMode(self, enable: bool):
+        # only rows in add waypoint mode receive the clicks on the graphics view
+        if enable and not self.addWaypointModeActive:
+            self.graphicsView.clickedPos.connect(self.handleGraphicsViewClick)
+        elif not enable and self.addWaypointModeActive:
+            self.graphicsView.clickedPos.disconnect(self.handleGraphicsViewClick)
         self.addWaypointModeActive = enable
         if enable:
+            if self.activeModeWindow is None:
+                self.activeModeWindow = ActiveModeWindow(self)
             self.activeModeWindow.show()
-        else:
+        elif self.activeModeWindow is not None:
             self.activeModeWindow.hide()
 
     def save(self):
         # saves position and waypoints to the pedestrian agent
         # all other attributes should have already been saved by the PedestrianAgentEditor
         # position
-        self.pedestrianAgent.pos = np.array([self.posXSpinBox.value(), self.posYSpinBox.value(), self.posZSpinBox.value()])
+        pos = self.getCurrentAgentPosition()
+        self.pedestrianAgent.pos = np.array([pos.x(), pos.y(), self.z])
         # waypoints
-        self.pedestrianAgent.waypoints = []
-        for w in self.getWaypointWidgets():
-            x, y, z = w.getPos()
-            self.pedestrianAgent.waypoints.append(np.array([x, y, z]))
+        self.pedestrianAgent.waypoints = [np.array(w.getPos()) for w in self.getWaypointRows()]
+        self.dirty = False
 
-    def remove(self):
-        # remove waypoints
-        for w in self.getWaypointWidgets():
-            w.remove()
-        # remove items from scene
+    def removeItems(self):
+        '''
+        Removes the graphics items and windows of this row from the scene,
+        but not the row from the model.
+        '''
+        self.setAddWaypointMode(False)
+        for w in self.getWaypointRows():
+            w.removeItems()
+        self.waypointPathTimer.stop()
         self.graphicsScene.removeItem(self.graphicsPathItem)
         self.graphicsScene.removeItem(self.graphicsPathItem.textItem)
         self.graphicsScene.removeItem(self.waypointPathItem)
-        del self.graphicsPathItem.keyPressEater  # delete to remove event filter
-        # remove widget
-        self.parent().layout().removeWidget(self)
+        if self.pedestrian_editor is not None:
+            self.pedestrian_editor.deleteLater()
+        if self.activeModeWindow is not None:
+            self.activeModeWindow.deleteLater()
+
+    def remove(self):
+        self.removeItems()
+        if self.model is not None:
+            self.model.removeRowObject(self)
+        self.modified.emit()
         self.deleteLater()
 
     def onAddWaypointClicked(self):
@@ -353,37 +346,94 @@ class PedestrianAgentWidget(QtWidgets.QFrame):
             self.setAddWaypointMode(True)
 
     def onEditClicked(self):
+        if self.pedestrian_editor is None:
+            self.pedestrian_editor = PedestrianAgentEditor(
+                self, parent=self.parent(), flags=QtCore.Qt.WindowType.Window
+            )
+            self.pedestrian_editor.editorSaved.connect(self.handleEditorSaved)
         self.pedestrian_editor.show()
 
     def onDeleteClicked(self):
         self.remove()
 
 
-class RobotAgentWidget(QtWidgets.QFrame):
+class RobotPositionRow(ArenaTreeRow):
     '''
-    This is a row in the obstacles frame.
+    The start or the goal of a robot agent, shown as a child row of its RobotAgentRow.
+    The x and y coordinates are held by the ellipse item in the scene.
     '''
 
+    def __init__(self, robotAgentRow, name: str, ellipseItem: ArenaGraphicsEllipseItem):
+        self.robotAgentRow = robotAgentRow
+        self.name = name
+        self.ellipseItem = ellipseItem
+        self.z = 0.0
+
+    def rowValues(self) -> list:
+        x, y, z = self.getPos()
+        return [self.name, x, y, z]
+
+    def setRowData(self, column: int, value) -> bool:
+        x, y, z = self.getPos()
+        if column == 1:
+            self.setPos(value, y)
+        elif column == 2:
+            self.setPos(x, value)
+        elif column == 3:
+            self.z = value
+        else:
+            return False
+        self.robotAgentRow.markDirty()
+        return True
+
+    def setPos(self, x: float, y: float):
+        # set without event to prevent recursion between the row and the graphics item
+        self.ellipseItem.setPosNoEvent(x, y)
+        self.robotAgentRow.arrowItem.updatePosition()
+
+    def getPos(self) -> Tuple[float, float, float]:
+        pos = self.ellipseItem.pos()
+        return pos.x(), pos.y(), self.z
+
+    def setFromArray(self, position):
+        self.setPos(position[0], position[1])
+        self.z = float(position[2])
+        self.rowChanged()
+
+    def handleItemChange(self):
+        # function will be called by the graphics item
+        self.rowChanged()
+        self.robotAgentRow.markDirty()
+
+
+class RobotAgentRow(QtCore.QObject, ArenaTreeRow):
+    '''
+    A row in the robot agents side bar, with the start and the goal as child rows.
+    Owns the graphics items of the agent. The agent editor is only created when it is first shown.
+    self.dirty is True if the row has been changed since the robot agent was last saved.
+    '''
+    modified = QtCore.pyqtSignal()
+
     def __init__(self, id: int, robotAgentIn: Robot, graphicsScene: QtWidgets.QGraphicsScene, graphicsView: ArenaQGraphicsView, **kwargs):
         super().__init__(**kwargs)
         self.id = id
+        self.dirty = False
         self.robotAgent = robotAgentIn
         self.graphicsScene = graphicsScene
         self.graphicsView = graphicsView
+        self.robot_editor = None
 
         # create path item
         self.graphicsPathItem = ArenaGraphicsPathItem(self)
         # add to scene
         self.graphicsScene.addItem(self.graphicsPathItem)
-        # setup widgets
-        self.setup_ui()
-        # setup robot agent editor
-        self.robot_editor = RobotAgentEditor(self, parent=self.parent(), flags=QtCore.Qt.WindowType.Window)
-        self.robot_editor.editorSaved.connect(self.handleEditorSaved)
 
         # create graphics items displayed in the scene
         # start pos
-        self.startGraphicsEllipseItem = ArenaGraphicsEllipseItem(self.startXSpinBox, self.startYSpinBox, -0.25, -0.25, 0.5, 0.5)
+        self.startGraphicsEllipseItem = ArenaGraphicsEllipseItem(
+            None, None, -0.25, -0.25, 0.5, 0.5,
+            handlePositionChangedMethod=lambda _: self.startRow.handleItemChange()
+        )
         # set color
         brush = QtGui.QBrush(QtGui.QColor("green"), QtCore.Qt.BrushStyle.SolidPattern)
         self.startGraphicsEllipseItem.setBrush(brush)
@@ -393,7 +443,10 @@ class RobotAgentWidget(QtWidgets.QFrame):
         self.graphicsScene.addItem(self.startGraphicsEllipseItem)
 
         # goal pos
-        self.goalGraphicsEllipseItem = ArenaGraphicsEllipseItem(self.goalXSpinBox, self.goalYSpinBox, -0.25, -0.25, 0.5, 0.5)
+        self.goalGraphicsEllipseItem = ArenaGraphicsEllipseItem(
+            None, None, -0.25, -0.25, 0.5, 0.5,
+            handlePositionChangedMethod=lambda _: self.goalRow.handleItemChange()
+        )
         # set color
         brush = QtGui.QBrush(QtGui.QColor("red"), QtCore.Qt.BrushStyle.SolidPattern)
         self.goalGraphicsEllipseItem.setBrush(brush)
@@ -406,98 +459,51 @@ class RobotAgentWidget(QtWidgets.QFrame):
         self.arrowItem = ArenaArrowItem(self.startGraphicsEllipseItem, self.goalGraphicsEllipseItem)
         self.graphicsScene.addItem(self.arrowItem)
 
+        # child rows
+        self.startRow = RobotPositionRow(self, "Start", self.startGraphicsEllipseItem)
+        self.goalRow = RobotPositionRow(self, "Goal", self.goalGraphicsEllipseItem)
+        self.rowChildren = []
+        self.appendChildRows([self.startRow, self.goalRow])
+
         # move start and goal positions a bit to make them not overlap
-        self.startXSpinBox.setValue(self.robotAgent.start[0])
-        self.startYSpinBox.setValue(self.robotAgent.start[1])
-        self.startZSpinBox.setValue(self.robotAgent.start[2])
-        self.goalXSpinBox.setValue(self.robotAgent.goal[0])
-        self.goalYSpinBox.setValue(self.robotAgent.goal[1])
-        self.goalZSpinBox.setValue(self.robotAgent.goal[2])
+        self.updatePositionsFromRobotAgent()
 
-        # resets
-        self.resetsSpinBox.setValue(0)
+        # the row has just been set from the agent
+        self.dirty = False
 
-    def setup_ui(self):
-        self.setLayout(QtWidgets.QGridLayout())
-        self.setFrameStyle(QtWidgets.QFrame.Shape.Box | QtWidgets.QFrame.Shadow.Raised)
-        self.setStyleSheet("background-color: rgb(255, 255, 255);")
-
-        # name label
-        self.name_label = QtWidgets.QLabel(self.robotAgent.name)
-        self.layout().addWidget(self.name_label, 0, 0)
-
-        # edit button
-        self.edit_button = QtWidgets.QPushButton("Edit")
-        self.edit_button.clicked.connect(self.onEditClicked)
-        self.layout().addWidget(self.edit_button, 0, 1, 1, 2)
-
-        # delete button
-        self.delete_button = QtWidgets.QPushButton("Delete")
-        self.delete_button.clicked.connect(self.onDeleteClicked)
-        self.delete_button.setStyleSheet("background-color: red")
-        self.layout().addWidget(self.delete_button, 0, 3, 1, 1)
-
-        # start position
-        label = QtWidgets.QLabel("Start:")
-        self.layout().addWidget(label, 1, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
-        self.startXSpinBox = ArenaQDoubleSpinBox()
-        self.startXSpinBox.valueChanged.connect(self.updateGraphicsItemsFromSpinBoxes)
-        self.layout().addWidget(self.startXSpinBox, 1, 1)
-        self.startYSpinBox = ArenaQDoubleSpinBox()
-        self.startYSpinBox.valueChanged.connect(self.updateGraphicsItemsFromSpinBoxes)
-        self.layout().addWidget(self.startYSpinBox, 1, 2)
-        self.startZSpinBox = ArenaQDoubleSpinBox()
-        self.layout().addWidget(self.startZSpinBox, 1, 3)
-
-        # goal position
-        label = QtWidgets.QLabel("Goal:")
-        self.layout().addWidget(label, 2, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
-        self.goalXSpinBox = ArenaQDoubleSpinBox()
-        self.goalXSpinBox.valueChanged.connect(self.updateGraphicsItemsFromSpinBoxes)
-        self.layout().addWidget(self.goalXSpinBox, 2, 1)
-        self.goalYSpinBox = ArenaQDoubleSpinBox()
-        self.goalYSpinBox.valueChanged.connect(self.updateGraphicsItemsFromSpinBoxes)
-        self.layout().addWidget(self.goalYSpinBox, 2, 2)
-        self.goalZSpinBox = ArenaQDoubleSpinBox()
-        self.layout().addWidget(self.goalZSpinBox, 2, 3)
-
-        self.resetsSpinBox = QtWidgets.QSpinBox()
-        self.resetsSpinBox.setMinimum(0)
-        rst_label = QtWidgets.QLabel("Episode resets:")
-        self.layout().addWidget(rst_label, 3, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
-        self.layout().addWidget(self.resetsSpinBox, 3, 1)
-
-    def updateSpinBoxesFromGraphicsItems(self):
-        # start
-        new_pos = self.startGraphicsEllipseItem.mapToScene(self.startGraphicsEllipseItem.transformOriginPoint())
-        self.startXSpinBox.setValue(new_pos.x())
-        self.startYSpinBox.setValue(new_pos.y())
-        # goal
-        new_pos = self.goalGraphicsEllipseItem.mapToScene(self.goalGraphicsEllipseItem.transformOriginPoint())
-        self.goalXSpinBox.setValue(new_pos.x())
-        self.goalYSpinBox.setValue(new_pos.y())
-
-    def updateGraphicsItemsFromSpinBoxes(self):
-        # start
-        if not self.startGraphicsEllipseItem.isDragged:  # prevents recursive loop (spin box <-> moving item)
-            x = self.startXSpinBox.value()
-            y = self.startYSpinBox.value()
-            self.startGraphicsEllipseItem.setPosNoEvent(x, y)
-        # goal
-        if not self.goalGraphicsEllipseItem.isDragged:
-            x = self.goalXSpinBox.value()
-            y = self.goalYSpinBox.value()
-            self.goalGraphicsEllipseItem.setPosNoEvent(x, y)
-
-        self.arrowItem.updatePosition()
+    def rowValues(self) -> list:
+        return [self.robotAgent.name, None, None, None]
+
+    def setRobotAgent(self, agent: Robot):
+        '''
+        Shows another robot agent in this row, reusing the graphics items.
+        '''
+        self.robotAgent = agent
+        if self.robot_editor is not None:
+            self.robot_editor.robotAgent = agent
+            self.robot_editor.updateValuesFromRobotAgent()
+        self.rowChanged()
+        self.updateGraphicsPathItemFromRobotAgent()
+        self.updatePositionsFromRobotAgent()
+        # the row has just been set from the agent
+        self.dirty = False
+
+    def updatePositionsFromRobotAgent(self):
+        self.startRow.setFromArray(self.robotAgent.start)
+        self.goalRow.setFromArray(self.robotAgent.goal)
 
     def save(self):
         # saves start and goal position to the robot agent
         # all other attributes should have already been saved by the RobotAgentEditor
-        self.robotAgent.start = np.array([self.startXSpinBox.value(), self.startYSpinBox.value(), self.startZSpinBox.value()])
-        self.robotAgent.goal = np.array([self.goalXSpinBox.value(), self.goalYSpinBox.value(), self.goalZSpinBox.value()])
+        self.robotAgent.start = np.array(self.startRow.getPos())
+        self.robotAgent.goal = np.array(self.goalRow.getPos())
+        self.dirty = False
 
-    def remove(self):
+    def removeItems(self):
+        '''
+        Removes the graphics items and windows of this row from the scene,
+        but not the row from the model.
+        '''
         # remove start, goal and arrow
         self.graphicsScene.removeItem(self.startGraphicsEllipseItem)
         self.graphicsScene.removeItem(self.startGraphicsEllipseItem.textItem)
@@ -507,28 +513,44 @@ class RobotAgentWidget(QtWidgets.QFrame):
         # remove items from scene
         self.graphicsScene.removeItem(self.graphicsPathItem)
         self.graphicsScene.removeItem(self.graphicsPathItem.textItem)
-        del self.graphicsPathItem.keyPressEater  # delete to remove event filter
-        # remove widget
-        self.parent().layout().removeWidget(self)
+        if self.robot_editor is not None:
+            self.robot_editor.deleteLater()
+
+    def remove(self):
+        self.removeItems()
+        if self.model is not None:
+            self.model.removeRowObject(self)
+        self.modified.emit()
         self.deleteLater()
 
     def handleItemChange(self):
-        self.updateSpinBoxesFromGraphicsItems()
+        # function will be called by the graphics item, the path of robots is empty
+        pass
+
+    def handleMouseDoubleClick(self):
+        self.onEditClicked()
 
     def updateGraphicsPathItemFromRobotAgent(self):
-        self.startGraphicsEllipseItem.textItem.setPlainText(self.name_label.text() + " Start")
-        self.goalGraphicsEllipseItem.textItem.setPlainText(self.name_label.text() + " Goal")
+        self.startGraphicsEllipseItem.textItem.setPlainText(self.robotAgent.name + " Start")
+        self.goalGraphicsEllipseItem.textItem.setPlainText(self.robotAgent.name + " Goal")
         self.graphicsPathItem.updateTextItemPos()
 
-    def updateNameLabelFromRobotAgent(self):
-        self.name_label.setText(self.robotAgent.name)
-
     def handleEditorSaved(self):
         # editor was saved, update possibly changed values
-        self.updateNameLabelFromRobotAgent()
+        self.rowChanged()
         self.updateGraphicsPathItemFromRobotAgent()
+        self.markDirty()
+
+    def markDirty(self):
+        self.dirty = True
+        self.modified.emit()
 
     def onEditClicked(self):
+        if self.robot_editor is None:
+            self.robot_editor = RobotAgentEditor(
+                self, parent=self.parent(), flags=QtCore.Qt.WindowType.Window
+            )
+            self.robot_editor.editorSaved.connect(self.handleEditorSaved)
         self.robot_editor.show()
 
     def onDeleteClicked(self):
@@ -536,6 +558,8 @@ class RobotAgentWidget(QtWidgets.QFrame):
 
 
 class ArenaScenarioEditor(QtWidgets.QMainWindow):
+    AUTOSAVE_INTERVAL = 60 * 1000  # ms
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.setup_ui()
@@ -544,10 +568,13 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
         self.numRobots = 0
         self.pixmap_item = None
         self.mapData = None
+        self.mapImageMtime = None
         self.currentSavePath = ""
         self.copied = []
         self.lastPedestrianNameId = 0
         self.lastRobotNameId = 0
+        # True if agents have been added, removed or changed since the last save
+        self.scenarioModified = False
 
         self.selected_world = ""
         self.selected_scenario = ""
@@ -610,15 +637,32 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
         file_menu.addAction("Open...", self.onOpenClicked, "Ctrl+O")
         file_menu.addAction("Save", self.onSaveClicked, "Ctrl+S")
         file_menu.addAction("Save As...", self.onSaveAsClicked, "Ctrl+Shift+S")
+        autosave_action = file_menu.addAction("Autosave")
+        autosave_action.setCheckable(True)
+        autosave_action.toggled.connect(self.setAutosave)
         add_menu = menubar.addMenu("Elements")
         add_menu.addAction("Add Robot Agent", self.onAddRobotAgentClicked, "Ctrl+1")
         add_menu.addAction("Add Pedestrian Agent", self.onAddPedestrianAgentClicked, "Ctrl+2")
         global_pedestrian_settings_menu = menubar.addMenu("Global Configs")
         global_pedestrian_settings_menu.addAction("Pedestrian Agents...", self.onPedestrianAgentsGlobalConfigClicked)
+        view_menu = menubar.addMenu("View")
+        frame_time_action = view_menu.addAction("Frame Time Overlay")
+        frame_time_action.setCheckable(True)
+        frame_time_action.toggled.connect(lambda enable: self.gview.setFrameTimeOverlay(enable))
 
         # status bar
         self.statusBar()  # create status bar
 
+        # saving in the background
+        self.saver = BackgroundSaver(self)
+        self.saver.saveFinished.connect(self.handleSaveFinished)
+        self.saver.saveFailed.connect(self.handleSaveFailed)
+        self.saveStatusLabel = SaveStatusLabel(self.saver)
+        self.statusBar().addPermanentWidget(self.saveStatusLabel)
+        self.autosaveTimer = QtCore.QTimer(self)
+        self.autosaveTimer.setInterval(self.AUTOSAVE_INTERVAL)
+        self.autosaveTimer.timeout.connect(self.onAutosave)
+
         # drawing frame
         # frame
         drawing_frame = QtWidgets.QFrame()
@@ -632,32 +676,47 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
         drawing_frame.layout().addWidget(self.gview)
 
         # left side bar
+        # the agents are rows of tree models, only the visible rows are drawn
         side_bar_splitter = QtWidgets.QSplitter()
         side_bar_splitter.setOrientation(QtCore.Qt.Orientation.Vertical)
         # obstacles
-        # scrollarea
-        self.obstacles_scrollarea = QtWidgets.QScrollArea(self)
-        self.obstacles_scrollarea.setWidgetResizable(True)
-        self.obstacles_scrollarea.setMinimumWidth(560)
-        # frame
-        self.obstacles_frame = QtWidgets.QFrame()
-        self.obstacles_frame.setLayout(QtWidgets.QVBoxLayout())
-        self.obstacles_frame.setSizePolicy(QtWidgets.QSizePolicy.Policy.Maximum, QtWidgets.QSizePolicy.Policy.Maximum)
-        self.obstacles_scrollarea.setWidget(self.obstacles_frame)
+        self.pedestrianModel = ArenaTreeModel(["Name", "x", "y", "z"], self)
+        self.pedestrianView = ArenaTreeView(self.pedestrianModel)
+        self.pedestrianView.setMinimumWidth(560)
+        self.pedestrianView.doubleClicked.connect(self.onAgentDoubleClicked)
+        obstacles_frame = QtWidgets.QFrame()
+        obstacles_frame.setLayout(QtWidgets.QGridLayout())
+        obstacles_frame.layout().addWidget(self.pedestrianView, 0, 0, 1, 3)
+        # buttons acting on the selected rows
+        button = QtWidgets.QPushButton("Edit...")
+        button.clicked.connect(lambda: self.onEditAgentsClicked(self.pedestrianView))
+        obstacles_frame.layout().addWidget(button, 1, 0)
+        button = QtWidgets.QPushButton("Add Waypoints...")
+        button.clicked.connect(self.onAddWaypointsClicked)
+        obstacles_frame.layout().addWidget(button, 1, 1)
+        button = QtWidgets.QPushButton("Delete")
+        button.setStyleSheet("background-color: red")
+        button.clicked.connect(lambda: self.onDeleteRowsClicked(self.pedestrianView))
+        obstacles_frame.layout().addWidget(button, 1, 2)
 
         # robots
-        # scrollarea
-        self.robot_scrollarea = QtWidgets.QScrollArea(self)
-        self.robot_scrollarea.setWidgetResizable(True)
-        self.robot_scrollarea.setMinimumWidth(560)
-        # frame
-        self.robots_frame = QtWidgets.QFrame()
-        self.robots_frame.setLayout(QtWidgets.QVBoxLayout())
-        self.robots_frame.setSizePolicy(QtWidgets.QSizePolicy.Policy.Maximum, QtWidgets.QSizePolicy.Policy.Maximum)
-        self.robot_scrollarea.setWidget(self.robots_frame)
-
-        side_bar_splitter.addWidget(self.robot_scrollarea)
-        side_bar_splitter.addWidget(self.obstacles_scrollarea)
+        self.robotModel = ArenaTreeModel(["Name", "x", "y", "z"], self)
+        self.robotView = ArenaTreeView(self.robotModel)
+        self.robotView.setMinimumWidth(560)
+        self.robotView.doubleClicked.connect(self.onAgentDoubleClicked)
+        robots_frame = QtWidgets.QFrame()
+        robots_frame.setLayout(QtWidgets.QGridLayout())
+        robots_frame.layout().addWidget(self.robotView, 0, 0, 1, 2)
+        button = QtWidgets.QPushButton("Edit...")
+        button.clicked.connect(lambda: self.onEditAgentsClicked(self.robotView))
+        robots_frame.layout().addWidget(button, 1, 0)
+        button = QtWidgets.QPushButton("Delete")
+        button.setStyleSheet("background-color: red")
+        button.clicked.connect(lambda: self.onDeleteRowsClicked(self.robotView))
+        robots_frame.layout().addWidget(button, 1, 1)
+
+        side_bar_splitter.addWidget(robots_frame)
+        side_bar_splitter.addWidget(obstacles_frame)
         central_splitter.addWidget(side_bar_splitter)
         central_splitter.addWidget(drawing_frame)
         self.centralWidget().layout().addWidget(central_splitter)
@@ -666,17 +725,18 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
         self.pedestrianAgentsGlobalConfigWidget.show()
 
     def onPedestrianAgentsGlobalConfigChanged(self):
-        for w in self.getPedestrianAgentWidgets():
+        for w in self.getPedestrianAgentRows():
             w.save()
             global_agent = copy.deepcopy(self.pedestrianAgentsGlobalConfigWidget.pedestrianAgent)
             # preserve individual values
+            # agents of a PedestrianStore return views of its arrays, copies are not shared
             global_agent.name = w.pedestrianAgent.name
-            global_agent.pos = w.pedestrianAgent.pos
-            global_agent.waypoints = w.pedestrianAgent.waypoints
+            global_agent.pos = np.array(w.pedestrianAgent.pos, copy=True)
+            global_agent.waypoints = [
+                np.array(wp, copy=True) for wp in w.pedestrianAgent.waypoints
+            ]
             # set new agent
-            w.pedestrianAgent = global_agent
-            w.pedestrianAgentEditor.pedestrianAgent = global_agent
-            w.pedestrianAgentEditor.updateValuesFromPedestrianAgent()
+            w.setPedestrianAgent(global_agent)
             w.handleEditorSaved()
 
     def onSetMapClicked(self):
@@ -686,18 +746,44 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
             self.show_select_world_dialog(initialize=True)
 
     def setMap(self, path: str):
-        self.mapData = RosMapData(path)
-        pixmap = QtGui.QPixmap(self.mapData.image_path)
-        transform = QtGui.QTransform.fromScale(1.0, -1.0)  # flip y axis
-        pixmap = pixmap.transformed(transform)
-        if self.pixmap_item is not None:
-            # remove old map
-            self.gscene.removeItem(self.pixmap_item)
-        self.pixmap_item = QtWidgets.QGraphicsPixmapItem(pixmap)
-        self.pixmap_item.setZValue(-1.0)  # make sure map is always in the background
-        self.pixmap_item.setScale(self.mapData.resolution)
-        self.pixmap_item.setOffset(self.mapData.origin[0] / self.mapData.resolution, self.mapData.origin[1] / self.mapData.resolution)
-        self.gscene.addItem(self.pixmap_item)
+        mapData = RosMapData(path)
+        if self.pixmap_item is None:
+            self.pixmap_item = ArenaMapItem()
+            self.pixmap_item.loadFailed.connect(self.handleMapLoadFailed)
+            self.gscene.addItem(self.pixmap_item)
+        elif self.isMapLoaded(mapData):
+            # same map, the image does not need to be decoded again
+            self.mapData = mapData
+            return
+        self.mapData = mapData
+        self.mapImageMtime = self.getMapImageMtime(mapData.image_path)
+        # the image is decoded in the background
+        self.pixmap_item.load(
+            self.mapData.image_path, self.mapData.resolution, self.mapData.origin
+        )
+
+    def isMapLoaded(self, mapData: RosMapData) -> bool:
+        '''
+        Checks if the map item already shows the map of mapData
+        and the image file has not changed since.
+        '''
+        return (self.mapData is not None
+                and mapData.image_path == self.mapData.image_path
+                and mapData.resolution == self.mapData.resolution
+                and mapData.origin == self.mapData.origin
+                and self.getMapImageMtime(mapData.image_path) == self.mapImageMtime
+                and self.pixmap_item.loadError == "")
+
+    def handleMapLoadFailed(self, imagePath: str, error: str):
+        msg = f"[{time.strftime('%H:%M:%S')}] Could not load map image {imagePath}: {error}"
+        self.statusBar().showMessage(msg, 10 * 1000)
+
+    @staticmethod
+    def getMapImageMtime(image_path: str) -> float:
+        try:
+            return os.path.getmtime(image_path)
+        except OSError:
+            return None
 
     def getMapData(self, path: str) -> dict:
         # read yaml file containing map meta data
@@ -706,63 +792,106 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
             return data
 
     def disableAddWaypointMode(self):
-        widgets = self.getPedestrianAgentWidgets()
-        for w in widgets:
+        rows = self.getPedestrianAgentRows()
+        for w in rows:
             w.setAddWaypointMode(False)
 
     def onAddPedestrianAgentClicked(self):
         new_agent = Pedestrian(self.generatePedestrianName())
         self.arenaScenario.pedestrianAgents.append(new_agent)
-        self.addPedestrianAgentWidget(new_agent)
+        self.addPedestrianAgentRow(new_agent)
 
     def onAddRobotAgentClicked(self):
         new_agent = Robot(self.generateRobotName())
         self.arenaScenario.robotAgents.append(new_agent)
-        self.addRobotAgentWidget(new_agent)
+        self.addRobotAgentRow(new_agent)
+
+    def onAgentDoubleClicked(self, index: QtCore.QModelIndex):
+        # the name column opens the agent editor, the other columns are edited in place
+        row = index.model().rowFromIndex(index)
+        if index.column() == 0 and hasattr(row, "onEditClicked"):
+            row.onEditClicked()
+
+    def onEditAgentsClicked(self, view: ArenaTreeView):
+        row = view.currentRowObject()
+        if row is not None and not hasattr(row, "onEditClicked"):
+            # child row, edit its agent
+            row = row.rowParent
+        if row is not None:
+            row.onEditClicked()
+
+    def onAddWaypointsClicked(self):
+        row = self.pedestrianView.currentRowObject()
+        if isinstance(row, WaypointRow):
+            row = row.pedestrianAgentRow
+        if row is not None:
+            row.onAddWaypointClicked()
+
+    def onDeleteRowsClicked(self, view: ArenaTreeView):
+        for row in view.selectedRowObjects():
+            # rows can already be removed together with their parent
+            if row.model is not None and hasattr(row, "remove"):
+                row.remove()
+
+    def createPedestrianAgentRow(self, agent: Pedestrian) -> PedestrianAgentRow:
+        w = PedestrianAgentRow(self.numObstacles, agent, self.gscene, self.gview, parent=self)
+        w.modified.connect(self.onScenarioModified)
+        self.numObstacles += 1
+        return w
 
-    def addPedestrianAgentWidget(self, agent: Pedestrian) -> PedestrianAgentWidget:
+    def createRobotAgentRow(self, agent: Robot) -> RobotAgentRow:
+        w = RobotAgentRow(self.numRobots, agent, self.gscene, self.gview, parent=self)
+        w.modified.connect(self.onScenarioModified)
+        self.numRobots += 1
+        return w
+
+    def addPedestrianAgentRows(self, agents: List[Pedestrian]) -> List[PedestrianAgentRow]:
         '''
-        Adds a new pedestrian agent widget with the given agent.
+        Adds new pedestrian agent rows with the given agents, inserted into the model at once.
         Warning: self.arenaScenario is not updated. Management of self.arenaScenario happens outside of this function.
         '''
-        w = PedestrianAgentWidget(self.numObstacles, agent, self.gscene, self.gview, parent=self)
-        self.obstacles_frame.layout().addWidget(w)
-        self.numObstacles += 1
-        return w
+        rows = [self.createPedestrianAgentRow(agent) for agent in agents]
+        self.pedestrianModel.appendRowObjects(None, rows)
+        self.scenarioModified = True
+        return rows
 
-    def addRobotAgentWidget(self, agent) -> RobotAgentWidget:
+    def addRobotAgentRows(self, agents: List[Robot]) -> List[RobotAgentRow]:
         '''
-        Adds a new robot agent widget with the given agent.
+        Adds new robot agent rows with the given agents, inserted into the model at once.
         Warning: self.arenaScenario is not updated. Management of self.arenaScenario happens outside of this function.
         '''
-        w = RobotAgentWidget(self.numRobots, agent, self.gscene, self.gview, parent=self)
-        self.robots_frame.layout().addWidget(w)
-        self.numRobots += 1
-        return w
+        rows = [self.createRobotAgentRow(agent) for agent in agents]
+        self.robotModel.appendRowObjects(None, rows)
+        self.scenarioModified = True
+        return rows
 
-    def getPedestrianAgentWidgets(self):
-        widgets = []
-        for i in range(self.obstacles_frame.layout().count()):
-            w = self.obstacles_frame.layout().itemAt(i).widget()
-            if w is not None and isinstance(w, PedestrianAgentWidget):
-                widgets.append(w)
-        return widgets
-
-    def getRobotAgentWidgets(self):
-        widgets = []
-        for i in range(self.robots_frame.layout().count()):
-            w = self.robots_frame.layout().itemAt(i).widget()
-            if w is not None and isinstance(w, RobotAgentWidget):
-                widgets.append(w)
-        return widgets
+    def addPedestrianAgentRow(self, agent: Pedestrian) -> PedestrianAgentRow:
+        return self.addPedestrianAgentRows([agent])[0]
+
+    def addRobotAgentRow(self, agent: Robot) -> RobotAgentRow:
+        return self.addRobotAgentRows([agent])[0]
+
+    def onScenarioModified(self):
+        self.scenarioModified = True
+
+    def isScenarioModified(self) -> bool:
+        '''
+        Checks if the scenario in the widgets differs from the last saved or loaded scenario.
+        '''
+        if self.scenarioModified:
+            return True
+        if self.mapData is not None and self.mapData.path != self.arenaScenario.mapPath:
+            return True
+        return False
+
+    def getPedestrianAgentRows(self) -> List[PedestrianAgentRow]:
+        return list(self.pedestrianModel.rows)
+
+    def getRobotAgentRows(self) -> List[RobotAgentRow]:
+        return list(self.robotModel.rows)
 
     def getElementsCount(self):
-        count = 0
-        for i in range(self.obstacles_frame.layout().count()):
-            w = self.obstacles_frame.layout().itemAt(i).widget()
-            if w is not None and isinstance(w, PedestrianAgentWidget):
-                count += 1
-        return count
+        return len(self.pedestrianModel.rows)
 
     def generatePedestrianName(self):
         self.lastPedestrianNameId += 1
@@ -790,16 +919,16 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
     def toggleWaypointMode(self):
         # active waypoint mode for selected pedestrian agents
         for item in self.gscene.selectedItems():
-            if hasattr(item, "parentWidget"):
-                widget = item.parentWidget
-                if isinstance(widget, PedestrianAgentWidget):
-                    widget.onAddWaypointClicked()
+            if hasattr(item, "parentRow"):
+                row = item.parentRow
+                if isinstance(row, PedestrianAgentRow):
+                    row.onAddWaypointClicked()
 
     def pasteElements(self):
         # duplicate copied items
         for item in self.copied:
-            widget = item.parentWidget
-            if isinstance(widget, PedestrianAgentWidget):
+            widget = getattr(item, "parentRow", None)
+            if isinstance(widget, PedestrianAgentRow):
                 widget.save()
                 agent = copy.deepcopy(widget.pedestrianAgent)
                 agent.name = self.generatePedestrianName()
@@ -809,14 +938,14 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
                 for wp in agent.waypoints:
                     wp[0] += 1.0
                     wp[1] += 1.0
-                new_widget = self.addPedestrianAgentWidget(agent)
+                new_widget = self.addPedestrianAgentRow(agent)
                 # select new item and waypoints
                 new_widget.graphicsPathItem.setSelected(True)
-                for w in new_widget.getWaypointWidgets():
+                for w in new_widget.getWaypointRows():
                     w.ellipseItem.setSelected(True)
                 # unselect old item and waypoints
                 widget.graphicsPathItem.setSelected(False)
-                for w in widget.getWaypointWidgets():
+                for w in widget.getWaypointRows():
                     w.ellipseItem.setSelected(False)
 
     def onOpenClicked(self):
@@ -916,65 +1045,139 @@ class ArenaScenarioEditor(QtWidgets.QMainWindow):
         self.currentSavePath = path
         self.arenaScenario.loadFromFile(path)
         self.updateWidgetsFromArenaScenario()
+        if self.mapData is not None and self.arenaScenario.mapPath == "":
+            self.arenaScenario.mapPath = self.mapData.path
+        self.scenarioModified = False
 
     def save(self, path: str = "") -> bool:
         if path != "":
             self.currentSavePath = path
 
-        self.updateArenaScenarioFromWidgets()
-        if self.arenaScenario.saveToFile():
-            msg = f"[{time.strftime('%H:%M:%S')}] Saved scenario to {self.arenaScenario.path}"
+        # skip writing the file if it is already up to date
+        if (not self.isScenarioModified()
+                and self.currentSavePath != ""
+                and self.currentSavePath == self.arenaScenario.path
+                and os.path.exists(self.currentSavePath)):
+            msg = f"[{time.strftime('%H:%M:%S')}] No changes to save"
             self.statusBar().showMessage(msg, 10 * 1000)
             return True
 
-        return False
-
-    def updateWidgetsFromArenaScenario(self):
-        # pedestrian agents
-        # remove all pedestrian widgets
-        for w in self.getPedestrianAgentWidgets():
-            w.remove()
-        # create new pedestrian widgets
-        for agent in self.arenaScenario.pedestrianAgents:
-            self.addPedestrianAgentWidget(agent)
+        self.updateArenaScenarioFromWidgets()
+        path = self.arenaScenario.path
+        if path == "":
+            return False
+
+        # serialize and write a snapshot of the scenario in the background
+        codec = get_codec(path)
+        data = self.arenaScenario.toDict()
+        self.saver.save(path, lambda: codec.save(data, path))
+        self.scenarioModified = False
+        return True
+
+    def handleSaveFinished(self, path: str):
+        msg = f"[{time.strftime('%H:%M:%S')}] Saved scenario to {path}"
+        self.statusBar().showMessage(msg, 10 * 1000)
+
+    def handleSaveFailed(self, path: str, error: str):
+        # the changes are still unsaved
+        self.scenarioModified = True
+        msg = f"[{time.strftime('%H:%M:%S')}] Could not save scenario to {path}: {error}"
+        self.statusBar().showMessage(msg, 10 * 1000)
+
+    def setAutosave(self, enable: bool):
+        if enable:
+            self.autosaveTimer.start()
+        else:
+            self.autosaveTimer.stop()
+        self.saveStatusLabel.setAutosave(enable)
 
-        # static obstacles
+    def onAutosave(self):
+        # only save scenarios that already have a file
+        if self.currentSavePath != "" and self.isScenarioModified():
+            self.save()
 
-        # interactive obstacles
-        # TODO
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        # finish saves that are still running
+        self.autosaveTimer.stop()
+        self.saver.shutdown()
+        return super().closeEvent(event)
 
-        # robot agents
-        # remove all robot widgets
-        for w in self.getRobotAgentWidgets():
-            w.remove()
-        # create new robot widgets
-        for agent in self.arenaScenario.robotAgents:
-            self.addRobotAgentWidget(agent)
+    def updateWidgetsFromArenaScenario(self):
+        '''
+        Shows the agents of self.arenaScenario in the side bars.
+        Existing agent rows are reused and only the difference in the number of agents is
+        created or removed. Repaints and the item index of the scene are disabled while the
+        rows are populated.
+        '''
+        self.setUpdatesEnabled(False)
+        self.gscene.setItemIndexMethod(QtWidgets.QGraphicsScene.ItemIndexMethod.NoIndex)
+        try:
+            # pedestrian agents
+            self.updateAgentRows(
+                self.getPedestrianAgentRows(),
+                self.arenaScenario.pedestrianAgents,
+                PedestrianAgentRow.setPedestrianAgent,
+                self.addPedestrianAgentRows
+            )
+
+            # static obstacles
+
+            # interactive obstacles
+            # TODO
+
+            # robot agents
+            self.updateAgentRows(
+                self.getRobotAgentRows(),
+                self.arenaScenario.robotAgents,
+                RobotAgentRow.setRobotAgent,
+                self.addRobotAgentRows
+            )
+        finally:
+            # the index is built once for all items
+            self.gscene.setItemIndexMethod(QtWidgets.QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+            self.setUpdatesEnabled(True)
 
         # map
-        self.setMap(self.mapData.path)
+        # only reloaded if it has changed
+        if self.mapData is not None:
+            self.setMap(self.mapData.path)
 
-    def updateArenaScenarioFromWidgets(self):
+    def updateAgentRows(self, rows: list, agents: list, setAgent, addRows):
         '''
-        Save data from widgets into self.arenaScenario.
+        Shows agents in the rows, reusing rows in order.
+            - setAgent: function (row, agent) which shows agent in an existing row
+            - addRows: function (agents) which creates new rows
         '''
-        # reset scenario
-        self.arenaScenario.__init__()
+        # remove from the end, the following rows don't need to be renumbered
+        for w in reversed(rows[len(agents):]):
+            w.remove()
+        for w, agent in zip(rows, agents):
+            setAgent(w, agent)
+        addRows(agents[len(rows):])
 
+    def updateArenaScenarioFromWidgets(self):
+        '''
+        Save data from the side bars into self.arenaScenario.
+        Only rows that have been changed since the last save are saved into their agents.
+        '''
         # save path
         self.arenaScenario.path = self.currentSavePath
 
         # save pedestrian agents
-        for w in self.getPedestrianAgentWidgets():
-            w.save()  # save all data from widget(s) into pedestrian agent
-            self.arenaScenario.pedestrianAgents.append(w.pedestrianAgent)  # add pedestrian agent
+        pedestrian_rows = self.getPedestrianAgentRows()
+        for w in pedestrian_rows:
+            if w.dirty:
+                w.save()  # save all data from the row into the pedestrian agent
+        self.arenaScenario.pedestrianAgents = [w.pedestrianAgent for w in pedestrian_rows]
 
         # save static obstacles
 
         # save robot agents
-        for w in self.getRobotAgentWidgets():
-            w.save()
-            self.arenaScenario.robotAgents.append(w.robotAgent)
+        robot_rows = self.getRobotAgentRows()
+        for w in robot_rows:
+            if w.dirty:
+                w.save()
+        self.arenaScenario.robotAgents = [w.robotAgent for w in robot_rows]
 
         # save map path
         if self.mapData is not None:
@@ -96,7 +96,6 @@ class PathCreator(QtWidgets.QMainWindow):
         self.addWaypointModeActive = False
         self.activeModeWindow = ActiveModeWindow(self)
         self.activeModeWindow.move(1200, 200)
-        self.view.clickedPos.connect(self.handleGraphicsViewClick)
         # GraphicsItem for drawing a path connecting the waypoints
         self.waypointPathItem = QtWidgets.QGraphicsPathItem()
         # create brush
@@ -354,6 +353,11 @@ class PathCreator(QtWidgets.QMainWindow):
 
     def setAddWaypointMode(self, enable: bool):
         # set the value of addSubgoalModeActive and show/hide a small window depending on the state
+        # the graphics view only sends clicks here in add mode, otherwise clicks select items
+        if enable and not self.addWaypointModeActive:
+            self.view.clickedPos.connect(self.handleGraphicsViewClick)
+        elif not enable and self.addWaypointModeActive:
+            self.view.clickedPos.disconnect(self.handleGraphicsViewClick)
         self.addWaypointModeActive = enable
         if enable:
             self.activeModeWindow.show()
@@ -368,26 +372,22 @@ class PathCreator(QtWidgets.QMainWindow):
         """
         self.map_data = RosMapData(path)
         self.path_data.map_path = path
-        pixmap = QtGui.QPixmap(self.map_data.image_path)
-        transform = QtGui.QTransform.fromScale(1.0, -1.0)  # flip y axis
-        pixmap = pixmap.transformed(transform)
-
-        # remove old map
-        if self.pixmap_item is not None:
-            self.scene.removeItem(self.pixmap_item)
-
-        self.pixmap_item = QtWidgets.QGraphicsPixmapItem(pixmap)
-        self.pixmap_item.setZValue(-1.0)  # make sure map is always in the background
-        self.pixmap_item.setScale(self.map_data.resolution)
-        self.pixmap_item.setOffset(
-            self.map_data.origin[0] / self.map_data.resolution,
-            self.map_data.origin[1] / self.map_data.resolution,
+
+        if self.pixmap_item is None:
+            self.pixmap_item = ArenaMapItem()
+            self.pixmap_item.loadFailed.connect(self.handleMapLoadFailed)
+            self.scene.addItem(self.pixmap_item)
+        # the image is decoded in the background
+        self.pixmap_item.load(
+            self.map_data.image_path, self.map_data.resolution, self.map_data.origin
         )
-        self.scene.addItem(self.pixmap_item)
 
         # update label
         self.map_name_label.setText(pathlib.Path(path).parts[-2])
 
+    def handleMapLoadFailed(self, image_path: str, error: str):
+        self.statusBar().showMessage(f"Could not load map image {image_path}: {error}", 10 * 1000)
+
     def keyPressEvent(self, event: QtGui.QKeyEvent):
         if event.key() == QtCore.Qt.Key.Key_Escape or event.key() == QtCore.Qt.Key.Key_Return:
             self.setAddWaypointMode(False)
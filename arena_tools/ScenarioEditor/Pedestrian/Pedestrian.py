@@ -34,6 +34,9 @@ class PedestrianInteractiveObstacle:
 
 
 class Pedestrian:
+    # keys of the dict representation that are not custom properties
+    FIELDS = ["name", "type", "model", "id", "pos", "waypoints"]
+
     def __init__(self, name="Pedestrian") -> None:
         self.name = name
 
@@ -63,18 +66,32 @@ class Pedestrian:
             return False
         if len(self.waypoints) != len(other.waypoints):
             return False
-        if not np.all(
-            [np.allclose(wpa, wpb) for wpa, wpb in zip(self.waypoints, other.waypoints)]
-        ):
-            return False
-            
-        custom_properties_fset = set(frozenset(d.items()) for d in self.custom_properties)
-        other_custom_properties_fset = set(frozenset(d.items()) for d in other.custom_properties)
-        if custom_properties_fset != other_custom_properties_fset:
+        if len(self.waypoints) > 0:
+            try:
+                # one comparison for all waypoints if they have the same dimensions
+                if not np.allclose(np.asarray(self.waypoints), np.asarray(other.waypoints)):
+                    return False
+            except ValueError:
+                if not all(
+                    np.allclose(wpa, wpb) for wpa, wpb in zip(self.waypoints, other.waypoints)
+                ):
+                    return False
+
+        if not Pedestrian.customPropertiesEqual(self.custom_properties, other.custom_properties):
             return False
 
         return True
 
+    @staticmethod
+    def customPropertiesEqual(a: Optional[list], b: Optional[list]) -> bool:
+        '''
+        Compares two lists of custom properties, ignoring their order.
+        None is treated as an empty list.
+        '''
+        if not a or not b:
+            return not a and not b
+        return set(frozenset(d.items()) for d in a) == set(frozenset(d.items()) for d in b)
+
     def toDict(self):
         d = {}
 
@@ -110,7 +127,7 @@ class Pedestrian:
         a.waypoints = [np.array(wp) for wp in d["waypoints"]]
 
         for property_name in list(d.keys()):
-            if property_name not in ["name", "type", "model", "id", "pos", "waypoints"]:
+            if property_name not in Pedestrian.FIELDS:
                 property_value = d.get(property_name)
                 a.addCustomProperty(property_name, property_value)
 
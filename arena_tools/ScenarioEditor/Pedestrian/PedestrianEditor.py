@@ -11,13 +11,13 @@ import arena_simulation_setup.entities.obstacles.dynamic
 class PedestrianAgentEditor(QtWidgets.QWidget):
     editorSaved = QtCore.pyqtSignal()
 
-    def __init__(self, pedestrianAgentWidget=None, **kwargs):
+    def __init__(self, pedestrianAgentRow=None, **kwargs):
         super().__init__(**kwargs)
-        self.pedestrianAgentWidget = pedestrianAgentWidget
-        if pedestrianAgentWidget is None:
+        self.pedestrianAgentRow = pedestrianAgentRow
+        if pedestrianAgentRow is None:
             self.pedestrianAgent: Pedestrian = Pedestrian('Pedestrian 1')
         else:
-            self.pedestrianAgent: Pedestrian = pedestrianAgentWidget.pedestrianAgent
+            self.pedestrianAgent: Pedestrian = pedestrianAgentRow.pedestrianAgent
         self.setup_ui()
         self.updateValuesFromPedestrianAgent()
 
@@ -56,7 +56,10 @@ class PedestrianAgentEditor(QtWidgets.QWidget):
         self.nameLabel.setTextFormat(QtCore.Qt.TextFormat.MarkdownText)
         self.scrollAreaFrame.layout().addWidget(self.nameLabel, self.vertical_idx, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
         # editbox
-        name = self.pedestrianAgentWidget.name_label.text() if self.pedestrianAgentWidget is not None else "global agent"
+        if self.pedestrianAgentRow is not None:
+            name = self.pedestrianAgentRow.pedestrianAgent.name
+        else:
+            name = "global agent"
         self.name_edit = QtWidgets.QLineEdit(name)
         self.name_edit.setFixedSize(200, 30)
         self.scrollAreaFrame.layout().addWidget(self.name_edit, self.vertical_idx, 1, QtCore.Qt.AlignmentFlag.AlignRight)
@@ -210,7 +213,7 @@ class PedestrianAgentEditor(QtWidgets.QWidget):
 class PedestrianAgentEditorGlobalConfig(PedestrianAgentEditor):
     """
     A Pedestrian Agent Editor excluding widgets that shouldn't be globally configured
-    and without a parent PedestrianAgentWidget.
+    and without a parent PedestrianAgentRow.
     """
 
     def __init__(self, **kwargs):
@@ -0,0 +1,415 @@
+import copy
+import numpy as np
+from typing import Dict, List, Optional
+from .Pedestrian import Pedestrian
+
+
+class PedestrianStore:
+    '''
+    Structure-of-arrays storage of pedestrian agents, for scenarios with many agents.
+    - positions: (N, 3) array, only the first position_sizes[i] values of row i are used
+    - waypoints: (M, 3) array of all waypoints, the waypoints of agent i are the rows
+      waypointOffsets[i]:waypointOffsets[i + 1]; waypointSizes works like position_sizes
+    - types and models are interned: type_codes and model_codes index into the lists
+      types and models
+    The agents are accessed as PedestrianView objects, which behave like Pedestrian
+    objects but read and write the arrays of the store. To change the number of
+    waypoints of an agent, assign a new sequence to its waypoints; it is merged into
+    the waypoint arrays on the next bulk access.
+    '''
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: List[int] = []
+        self.positions = np.zeros((0, 3))
+        self.position_sizes = np.zeros(0, dtype=np.int8)
+        self.type_codes = np.zeros(0, dtype=np.int32)
+        self.model_codes = np.zeros(0, dtype=np.int32)
+        self.types: List[str] = []
+        self.models: List[str] = []
+        # custom properties of each agent, None if it has none
+        self.custom_properties: List[Optional[List[dict]]] = []
+
+        self._waypoints = np.zeros((0, 3))
+        self._waypoint_sizes = np.zeros(0, dtype=np.int8)
+        self._waypoint_offsets = np.zeros(1, dtype=np.int64)
+        # waypoint lists assigned to single agents, they replace the agent's rows in
+        # the waypoint arrays until the next _syncWaypoints
+        self._assigned_waypoints: Dict[int, list] = {}
+
+        self._type_table: Dict[str, int] = {}
+        self._model_table: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def fromDicts(dicts: List[dict]) -> "PedestrianStore":
+        '''
+        Creates a store from agent dicts in the format of Pedestrian.toDict,
+        without creating Pedestrian objects.
+        '''
+        default = Pedestrian()
+        store = PedestrianStore()
+        store.names = [d.get("name") or default.name for d in dicts]
+        store.ids = [d.get("id") or default.id for d in dicts]
+        store.positions, store.position_sizes = _pack([d["pos"] for d in dicts])
+        store.type_codes = store._intern(
+            store.types, store._type_table, [d.get("type") or default.type for d in dicts])
+        store.model_codes = store._intern(
+            store.models, store._model_table, [d.get("model") or default.model for d in dicts])
+
+        waypoint_counts = [len(d["waypoints"]) for d in dicts]
+        store._waypoint_offsets = np.zeros(len(dicts) + 1, dtype=np.int64)
+        np.cumsum(waypoint_counts, out=store._waypoint_offsets[1:])
+        store._waypoints, store._waypoint_sizes = _pack(
+            [wp for d in dicts for wp in d["waypoints"]])
+
+        store.custom_properties = [
+            [{key: value} for key, value in d.items() if key not in Pedestrian.FIELDS] or None
+            for d in dicts
+        ]
+
+        return store
+
+    @staticmethod
+    def fromPedestrians(agents: List[Pedestrian]) -> "PedestrianStore":
+        '''
+        Creates a store with copies of the given agents.
+        '''
+        store = PedestrianStore()
+        store.names = [a.name for a in agents]
+        store.ids = [a.id for a in agents]
+        store.positions, store.position_sizes = _pack([a.pos for a in agents])
+        store.type_codes = store._intern(store.types, store._type_table, [a.type for a in agents])
+        store.model_codes = store._intern(
+            store.models, store._model_table, [a.model for a in agents]
+        )
+
+        waypoint_counts = [len(a.waypoints) for a in agents]
+        store._waypoint_offsets = np.zeros(len(agents) + 1, dtype=np.int64)
+        np.cumsum(waypoint_counts, out=store._waypoint_offsets[1:])
+        store._waypoints, store._waypoint_sizes = _pack(
+            [wp for a in agents for wp in a.waypoints])
+
+        store.custom_properties = [
+            copy.deepcopy(a.custom_properties) or None for a in agents
+        ]
+
+        return store
+
+    def views(self) -> List["PedestrianView"]:
+        return [PedestrianView(self, i) for i in range(len(self))]
+
+    def isStoreOf(self, agents: List[Pedestrian]) -> bool:
+        '''
+        Checks if 'agents' are exactly the views of this store, in order.
+        '''
+        return len(agents) == len(self) and all(
+            isinstance(a, PedestrianView) and a._store is self and a._index == i
+            for i, a in enumerate(agents)
+        )
+
+    def toDicts(self) -> List[dict]:
+        '''
+        Returns the agent dicts in the format of Pedestrian.toDict.
+        '''
+        self._syncWaypoints()
+        positions = self.positions.tolist()
+        waypoints = self._waypoints.tolist()
+        waypoint_sizes = self._waypoint_sizes.tolist()
+        offsets = self._waypoint_offsets.tolist()
+        types = [self.types[code] for code in self.type_codes.tolist()]
+        models = [self.models[code] for code in self.model_codes.tolist()]
+
+        dicts = []
+        for i, position_size in enumerate(self.position_sizes.tolist()):
+            d = {}
+            d["name"] = self.names[i]
+            d["id"] = self.ids[i]
+            d["pos"] = positions[i][:position_size]
+            d["type"] = types[i]
+            d["model"] = models[i]
+            d["waypoints"] = [
+                waypoints[j][:waypoint_sizes[j]] for j in range(offsets[i], offsets[i + 1])
+            ]
+            for property in self.custom_properties[i] or []:
+                d.update(property)
+            dicts.append(d)
+
+        return dicts
+
+    @property
+    def waypoints(self) -> np.ndarray:
+        '''(M, 3) array of the waypoints of all agents.'''
+        self._syncWaypoints()
+        return self._waypoints
+
+    @property
+    def waypointSizes(self) -> np.ndarray:
+        self._syncWaypoints()
+        return self._waypoint_sizes
+
+    @property
+    def waypointOffsets(self) -> np.ndarray:
+        '''
+        (N + 1,) array, the waypoints of agent i are waypointOffsets[i]:waypointOffsets[i + 1].
+        '''
+        self._syncWaypoints()
+        return self._waypoint_offsets
+
+    def getTypes(self) -> List[str]:
+        return [self.types[code] for code in self.type_codes.tolist()]
+
+    def getModels(self) -> List[str]:
+        return [self.models[code] for code in self.model_codes.tolist()]
+
+    def translate(self, offset, indices=None):
+        '''
+        Moves agents and their waypoints by 'offset' ([x, y] or [x, y, z]).
+        - indices: agents to move, all agents if None
+        '''
+        offset = np.asarray(offset, dtype=float)
+        self._syncWaypoints()
+        if indices is None:
+            self.positions[:, :len(offset)] += offset
+            self._waypoints[:, :len(offset)] += offset
+            return
+
+        indices = np.asarray(indices)
+        self.positions[indices, :len(offset)] += offset
+        offsets = self._waypoint_offsets
+        counts = offsets[indices + 1] - offsets[indices]
+        shifts = offsets[indices] - np.cumsum(counts) + counts
+        rows = np.repeat(shifts, counts) + np.arange(counts.sum())
+        self._waypoints[rows, :len(offset)] += offset
+
+    def compare(self, other: "PedestrianStore", indices=None, other_indices=None) -> np.ndarray:
+        '''
+        Compares agents of this store with agents of 'other' like Pedestrian.__eq__,
+        with batched array operations.
+        - indices, other_indices: the agents to compare pairwise, all agents if None
+        Returns a boolean array, True where the agents are equal.
+        '''
+        a = np.arange(len(self)) if indices is None else np.asarray(indices, dtype=np.int64)
+        if other_indices is None:
+            b = np.arange(len(other))
+        else:
+            b = np.asarray(other_indices, dtype=np.int64)
+        if len(a) != len(b):
+            raise Exception("number of agents to compare does not match")
+        if len(a) == 0:
+            return np.ones(0, dtype=bool)
+
+        def column(values, table_indices):
+            return np.array(values, dtype=object)[table_indices]
+
+        equal = column(self.names, a) == column(other.names, b)
+        equal &= column(self.ids, a) == column(other.ids, b)
+        equal &= column(self.types, self.type_codes[a]) == column(other.types, other.type_codes[b])
+        equal &= (
+            column(self.models, self.model_codes[a]) == column(other.models, other.model_codes[b])
+        )
+        equal &= self.position_sizes[a] == other.position_sizes[b]
+        equal &= np.isclose(self.positions[a], other.positions[b]).all(axis=1)
+
+        # waypoints of agents with the same number of waypoints, as rows of the
+        # waypoint arrays
+        offsets, other_offsets = self.waypointOffsets, other.waypointOffsets
+        counts = offsets[a + 1] - offsets[a]
+        equal &= counts == other_offsets[b + 1] - other_offsets[b]
+        candidates = np.nonzero(equal & (counts > 0))[0]
+        if len(candidates) > 0:
+            counts = counts[candidates]
+            starts = np.cumsum(counts) - counts
+            steps = np.arange(counts.sum()) - np.repeat(starts, counts)
+            rows = np.repeat(offsets[a[candidates]], counts) + steps
+            other_rows = np.repeat(other_offsets[b[candidates]], counts) + steps
+            row_equal = (
+                (self._waypoint_sizes[rows] == other._waypoint_sizes[other_rows])
+                & np.isclose(self._waypoints[rows], other._waypoints[other_rows]).all(axis=1)
+            )
+            equal[candidates] = np.logical_and.reduceat(row_equal, starts)
+
+        for i in np.nonzero(equal)[0].tolist():
+            properties = self.custom_properties[a[i]]
+            other_properties = other.custom_properties[b[i]]
+            if (properties or other_properties) and not Pedestrian.customPropertiesEqual(
+                properties, other_properties
+            ):
+                equal[i] = False
+
+        return equal
+
+    def getAgentWaypoints(self, index: int) -> list:
+        if index in self._assigned_waypoints:
+            return self._assigned_waypoints[index]
+        first, last = self._waypoint_offsets[index], self._waypoint_offsets[index + 1]
+        sizes = self._waypoint_sizes[first:last].tolist()
+        return [self._waypoints[first + j, :size] for j, size in enumerate(sizes)]
+
+    def setAgentWaypoints(self, index: int, waypoints: list):
+        self._assigned_waypoints[index] = list(waypoints)
+
+    def setType(self, index: int, value: str):
+        self.type_codes[index] = self._intern(self.types, self._type_table, [value])[0]
+
+    def setModel(self, index: int, value: str):
+        self.model_codes[index] = self._intern(self.models, self._model_table, [value])[0]
+
+    def setPosition(self, index: int, value):
+        value = np.asarray(value, dtype=float)
+        self.positions[index, :len(value)] = value
+        self.position_sizes[index] = len(value)
+
+    def _syncWaypoints(self):
+        '''
+        Writes waypoint lists assigned to single agents into the waypoint arrays.
+        '''
+        if len(self._assigned_waypoints) == 0:
+            return
+
+        offsets = self._waypoint_offsets
+        counts = np.diff(offsets)
+        for index, waypoints in self._assigned_waypoints.items():
+            counts[index] = len(waypoints)
+        new_offsets = np.zeros_like(offsets)
+        np.cumsum(counts, out=new_offsets[1:])
+
+        waypoints = np.zeros((new_offsets[-1], 3))
+        sizes = np.zeros(new_offsets[-1], dtype=np.int8)
+        # copy the rows of unchanged agents in one go
+        unchanged = np.ones(len(self), dtype=bool)
+        unchanged[list(self._assigned_waypoints)] = False
+        old_rows = np.repeat(unchanged, np.diff(offsets))
+        new_rows = np.repeat(unchanged, counts)
+        waypoints[new_rows] = self._waypoints[old_rows]
+        sizes[new_rows] = self._waypoint_sizes[old_rows]
+        for index, assigned in self._assigned_waypoints.items():
+            if len(assigned) > 0:
+                packed, packed_sizes = _pack(assigned)
+                waypoints[new_offsets[index]:new_offsets[index + 1]] = packed
+                sizes[new_offsets[index]:new_offsets[index + 1]] = packed_sizes
+
+        self._waypoints, self._waypoint_sizes = waypoints, sizes
+        self._waypoint_offsets = new_offsets
+        self._assigned_waypoints = {}
+
+    @staticmethod
+    def _intern(table: List[str], index: Dict[str, int], values: List[str]) -> np.ndarray:
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(table)
+                table.append(value)
+            codes[i] = code
+        return codes
+
+
+class PedestrianView(Pedestrian):
+    '''
+    A pedestrian agent of a PedestrianStore. Positions and waypoints are returned as
+    views of the arrays of the store, so modifying them in place modifies the store.
+    The waypoints are a tuple, to add or remove waypoints assign a new sequence.
+    Copies are detached Pedestrian objects.
+    '''
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: PedestrianStore, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self._index]
+
+    @name.setter
+    def name(self, value: str):
+        self._store.names[self._index] = value
+
+    @property
+    def id(self):
+        return self._store.ids[self._index]
+
+    @id.setter
+    def id(self, value):
+        self._store.ids[self._index] = value
+
+    @property
+    def pos(self) -> np.ndarray:
+        return self._store.positions[self._index, :self._store.position_sizes[self._index]]
+
+    @pos.setter
+    def pos(self, value):
+        self._store.setPosition(self._index, value)
+
+    @property
+    def type(self) -> str:
+        return self._store.types[self._store.type_codes[self._index]]
+
+    @type.setter
+    def type(self, value: str):
+        self._store.setType(self._index, value)
+
+    @property
+    def model(self) -> str:
+        return self._store.models[self._store.model_codes[self._index]]
+
+    @model.setter
+    def model(self, value: str):
+        self._store.setModel(self._index, value)
+
+    @property
+    def waypoints(self) -> tuple:
+        return tuple(self._store.getAgentWaypoints(self._index))
+
+    @waypoints.setter
+    def waypoints(self, value: list):
+        self._store.setAgentWaypoints(self._index, value)
+
+    @property
+    def custom_properties(self) -> List[dict]:
+        properties = self._store.custom_properties[self._index]
+        if properties is None:
+            properties = self._store.custom_properties[self._index] = []
+        return properties
+
+    @custom_properties.setter
+    def custom_properties(self, value: List[dict]):
+        self._store.custom_properties[self._index] = value
+
+    def detach(self) -> Pedestrian:
+        '''Returns a Pedestrian object with a copy of the data of this agent.'''
+        a = Pedestrian(self.name)
+        a.id = self.id
+        a.pos = np.array(self.pos)
+        a.type = self.type
+        a.model = self.model
+        a.waypoints = [np.array(wp) for wp in self.waypoints]
+        a.custom_properties = copy.deepcopy(self.custom_properties)
+        return a
+
+    def __copy__(self) -> Pedestrian:
+        return self.detach()
+
+    def __deepcopy__(self, memo) -> Pedestrian:
+        return self.detach()
+
+    def __reduce__(self):
+        return (Pedestrian.fromDict, (self.toDict(),))
+
+
+def _pack(vectors: list):
+    '''
+    Packs vectors of up to 3 values into an (N, 3) array, returns the array and the
+    number of values of each vector.
+    '''
+    sizes = np.fromiter((len(v) for v in vectors), dtype=np.int8, count=len(vectors))
+    packed = np.zeros((len(vectors), 3))
+    if len(vectors) > 0 and np.all(sizes == sizes[0]):
+        packed[:, :sizes[0]] = np.asarray(vectors, dtype=float).reshape(len(vectors), sizes[0])
+    else:
+        for i, v in enumerate(vectors):
+            packed[i, :len(v)] = v
+    return packed, sizes
@@ -2,6 +2,7 @@ from PyQt5 import QtGui, QtCore, QtWidgets
 import os
 import copy
 from arena_tools.ScenarioEditor.ArenaScenario import *
+from arena_tools.ScenarioEditor.Pedestrian.Pedestrian import Pedestrian
 from arena_tools.utils.QtExtensions import *
 from arena_tools.utils.HelperFunctions import *
 import arena_robots.Robot
@@ -10,13 +11,13 @@ import arena_robots.Robot
 class RobotAgentEditor(QtWidgets.QWidget):
     editorSaved = QtCore.pyqtSignal()
 
-    def __init__(self, robotAgentWidget=None, **kwargs):
+    def __init__(self, robotAgentRow=None, **kwargs):
         super().__init__(**kwargs)
-        self.robotAgentWidget = robotAgentWidget
-        if robotAgentWidget is None:
+        self.robotAgentRow = robotAgentRow
+        if robotAgentRow is None:
             self.robotAgent = Pedestrian('Pedestrian 1')
         else:
-            self.robotAgent = robotAgentWidget.robotAgent
+            self.robotAgent = robotAgentRow.robotAgent
         self.setup_ui()
         self.updateValuesFromRobotAgent()
 
@@ -55,7 +56,10 @@ class RobotAgentEditor(QtWidgets.QWidget):
         self.nameLabel.setTextFormat(QtCore.Qt.TextFormat.MarkdownText)
         self.scrollAreaFrame.layout().addWidget(self.nameLabel, vertical_idx, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
         # editbox
-        name = self.robotAgentWidget.name_label.text() if self.robotAgentWidget is not None else "global agent"
+        if self.robotAgentRow is not None:
+            name = self.robotAgentRow.robotAgent.name
+        else:
+            name = "global agent"
         self.name_edit = QtWidgets.QLineEdit(name)
         self.name_edit.setFixedSize(200, 30)
         self.scrollAreaFrame.layout().addWidget(self.name_edit, vertical_idx, 1, QtCore.Qt.AlignmentFlag.AlignRight)
@@ -1,36 +1,256 @@
 import shapely
-import yaml
 import os
-from typing import List, Set, Dict
+import json
+import hashlib
+import numpy as np
+from typing import List, Set, Dict, Tuple
+from arena_tools.utils.Serialization import write_atomic, yaml_load, yaml_safe_dump
+from arena_tools.utils.MapImage import read_image_shape
+
+
+def toCoordinates(points) -> np.ndarray:
+    '''
+    Converts points to an (N, 2) array of x and y. The z coordinate of (N, 3) points
+    is dropped. A single point can be given as [x, y] or [x, y, z].
+    '''
+    coordinates = np.asarray(points, dtype=float)
+    if coordinates.size == 0:
+        return coordinates.reshape(0, 2)
+    if coordinates.ndim == 1 and len(coordinates) in [2, 3]:
+        coordinates = coordinates[np.newaxis, :]
+    if coordinates.ndim != 2 or coordinates.shape[1] not in [2, 3]:
+        raise Exception(
+            f"coordinates need to have the shape (N, 2) or (N, 3), got {coordinates.shape}"
+        )
+    return coordinates[:, :2]
+
+
+def polygonsToLists(multiPolygons: List[shapely.MultiPolygon]) -> List[List[List[List[float]]]]:
+    '''
+    Converts the exteriors of the polygons of many MultiPolygons to the lists of the zones file,
+    oriented counterclockwise and without the closing coordinate. All polygons are oriented and
+    their coordinates read with one array operation each.
+    '''
+    polygons, multiPolygonIndices = shapely.get_parts(multiPolygons, return_index=True)
+    if hasattr(shapely, "orient_polygons"):
+        polygons = shapely.orient_polygons(polygons, exterior_cw=False)
+    else:
+        # shapely < 2.1
+        clockwise = ~shapely.is_ccw(shapely.get_exterior_ring(polygons))
+        polygons = np.where(clockwise, shapely.reverse(polygons), polygons)
+    rings = shapely.get_exterior_ring(polygons)
+    coordinates = shapely.get_coordinates(rings).tolist()
+    ends = np.cumsum(shapely.get_num_coordinates(rings)).tolist()
+
+    result = [[] for _ in range(len(multiPolygons))]
+    start = 0
+    for multiPolygonIndex, end in zip(multiPolygonIndices.tolist(), ends):
+        result[multiPolygonIndex].append(coordinates[start:max(end - 1, start)])
+        start = end
+    return result
+
+
+def buildMultiPolygons(coordinateLists: List[List[np.ndarray]]) -> List[shapely.MultiPolygon]:
+    '''
+    Builds one MultiPolygon from each list of (N, 2) exterior coordinate arrays.
+    The rings, polygons and MultiPolygons of all lists are each created with one shapely call.
+    '''
+    multiPolygons = np.empty(len(coordinateLists), dtype=object)
+    multiPolygons[:] = [shapely.MultiPolygon() for _ in coordinateLists]
+    coordinateArrays = [
+        coordinates for coordinateList in coordinateLists for coordinates in coordinateList
+    ]
+    if len(coordinateArrays) == 0:
+        return multiPolygons.tolist()
+
+    counts = np.array([len(coordinates) for coordinates in coordinateArrays])
+    polygons = np.empty(len(coordinateArrays), dtype=object)
+    polygons[:] = [shapely.Polygon() for _ in coordinateArrays]
+    nonEmpty = counts > 0
+    if nonEmpty.any():
+        ringIndices = np.repeat(np.arange(np.count_nonzero(nonEmpty)), counts[nonEmpty])
+        rings = shapely.linearrings(np.concatenate(coordinateArrays), indices=ringIndices)
+        polygons[nonEmpty] = shapely.polygons(rings)
+
+    polygonCounts = [len(coordinateList) for coordinateList in coordinateLists]
+    polygonIndices = np.repeat(np.arange(len(coordinateLists)), polygonCounts)
+    shapely.multipolygons(polygons, indices=polygonIndices, out=multiPolygons)
+    return multiPolygons.tolist()
 
 
 class Zone():
+    '''
+    A zone of a map. The polygon is only built from the coordinates when it is first used,
+    ZonesData.buildPolygons builds the polygons of many zones at once.
+    '''
 
     def __init__(self, label: str, category: List[str] = [], polygon: List[List[List[float]]] = [], properties: Dict = dict()):
         self.label = label
         self.category = category
-        self.polygon  = shapely.MultiPolygon([shapely.Polygon(poly) for poly in polygon])
+        # exterior coordinates of the polygons until the MultiPolygon is built
+        self._coordinates = [toCoordinates(poly) for poly in polygon]
+        self._polygon: shapely.MultiPolygon = None
         self.properties = properties
+
+    @property
+    def polygon(self) -> shapely.MultiPolygon:
+        if self._polygon is None:
+            self.polygon = buildMultiPolygons([self._coordinates])[0]
+        return self._polygon
+
+    @polygon.setter
+    def polygon(self, polygon: shapely.MultiPolygon):
+        self._polygon = polygon
+        self._coordinates = None
+
+    def isPolygonBuilt(self) -> bool:
+        return self._polygon is not None
+
+    def exteriorCoordinates(self) -> List[np.ndarray]:
+        '''
+        Returns the (N, 2) exterior coordinates of each polygon without the closing coordinate.
+        The polygon is not built if it has not been used yet.
+        '''
+        if self._polygon is None:
+            return [
+                coordinates[:-1]
+                if len(coordinates) > 1 and np.array_equal(coordinates[0], coordinates[-1])
+                else coordinates
+                for coordinates in self._coordinates
+            ]
+        rings = shapely.get_exterior_ring(shapely.get_parts(self._polygon))
+        return [shapely.get_coordinates(ring)[:-1] for ring in rings]
     
-    def toDict(self):
+    def toDict(self, polygonLists: List[List[List[float]]] = None):
+        '''
+        args:
+            - polygonLists: the polygons as returned by polygonsToLists, computed if not given
+        '''
         d = dict()
         d["label"] = self.label
         d["category"] = self.category
-        d["polygon"] = [[list(coord) for coord in (polygon.exterior.coords[:-1] if shapely.is_ccw(polygon.exterior) else polygon.reverse().exterior.coords[:-1])] for polygon in self.polygon.geoms]
+        if polygonLists is None:
+            polygonLists = polygonsToLists([self.polygon])[0]
+        d["polygon"] = polygonLists
         for key in self.properties:
             d[key] = self.properties[key]
         return d
 
+
+class ZoneGrid():
+    '''
+    The zones rasterized onto the cells of a map. Each cell holds a bitmask of the categories
+    of the zones containing the center of the cell, bit i standing for categories[i].
+    Cells are aligned like the map in the editors: cell (row, column) covers the square at
+    origin + (column, row) * resolution with the side length 'resolution'.
+    '''
+    # change when the rasterization changes for the same zones
+    VERSION = 1
+
+    def __init__(
+        self, labels: np.ndarray, categories: List[str], resolution: float, origin: List[float],
+        digest: str = ""
+    ):
+        self.labels = labels
+        self.categories = list(categories)
+        self.resolution = float(resolution)
+        self.origin = [float(value) for value in origin]
+        self.digest = digest  # ZonesData.gridDigest of the zones and map the grid was made from
+
+    @staticmethod
+    def labelType(numCategories: int) -> np.dtype:
+        for dtype in [np.uint8, np.uint16, np.uint32, np.uint64]:
+            if numCategories <= np.iinfo(dtype).bits:
+                return np.dtype(dtype)
+        raise Exception(f"the zone grid supports up to 64 categories, got {numCategories}")
+
+    @staticmethod
+    def pathFor(zonesPath: str) -> str:
+        '''
+        Returns the path of the grid file stored next to a zones file.
+        '''
+        return os.path.splitext(zonesPath)[0] + ".grid.npz"
+
+    def bit(self, category: str) -> int:
+        return 1 << self.categories.index(category)
+
+    def cellsAt(self, points) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Returns the rows and columns of the cells at the points
+        and a mask of the points inside the grid.
+        '''
+        coordinates = toCoordinates(points)
+        columns = np.floor((coordinates[:, 0] - self.origin[0]) / self.resolution).astype(np.int64)
+        rows = np.floor((coordinates[:, 1] - self.origin[1]) / self.resolution).astype(np.int64)
+        height, width = self.labels.shape
+        inside = (columns >= 0) & (columns < width) & (rows >= 0) & (rows < height)
+        return rows, columns, inside
+
+    def labelsAt(self, points) -> np.ndarray:
+        '''
+        Returns the category bitmasks at the points, 0 outside of the grid.
+        args:
+            - points: array like of world coordinates of shape (N, 2)
+        '''
+        rows, columns, inside = self.cellsAt(points)
+        labels = np.zeros(len(rows), dtype=self.labels.dtype)
+        labels[inside] = self.labels[rows[inside], columns[inside]]
+        return labels
+
+    def categoryMask(self, points) -> np.ndarray:
+        '''
+        Returns a boolean array of shape (N, len(self.categories))
+        telling which categories the points are in.
+        '''
+        labels = self.labelsAt(points)
+        bits = np.arange(len(self.categories), dtype=self.labels.dtype)
+        return ((labels[:, np.newaxis] >> bits) & 1).astype(bool)
+
+    def save(self, path: str):
+        def write(file):
+            np.savez_compressed(
+                file,
+                labels=self.labels,
+                categories=np.array(self.categories, dtype=str),
+                resolution=self.resolution,
+                origin=np.array(self.origin),
+                digest=self.digest
+            )
+        write_atomic(path, write, binary=True)
+
+    @staticmethod
+    def load(path: str) -> "ZoneGrid":
+        with np.load(path, allow_pickle=False) as data:
+            return ZoneGrid(
+                data["labels"], data["categories"].tolist(), data["resolution"],
+                data["origin"].tolist(), str(data["digest"])
+            )
+
+
 class ZonesData():
+    '''
+    The zones of a map. Spatial queries use an STRtree over the polygons of all zones,
+    which is built on the first query and rebuilt when a zone or its polygon was replaced.
+    Call invalidate after changing a polygon in place.
+    '''
 
     def __init__(self, path: str = ""):
         self.path = path
         self.zones : List[Zone] = []
+        # cached STRtree and the zones and polygons it was built from
+        self._tree = None
+        self._treeZones: List[Zone] = []
+        self._treePolygons: List[shapely.MultiPolygon] = []
+        self._polygonZoneIndices = np.zeros(0, dtype=np.int64)
+        self._grid: ZoneGrid = None
         if path != "":
             self.load(path)
     
     def toList(self) -> List[Dict]:
-        return [zone.toDict() for zone in self.zones]
+        # convert the polygons of all zones at once
+        self.buildPolygons()
+        polygonLists = polygonsToLists([zone.polygon for zone in self.zones])
+        return [zone.toDict(polygons) for zone, polygons in zip(self.zones, polygonLists)]
     
     def getCategories(self) -> Set[str]:
         categories = set()
@@ -38,27 +258,220 @@ class ZonesData():
             categories.update(zone.category)
         return categories
 
+    def invalidate(self):
+        self._tree = None
+
+    def buildPolygons(self):
+        '''
+        Builds the polygons of all zones that have not been used yet at once.
+        '''
+        zones = [zone for zone in self.zones if not zone.isPolygonBuilt()]
+        if len(zones) == 0:
+            return
+        for zone, polygon in zip(zones, buildMultiPolygons([zone._coordinates for zone in zones])):
+            zone.polygon = polygon
+
+    def _isTreeValid(self) -> bool:
+        if self._tree is None or len(self._treeZones) != len(self.zones):
+            return False
+        # shapely geometries are immutable, a changed polygon is a new object
+        return all(
+            zone is treeZone and zone.polygon is treePolygon
+            for zone, treeZone, treePolygon in zip(self.zones, self._treeZones, self._treePolygons)
+        )
+
+    def getTree(self) -> Tuple[shapely.STRtree, np.ndarray]:
+        '''
+        Returns the STRtree over the polygons of all zones and for each polygon in the tree
+        the index of its zone in self.zones.
+        '''
+        self.buildPolygons()
+        if not self._isTreeValid():
+            self._treeZones = list(self.zones)
+            self._treePolygons = [zone.polygon for zone in self._treeZones]
+            polygons, indices = shapely.get_parts(self._treePolygons, return_index=True)
+            valid = ~shapely.is_empty(polygons)
+            self._tree = shapely.STRtree(polygons[valid])
+            self._polygonZoneIndices = indices[valid]
+        return self._tree, self._polygonZoneIndices
+
+    def _zoneIndicesAt(self, coordinates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Returns the unique pairs of point index and zone index of the zones containing the points.
+        '''
+        tree, polygonZoneIndices = self.getTree()
+        points = shapely.points(coordinates)
+        pointIndices, polygonIndices = tree.query(points, predicate="intersects")
+        # a point can be inside several polygons of the same zone
+        pairs = np.stack([pointIndices, polygonZoneIndices[polygonIndices]], axis=1)
+        pairs = np.unique(pairs, axis=0)
+        return pairs[:, 0], pairs[:, 1]
+
+    def zonesAt(self, points) -> List[List[Zone]]:
+        '''
+        Returns for each point the zones containing it (points on the border are included).
+        args:
+            - points: array like of coordinates of shape (N, 2)
+        '''
+        coordinates = toCoordinates(points)
+        pointIndices, zoneIndices = self._zoneIndicesAt(coordinates)
+        result = [[] for _ in range(len(coordinates))]
+        for pointIndex, zoneIndex in zip(pointIndices.tolist(), zoneIndices.tolist()):
+            result[pointIndex].append(self._treeZones[zoneIndex])
+        return result
+
+    def zonesIntersecting(self, geom: shapely.Geometry) -> List[Zone]:
+        '''
+        Returns the zones intersecting the given geometry, in the order of self.zones.
+        '''
+        tree, polygonZoneIndices = self.getTree()
+        polygonIndices = tree.query(geom, predicate="intersects")
+        return [self._treeZones[i] for i in np.unique(polygonZoneIndices[polygonIndices]).tolist()]
+
+    def categoryMask(self, points, categories: List[str] = None) -> np.ndarray:
+        '''
+        Returns a boolean array of shape (N, len(categories)) telling for each point
+        whether it is inside a zone of each category.
+        args:
+            - points: array like of coordinates of shape (N, 2)
+            - categories: the categories of the columns, all categories in sorted order by default
+        '''
+        if categories is None:
+            categories = sorted(self.getCategories())
+        coordinates = toCoordinates(points)
+        pointIndices, zoneIndices = self._zoneIndicesAt(coordinates)
+
+        # which categories each zone belongs to
+        columns = {category: i for i, category in enumerate(categories)}
+        zoneCategories = np.zeros((len(self._treeZones), len(categories)), dtype=bool)
+        for i, zone in enumerate(self._treeZones):
+            for category in zone.category:
+                if category in columns:
+                    zoneCategories[i, columns[category]] = True
+
+        mask = np.zeros((len(coordinates), len(categories)), dtype=bool)
+        np.logical_or.at(mask, pointIndices, zoneCategories[zoneIndices])
+        return mask
+
+    def gridDigest(self, resolution: float, origin: List[float], shape: Tuple[int, int]) -> str:
+        '''
+        Returns a hash of everything a ZoneGrid of the zones depends on.
+        The coordinates are hashed as they are, the polygons of the zones are not built.
+        '''
+        zoneCoordinates = [zone.exteriorCoordinates() for zone in self.zones]
+        parameters = {
+            "zones": [
+                [zone.label, zone.category, [len(c) for c in coordinates]]
+                for zone, coordinates in zip(self.zones, zoneCoordinates)
+            ],
+            "resolution": float(resolution),
+            "origin": [float(value) for value in origin[:2]],
+            "shape": [int(size) for size in shape],
+            "version": ZoneGrid.VERSION
+        }
+        digest = hashlib.sha256(json.dumps(parameters, sort_keys=True).encode())
+        for coordinates in zoneCoordinates:
+            for c in coordinates:
+                digest.update(np.ascontiguousarray(c, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def rasterize(
+        self, resolution: float, origin: List[float], shape: Tuple[int, int]
+    ) -> ZoneGrid:
+        '''
+        Renders the zones into a ZoneGrid of the given shape (rows, columns).
+        Only the cells within the bounds of each polygon are tested.
+        '''
+        self.buildPolygons()
+        categories = sorted(self.getCategories())
+        dtype = ZoneGrid.labelType(len(categories))
+        labels = np.zeros(shape, dtype=dtype)
+        zoneBits = [
+            sum(1 << categories.index(category) for category in set(zone.category))
+            for zone in self.zones
+        ]
+
+        polygons, zoneIndices = shapely.get_parts(
+            [zone.polygon for zone in self.zones], return_index=True
+        )
+        height, width = shape
+        for polygon, zoneIndex in zip(polygons, zoneIndices.tolist()):
+            if zoneBits[zoneIndex] == 0 or polygon.is_empty:
+                continue
+            # cells whose center lies within the bounds of the polygon
+            minX, minY, maxX, maxY = polygon.bounds
+            column0 = max(int(np.ceil((minX - origin[0]) / resolution - 0.5)), 0)
+            column1 = min(int(np.floor((maxX - origin[0]) / resolution - 0.5)), width - 1)
+            row0 = max(int(np.ceil((minY - origin[1]) / resolution - 0.5)), 0)
+            row1 = min(int(np.floor((maxY - origin[1]) / resolution - 0.5)), height - 1)
+            if column0 > column1 or row0 > row1:
+                continue
+
+            xs = origin[0] + (np.arange(column0, column1 + 1) + 0.5) * resolution
+            ys = origin[1] + (np.arange(row0, row1 + 1) + 0.5) * resolution
+            shapely.prepare(polygon)
+            inside = shapely.intersects_xy(polygon, xs[np.newaxis, :], ys[:, np.newaxis])
+            labels[row0:row1 + 1, column0:column1 + 1][inside] |= dtype.type(zoneBits[zoneIndex])
+
+        digest = self.gridDigest(resolution, origin, shape)
+        return ZoneGrid(labels, categories, resolution, origin[:2], digest)
+
+    def getGrid(self, mapData, shape: Tuple[int, int] = None) -> ZoneGrid:
+        '''
+        Returns the ZoneGrid of the zones on the map of a RosMapData.
+        The grid is stored next to the zones file and only rasterized again
+        when the zones or the map changed.
+        args:
+            - shape: the (rows, columns) of the map image, read from the image file if not given
+        '''
+        if shape is None:
+            shape = read_image_shape(mapData.image_path)
+        digest = self.gridDigest(mapData.resolution, mapData.origin, shape)
+        if self._grid is not None and self._grid.digest == digest:
+            return self._grid
+
+        gridPath = ZoneGrid.pathFor(self.path) if self.path != "" else ""
+        if gridPath != "" and os.path.exists(gridPath):
+            grid = ZoneGrid.load(gridPath)
+            if grid.digest == digest:
+                self._grid = grid
+                return grid
+
+        self._grid = self.rasterize(mapData.resolution, mapData.origin, shape)
+        if gridPath != "":
+            self._grid.save(gridPath)
+        return self._grid
+
     def load(self, path: str):
         if os.path.exists(path):
             self.path = path
             with open(path, "r") as file:
-                data = yaml.safe_load(file)
+                data = yaml_load(file)
 
             for zone in data:
                 z = Zone(zone["label"], zone["category"], zone["polygon"], {k:v for k,v in zone.items() if k not in ["label", "category", "polygon"]})
                 self.zones.append(z)
+            self.invalidate()
 
     def saveToFile(self, path:str) -> bool:
         self.path = path
 
         if self.path == "":
             return False
-        _, file_extension = os.path.splitext(self.path)
-        with open(self.path, "w") as file:
-            data = self.toList()
-            if file_extension == ".yaml":
-                yaml.safe_dump(data, file, default_flow_style=False, sort_keys= False)
-            else:
-                raise Exception("wrong format. file needs to have 'yaml' file ending.")
-
-        return True
\ No newline at end of file
+        ZonesData.writeFile(self.toList(), self.path)
+
+        return True
+
+    @staticmethod
+    def writeFile(data: List[Dict], path: str):
+        '''
+        Writes zones in the format of ZonesData.toList to 'path'. The file is replaced
+        atomically, so this can run in a background thread on a snapshot of the zones.
+        '''
+        _, file_extension = os.path.splitext(path)
+        if file_extension != ".yaml":
+            raise Exception("wrong format. file needs to have 'yaml' file ending.")
+
+        def write(file):
+            yaml_safe_dump(data, file, default_flow_style=False, sort_keys=False)
+        write_atomic(path, write)
@@ -1,6 +1,7 @@
 import pathlib
 from PyQt5 import QtGui, QtCore, QtWidgets
 import os
+import copy
 import time
 import yaml
 from typing import Tuple, List, Set
@@ -11,95 +12,75 @@ from arena_tools.ScenarioEditor.ArenaScenarioEditor import RosMapData
 import arena_simulation_setup
 
 
-class PointWidget(QtWidgets.QWidget):
-    def __init__(self, polygonWidget, graphicsScene: QtWidgets.QGraphicsScene, posIn: QtCore.QPointF = None, **kwargs):
-        super().__init__(**kwargs)
-        self.id = 0
-        self.polygonWidget = polygonWidget  # needed so the ellipse item can trigger a polygon redraw
+class PointRow(ArenaTreeRow):
+    '''
+    A point of a polygon, shown as a child row of its PolygonRow.
+    The coordinates are held by the ellipse item in the scene.
+    '''
+
+    def __init__(
+        self, polygonRow, graphicsScene: QtWidgets.QGraphicsScene, posIn: QtCore.QPointF = None
+    ):
+        self.polygonRow = polygonRow  # needed so the ellipse item can trigger a polygon redraw
 
         # create circle and add to scene
         self.ellipseItem = PointGraphicsEllipseItem(self, None, None, -0.25, -0.25, 0.5, 0.5)
         self.graphicsScene = graphicsScene
         graphicsScene.addItem(self.ellipseItem)
 
-        # setup widgets
-        self.setupUI()
-        self.setId(self.id)
-
-        # set initial position
+        # set initial position, the polygon is drawn once all points have been added
         if posIn is not None:
-            self.setPos(posIn)
-
-    def setupUI(self):
-        self.setLayout(QtWidgets.QHBoxLayout())
-        self.setSizePolicy(QtWidgets.QSizePolicy.Policy.Maximum, QtWidgets.QSizePolicy.Policy.Maximum)
-
-        # x value
-        # label
-        label = QtWidgets.QLabel("x")
-        self.layout().addWidget(label)
-        # spinbox
-        self.posXSpinBox = ArenaQDoubleSpinBox()
-        self.posXSpinBox.valueChanged.connect(self.updateEllipseItemFromSpinBoxes)
-        self.layout().addWidget(self.posXSpinBox)
-
-        # y value
-        # label
-        label = QtWidgets.QLabel("y")
-        self.layout().addWidget(label)
-        # spinbox
-        self.posYSpinBox = ArenaQDoubleSpinBox()
-        self.posYSpinBox.valueChanged.connect(self.updateEllipseItemFromSpinBoxes)
-        self.layout().addWidget(self.posYSpinBox)
-
-        # delete button
-        deleteButton = QtWidgets.QPushButton("X")
-        deleteButton.setFixedWidth(30)
-        deleteButton.setStyleSheet("background-color: red")
-        deleteButton.clicked.connect(self.remove)
-        self.layout().addWidget(deleteButton)
-
-    def setId(self, id: int):
-        self.id = id
+            ArenaGraphicsEllipseItem.setPosNoEvent(self.ellipseItem, posIn.x(), posIn.y())
+
+    def rowValues(self) -> list:
+        x, y = self.getPos()
+        return [f"Point {self.row}", x, y]
+
+    def setRowData(self, column: int, value) -> bool:
+        x, y = self.getPos()
+        if column == 1:
+            self.setPos(QtCore.QPointF(value, y))
+        elif column == 2:
+            self.setPos(QtCore.QPointF(x, value))
+        else:
+            return False
+        return True
 
     def setPos(self, posIn: QtCore.QPointF):
-        # set values of spin boxes (and ellipse item)
-        # since spin boxes are connected to the ellipse item, the change will be propagated
-        self.posXSpinBox.setValue(posIn.x())
-        self.posYSpinBox.setValue(posIn.y())
+        # set without event to prevent recursion between the row and the graphics item
+        self.ellipseItem.setPosNoEvent(posIn.x(), posIn.y())
 
     def getPos(self) -> Tuple[float, float]:
-        return self.posXSpinBox.value(), self.posYSpinBox.value()
+        pos = self.ellipseItem.pos()
+        return pos.x(), pos.y()
 
-    def updateEllipseItemFromSpinBoxes(self):
-        if not self.ellipseItem.isDragged:  # do this to prevent recursion between spin boxes and graphics item
-            x = self.posXSpinBox.value()
-            y = self.posYSpinBox.value()
-            self.ellipseItem.setPosNoEvent(x, y)  # set without event to prevent recursion between spin boxes and graphics item
+    def handleItemChange(self):
+        # function will be called by the graphics item
+        self.rowChanged()
+        self.polygonRow.drawPolygon()
 
-    def updateSpinBoxesFromGraphicsItem(self):
-        new_pos = self.ellipseItem.mapToScene(self.ellipseItem.transformOriginPoint())
-        self.posXSpinBox.setValue(new_pos.x())
-        self.posYSpinBox.setValue(new_pos.y())
+    def removeItems(self):
+        self.graphicsScene.removeItem(self.ellipseItem)
 
     def remove(self):
-        self.ellipseItem.scene().removeItem(self.ellipseItem)
-        del self.ellipseItem.keyPressEater  # delete to remove event filter
-        self.parent().layout().removeWidget(self)
-        self.polygonWidget.update()
-        self.deleteLater()
+        self.polygonRow.removePoint(self)
 
 
-class PolygonWidget(QtWidgets.QFrame):
-    def __init__(self, graphicsScene: QtWidgets.QGraphicsScene, graphicsView: ArenaQGraphicsView, label: str, polygon: shapely.Polygon = None, color: QtGui.QColor = QtGui.QColor(0, 0, 0), **kwargs):
-        super().__init__(**kwargs)
+class PolygonRow(ArenaTreeRow):
+    '''
+    A polygon of a zone, shown as a child row of its ZoneRow with the points as child rows.
+    '''
+
+    def __init__(
+        self, zoneRow, graphicsScene: QtWidgets.QGraphicsScene, graphicsView: ArenaQGraphicsView,
+        label: str, polygon: shapely.Polygon = None, color: QtGui.QColor = QtGui.QColor(0, 0, 0)
+    ):
+        self.zoneRow = zoneRow
         self.graphicsScene = graphicsScene
         self.graphicsView = graphicsView
         self.addWaypointModeActive = False
-
-        self.setupUI()
-
-        graphicsView.clickedPos.connect(self.handleGraphicsViewClick)
+        self.activeModeWindow = None
+        self.rowChildren = []  # PointRows
 
         # Label
         self.textItem = QtWidgets.QGraphicsTextItem(label)
@@ -137,25 +118,22 @@ class PolygonWidget(QtWidgets.QFrame):
         graphicsScene.addItem(self.textRectItem)
 
         if polygon is not None:
-            for x, y in polygon.exterior.coords[:-1]:
-                self.addPointWidget(QtCore.QPointF(x, y))
+            self.addPoints([QtCore.QPointF(x, y) for x, y in polygon.exterior.coords[:-1]])
         else:
             # setup waypoints
-            self.activeModeWindow = ActiveModePointWindow(self)
             self.setAddPointMode(True)
 
-    def setupUI(self):
-
-        self.setLayout(QtWidgets.QVBoxLayout())
-        self.layout().setSpacing(0)
-        self.layout().setContentsMargins(0, 0, 0, 0)
-        self.setFrameStyle(QtWidgets.QFrame.Shape.Box | QtWidgets.QFrame.Shadow.Raised)
+    def rowValues(self) -> list:
+        return [f"Polygon {self.row}", None, None]
 
     def getPolygon(self) -> shapely.Polygon:
         return shapely.Polygon(self.getPoints())
 
     def getQPoints(self) -> List[QtCore.QPointF]:
-        return [widget.ellipseItem.mapToScene(widget.ellipseItem.transformOriginPoint()) for widget in self.getPointWidgets()]
+        return [
+            row.ellipseItem.mapToScene(row.ellipseItem.transformOriginPoint())
+            for row in self.getPointRows()
+        ]
 
     def getPoints(self) -> List[Tuple[float, float]]:
         return [(qpoint.x(), qpoint.y()) for qpoint in self.getQPoints()]
@@ -188,176 +166,186 @@ class PolygonWidget(QtWidgets.QFrame):
 
     def handleGraphicsViewClick(self, pos: QtCore.QPointF):
         if self.addWaypointModeActive:
-            self.addPointWidget(pos)
+            self.addPoint(self.snapToVertex(pos))
+
+    def snapToVertex(self, pos: QtCore.QPointF) -> QtCore.QPointF:
+        '''
+        Returns the position of the closest point of another polygon near 'pos', so that
+        adjacent zones can share their vertices. Returns 'pos' if there is none.
+        '''
+        item = self.graphicsScene.pointItemAt(
+            pos,
+            self.graphicsView.pickDistance(),
+            accept=lambda item: (
+                isinstance(item, PointGraphicsEllipseItem) and item.pointRow.polygonRow is not self
+            )
+        )
+        if item is None:
+            return pos
+        return item.scenePos()
+
+    def addPoint(self, pos: QtCore.QPointF = None):
+        self.addPoints([pos])
 
-    def addPointWidget(self, pos: QtCore.QPointF = None):
-        w = PointWidget(self, self.graphicsScene, pos, parent=self)
-        self.layout().addWidget(w)
-        self.update()
+    def addPoints(self, positions: List[QtCore.QPointF]):
+        self.appendChildRows([PointRow(self, self.graphicsScene, pos) for pos in positions])
+        self.updatePolygon()
 
-    def removePoint(self, pointWidget: PointWidget):
-        self.layout().removeWidget(pointWidget)
-        self.update()
+    def removePoint(self, pointRow: PointRow):
+        pointRow.removeItems()
+        self.removeChildRow(pointRow)
+        self.updatePolygon()
 
     def setAddPointMode(self, enable: bool):
+        # only polygons in add point mode receive the clicks on the graphics view
+        if enable and not self.addWaypointModeActive:
+            self.graphicsView.clickedPos.connect(self.handleGraphicsViewClick)
+        elif not enable and self.addWaypointModeActive:
+            self.graphicsView.clickedPos.disconnect(self.handleGraphicsViewClick)
         self.addWaypointModeActive = enable
         if enable:
+            if self.activeModeWindow is None:
+                self.activeModeWindow = ActiveModePointWindow(self)
             self.activeModeWindow.show()
         else:
-            self.activeModeWindow.hide()
-            self.update()
-
-    def getPointWidgets(self) -> List[PointWidget]:
-        widgets = []
-        for i in range(self.layout().count()):
-            w = self.layout().itemAt(i).widget()
-            if w is not None:
-                widgets.append(w)
-        return widgets
-
-    def handleItemChange(self):
-        # function will be called by the graphics item
-        self.update()
-
-    def update(self):
-        widgets = self.getPointWidgets()
-        if len(widgets) == 0:
-            self.remove()
+            if self.activeModeWindow is not None:
+                self.activeModeWindow.hide()
+            self.updatePolygon()
+
+    def getPointRows(self) -> List[PointRow]:
+        return list(self.rowChildren)
+
+    def updatePolygon(self):
+        if len(self.rowChildren) == 0:
+            if not self.addWaypointModeActive:
+                self.remove()
+            return
         self.textItem.setVisible(True)
-        for i, w in enumerate(widgets):
-            w.setId(i)
         self.drawPolygon()
 
-    def remove(self):
-        # remove waypoints
-        for w in self.getPointWidgets():
-            w.remove()
-
-        # remove items from scene
+    def removeItems(self):
+        '''
+        Removes the graphics items and windows of this row from the scene,
+        but not the row from the model.
+        '''
+        if self.addWaypointModeActive:
+            self.graphicsView.clickedPos.disconnect(self.handleGraphicsViewClick)
+            self.addWaypointModeActive = False
+        for w in self.getPointRows():
+            w.removeItems()
         self.graphicsScene.removeItem(self.polygonDrawItem)
         self.graphicsScene.removeItem(self.textItem)
         self.graphicsScene.removeItem(self.textRectItem)
-        # remove widget
-        self.parent().layout().removeWidget(self)
+        if self.activeModeWindow is not None:
+            self.activeModeWindow.deleteLater()
 
-        self.deleteLater()
+    def remove(self):
+        self.zoneRow.removePolygon(self)
 
 
-class ZoneWidget(QtWidgets.QFrame):
+class ZoneRow(ArenaTreeRow):
     '''
-    This is a row in the obstacles frame.
+    A row in the zones side bar, with the polygons as child rows.
+    The zone editor is only created when it is first shown.
     '''
 
-    def __init__(self, zone: Zone, graphicsScene: QtWidgets.QGraphicsScene, graphicsView: ArenaQGraphicsView, catEditor: CategoriesEditor, **kwargs):
-        super().__init__(**kwargs)
+    def __init__(
+        self, zone: Zone, graphicsScene: QtWidgets.QGraphicsScene,
+        graphicsView: ArenaQGraphicsView, catEditor: CategoriesEditor, window: QtWidgets.QWidget
+    ):
         self.zone = zone
 
         self.graphicsScene = graphicsScene
         self.graphicsView = graphicsView
+        self.window = window  # parent of the zone editor
 
         self.catEditor = catEditor
-        self.catEditor.editorSaved.connect(self.handleEditorSaved)
-
-        self.zoneEditor = ZonePropertyEditor(zone, parent=self.parent(), flags=QtCore.Qt.WindowType.Window)
-        self.zoneEditor.editorSaved.connect(self.handleEditorSaved)
+        self.zoneEditor = None
 
         self.color = None
-
-        # setup widgets
-        self.setupUI()
+        self.rowChildren = []  # PolygonRows
 
         for polygon in zone.polygon.geoms:
-            self.addPolygonWidget(polygon)
+            self.addPolygon(polygon)
 
-    def setupUI(self):
-        self.setLayout(QtWidgets.QGridLayout())
-        self.setMinimumWidth(275)
-        self.setFrameStyle(QtWidgets.QFrame.Shape.Box | QtWidgets.QFrame.Shadow.Raised)
-
-        # name label
-        self.nameLabel = QtWidgets.QLabel(self.zone.label)
-        self.layout().addWidget(self.nameLabel, 0, 0)
-
-        # edit button
-        self.editButton = QtWidgets.QPushButton("Edit")
-        self.editButton.clicked.connect(self.onEditClicked)
-        self.layout().addWidget(self.editButton, 0, 1)
-
-        # delete button
-        self.deleteButton = QtWidgets.QPushButton("Delete")
-        self.deleteButton.clicked.connect(self.onDeleteClicked)
-        self.layout().addWidget(self.deleteButton, 0, 2)
-
-        # waypoints
-        label = QtWidgets.QLabel("Polygons:")
-        self.layout().addWidget(label, 2, 0, QtCore.Qt.AlignmentFlag.AlignLeft)
-        button = QtWidgets.QPushButton("Add Polygons...")
-        button.clicked.connect(self.onAddPolygonClicked)
-        self.layout().addWidget(button, 2, 1, 1, 2)
-        self.polygonListWidget = QtWidgets.QWidget()
-        self.polygonListWidget.setLayout(QtWidgets.QVBoxLayout())
-        self.polygonListWidget.layout().setContentsMargins(0, 0, 0, 0)
-        self.layout().addWidget(self.polygonListWidget, 3, 0, -1, 3)
-
-    def getPolygonWidgets(self) -> List[PolygonWidget]:
-        widgets = []
-        for i in range(self.polygonListWidget.layout().count()):
-            w = self.polygonListWidget.layout().itemAt(i).widget()
-            if w is not None:
-                widgets.append(w)
-        return widgets
+    def rowValues(self) -> list:
+        return [self.zone.label, None, None]
+
+    def getPolygonRows(self) -> List[PolygonRow]:
+        return list(self.rowChildren)
 
     def handleEditorSaved(self):
         # editor was saved, update possibly changed values
-        self.update()
+        self.updateZone()
 
     def handleMouseDoubleClick(self):
-        # function will be called by the graphics item
         self.onEditClicked()
 
-    def update(self):
-        self.nameLabel.setText(self.zone.label)
+    def updateZone(self):
+        self.rowChanged()
 
         catColor = self.catEditor.getCategories()
         if self.zone.category != []:
             self.color = catColor[self.zone.category[0]]
 
-        for w in self.getPolygonWidgets():
+        for w in self.getPolygonRows():
             if self.zone.category != []:
                 w.setBrush(self.color)
             w.setLabel(self.zone.label)
 
-        self.zone.polygon = shapely.MultiPolygon([w.getPolygon() for w in self.getPolygonWidgets()])
+        self.zone.polygon = shapely.MultiPolygon([w.getPolygon() for w in self.getPolygonRows()])
 
-    def addPolygonWidget(self, polygon: shapely.Polygon = None):
+    def addPolygon(self, polygon: shapely.Polygon = None):
         if self.color:
-            w = PolygonWidget(self.graphicsScene, self.graphicsView, self.zone.label, polygon, self.color, parent=self)
+            w = PolygonRow(
+                self, self.graphicsScene, self.graphicsView, self.zone.label, polygon, self.color
+            )
         else:
-            w = PolygonWidget(self.graphicsScene, self.graphicsView, self.zone.label, polygon, parent=self)
-        self.polygonListWidget.layout().addWidget(w)
+            w = PolygonRow(self, self.graphicsScene, self.graphicsView, self.zone.label, polygon)
+        self.appendChildRows([w])
+
+    def removePolygon(self, polygonRow: PolygonRow):
+        polygonRow.removeItems()
+        self.removeChildRow(polygonRow)
+
+    def removeItems(self):
+        '''
+        Removes the graphics items and windows of this row from the scene,
+        but not the row from the model.
+        '''
+        for w in self.getPolygonRows():
+            w.removeItems()
+        if self.zoneEditor is not None:
+            self.zoneEditor.deleteLater()
 
     def remove(self):
-        # remove polygons
-        for w in self.getPolygonWidgets():
-            w.remove()
-        self.parent().layout().removeWidget(self)
-        self.deleteLater()
+        self.removeItems()
+        if self.model is not None:
+            self.model.removeRowObject(self)
 
     def onDeleteClicked(self):
         self.remove()
 
     def onAddPolygonClicked(self):
-        self.addPolygonWidget()
+        self.addPolygon()
 
     def onEditClicked(self):
+        if self.zoneEditor is None:
+            self.zoneEditor = ZonePropertyEditor(
+                self.zone, parent=self.window, flags=QtCore.Qt.WindowType.Window
+            )
+            self.zoneEditor.editorSaved.connect(self.handleEditorSaved)
+        self.zoneEditor.category = list(self.catEditor.getCategories().keys())
         self.zoneEditor.show()
 
     def disableWaypointMode(self):
-        for w in self.getPolygonWidgets():
+        for w in self.getPolygonRows():
             w.setAddPointMode(False)
 
 
 class ZonesEditor(QtWidgets.QMainWindow):
+    AUTOSAVE_INTERVAL = 60 * 1000  # ms
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -367,6 +355,9 @@ class ZonesEditor(QtWidgets.QMainWindow):
         self.zoneData = ZonesData()
         self.currentDirectory = ""
         self.currentSaveFile = ""
+        self.lastSavedData = None  # snapshot of the zones that were saved last
+        self.lastSavedPath = ""
+        self.requestedSave = None  # (snapshot, path) of the last save passed to self.saver
 
         self.setupUI()
         QtCore.QTimer.singleShot(0, self.show_select_world_dialog)
@@ -414,6 +405,9 @@ class ZonesEditor(QtWidgets.QMainWindow):
         fileMenue.addAction("Load Zones", self.onLoadZonesClicked, "Ctrl+L")
         fileMenue.addAction("Save...", self.onSaveClicked, "Ctrl+S")
         fileMenue.addAction("Save As...", self.onSaveAsClicked, "Ctrl+Shift+S")
+        autosaveAction = fileMenue.addAction("Autosave")
+        autosaveAction.setCheckable(True)
+        autosaveAction.toggled.connect(self.setAutosave)
         fileMenue.addAction("Load Map...", self.onLoadMapClicked, "Ctrl+M")
         fileMenue.addAction("Export as PNG", self.onExportClicked, "Ctrl+E")
         fileMenue.addAction("Exit", self.close)
@@ -422,9 +416,24 @@ class ZonesEditor(QtWidgets.QMainWindow):
         elementMenue.addAction("Add new Zone", self.onAddZoneClicked, "Ctrl+T")
         elementMenue.addAction("Edit categories", self.onEditCategoriesClicked, "Ctrl+G")
 
+        viewMenue = menubar.addMenu("View")
+        frameTimeAction = viewMenue.addAction("Frame Time Overlay")
+        frameTimeAction.setCheckable(True)
+        frameTimeAction.toggled.connect(lambda enable: self.gview.setFrameTimeOverlay(enable))
+
         # status bar
         self.statusBar()  # create status bar
 
+        # saving in the background
+        self.saver = BackgroundSaver(self)
+        self.saver.saveFinished.connect(self.handleSaveFinished)
+        self.saver.saveFailed.connect(self.handleSaveFailed)
+        self.saveStatusLabel = SaveStatusLabel(self.saver)
+        self.statusBar().addPermanentWidget(self.saveStatusLabel)
+        self.autosaveTimer = QtCore.QTimer(self)
+        self.autosaveTimer.setInterval(self.AUTOSAVE_INTERVAL)
+        self.autosaveTimer.timeout.connect(self.onAutosave)
+
         # categories
         self.catEditor = CategoriesEditor(self.zoneData, parent=self, flags=QtCore.Qt.WindowType.Window)
         self.catEditor.editorSaved.connect(self.updateCategories)
@@ -443,48 +452,87 @@ class ZonesEditor(QtWidgets.QMainWindow):
         drawingFrame.layout().addWidget(self.gview)
 
         # zones
-        # scrollarea
-        self.scrollarea = QtWidgets.QScrollArea(self)
-        self.scrollarea.setWidgetResizable(True)
-        self.scrollarea.setMinimumWidth(310)
-        self.centralWidget().layout().addWidget(self.scrollarea, 0, 0, 1, 1)
-        # frame
-        self.widgetFrame = QtWidgets.QFrame()
-        self.widgetFrame.setLayout(QtWidgets.QVBoxLayout())
-        self.widgetFrame.setSizePolicy(QtWidgets.QSizePolicy.Policy.Maximum, QtWidgets.QSizePolicy.Policy.Maximum)
-        self.scrollarea.setWidget(self.widgetFrame)
+        # the zones are rows of a tree model, only the visible rows are drawn
+        self.zoneModel = ArenaTreeModel(["Name", "x", "y"], self)
+        self.zoneView = ArenaTreeView(self.zoneModel)
+        self.zoneView.setMinimumWidth(310)
+        self.zoneView.doubleClicked.connect(self.onZoneDoubleClicked)
+        self.centralWidget().layout().addWidget(self.zoneView, 0, 0, 1, 1)
+        # buttons acting on the selected rows
+        buttonFrame = QtWidgets.QFrame()
+        buttonFrame.setLayout(QtWidgets.QGridLayout())
+        buttonFrame.layout().setContentsMargins(0, 0, 0, 0)
+        editButton = QtWidgets.QPushButton("Edit...")
+        editButton.clicked.connect(self.onEditZoneClicked)
+        buttonFrame.layout().addWidget(editButton, 0, 0)
+        addPolygonButton = QtWidgets.QPushButton("Add Polygon...")
+        addPolygonButton.clicked.connect(self.onAddPolygonClicked)
+        buttonFrame.layout().addWidget(addPolygonButton, 0, 1)
+        deleteButton = QtWidgets.QPushButton("Delete")
+        deleteButton.clicked.connect(self.onDeleteRowsClicked)
+        buttonFrame.layout().addWidget(deleteButton, 0, 2)
+        self.centralWidget().layout().addWidget(buttonFrame, 1, 0, 1, 1)
         # button
         self.addZoneButton = QtWidgets.QPushButton("Add new Zone")
         self.addZoneButton.pressed.connect(self.onAddZoneClicked)
-        self.centralWidget().layout().addWidget(self.addZoneButton, 1, 0, -1, 1)
-
-        self.updateCategories()
+        self.centralWidget().layout().addWidget(self.addZoneButton, 2, 0, -1, 1)
 
     def onEditCategoriesClicked(self):
         self.catEditor.show()
 
     def onAddZoneClicked(self):
-        self.addZoneWidget()
+        self.addZoneRow()
+
+    def onZoneDoubleClicked(self, index: QtCore.QModelIndex):
+        # the name column opens the zone editor, the other columns are edited in place
+        row = self.zoneModel.rowFromIndex(index)
+        if index.column() == 0 and isinstance(row, ZoneRow):
+            row.onEditClicked()
+
+    def getCurrentZoneRow(self) -> ZoneRow:
+        row = self.zoneView.currentRowObject()
+        while row is not None and not isinstance(row, ZoneRow):
+            row = row.rowParent
+        return row
+
+    def onEditZoneClicked(self):
+        row = self.getCurrentZoneRow()
+        if row is not None:
+            row.onEditClicked()
+
+    def onAddPolygonClicked(self):
+        row = self.getCurrentZoneRow()
+        if row is not None:
+            row.onAddPolygonClicked()
+
+    def onDeleteRowsClicked(self):
+        for row in self.zoneView.selectedRowObjects():
+            # rows can already be removed together with their parent
+            if row.model is not None:
+                row.remove()
+
+    def createZoneRow(self, zone: Zone = None) -> ZoneRow:
+        if zone is None:
+            zone = Zone("Zone {0}".format(self.numZones))
+        w = ZoneRow(zone, self.gscene, self.gview, self.catEditor, self)
+        self.numZones += 1
+        return w
 
-    def addZoneWidget(self, zone: Zone = None):
+    def addZoneRow(self, zone: Zone = None) -> ZoneRow:
         '''
-        Adds a new ZoneWidget with the given Zone
+        Adds a new ZoneRow with the given Zone
         '''
-        w = ZoneWidget(zone if zone is not None else Zone("Zone {0}".format(self.numZones)), self.gscene, self.gview, self.catEditor, parent=self)
-        self.widgetFrame.layout().addWidget(w)
-        self.numZones += 1
-        self.updateCategories()
+        w = self.createZoneRow(zone)
+        self.zoneModel.appendRowObjects(None, [w])
+        return w
 
-    def getZoneWidgets(self) -> List[ZoneWidget]:
-        widgets = []
-        for i in range(self.widgetFrame.layout().count()):
-            w = self.widgetFrame.layout().itemAt(i).widget()
-            widgets.append(w)
-        return widgets
+    def getZoneRows(self) -> List[ZoneRow]:
+        return list(self.zoneModel.rows)
 
     def updateCategories(self):
-        for w in self.getZoneWidgets():
-            w.zoneEditor.category = list(self.catEditor.getCategories().keys())
+        # the colors of the categories may have changed
+        for w in self.getZoneRows():
+            w.updateZone()
 
     def keyPressEvent(self, event: QtGui.QKeyEvent):
         if event.key() == QtCore.Qt.Key.Key_Escape or event.key() == QtCore.Qt.Key.Key_Return:
@@ -493,8 +541,8 @@ class ZonesEditor(QtWidgets.QMainWindow):
         return super().keyPressEvent(event)
 
     def disableAddWaypointMode(self):
-        widgets = self.getZoneWidgets()
-        for w in widgets:
+        rows = self.getZoneRows()
+        for w in rows:
             w.disableWaypointMode()
 
     #####
@@ -561,48 +609,93 @@ class ZonesEditor(QtWidgets.QMainWindow):
 
     def setMap(self, path: str):
         self.mapData = RosMapData(path)
-        pixmap = QtGui.QPixmap(self.mapData.image_path)
-        transform = QtGui.QTransform.fromScale(1.0, -1.0)  # flip y axis
-        pixmap = pixmap.transformed(transform)
-        if self.pixmapItem is not None:
-            self.gscene.removeItem(self.pixmapItem)        # remove old map
-        self.pixmapItem = QtWidgets.QGraphicsPixmapItem(pixmap)
-        self.pixmapItem.setZValue(-1.0)  # make sure map is always in the background
-        self.pixmapItem.setScale(self.mapData.resolution)
-        self.pixmapItem.setOffset(self.mapData.origin[0] / self.mapData.resolution, self.mapData.origin[1] / self.mapData.resolution)
-        self.gscene.addItem(self.pixmapItem)
+        if self.pixmapItem is None:
+            self.pixmapItem = ArenaMapItem()
+            self.pixmapItem.loadFailed.connect(self.handleMapLoadFailed)
+        if self.pixmapItem.scene() is None:
+            # the map is removed from the scene for new scenarios
+            self.gscene.addItem(self.pixmapItem)
+        # the image is decoded in the background
+        self.pixmapItem.load(self.mapData.image_path, self.mapData.resolution, self.mapData.origin)
+
+    def handleMapLoadFailed(self, imagePath: str, error: str):
+        msg = f"[Could not load map image {imagePath}: {error}]"
+        self.statusBar().showMessage(msg, 10 * 1000)
 
     def loadZones(self, path: str):
         self.zoneData = ZonesData(path)
         if path != "":
             self.currentSaveFile = path.rsplit("/", 1)[1]
 
-        for widget in self.getZoneWidgets():
-            widget.remove()
-
-        for zone in self.zoneData.zones:
-            self.addZoneWidget(zone)
+        # replace all rows at once
+        self.zoneData.buildPolygons()
+        self.gscene.setItemIndexMethod(QtWidgets.QGraphicsScene.ItemIndexMethod.NoIndex)
+        for row in self.getZoneRows():
+            row.removeItems()
+        self.zoneModel.setRowObjects([self.createZoneRow(zone) for zone in self.zoneData.zones])
+        self.gscene.setItemIndexMethod(QtWidgets.QGraphicsScene.ItemIndexMethod.BspTreeIndex)
 
         self.catEditor.updateValuesFromZone(self.zoneData)
-        self.updateCategories()
+        # the loaded zones don't need to be saved again
+        self.lastSavedData = copy.deepcopy(self.zoneData.toList())
+        self.lastSavedPath = path
 
     def save(self, path: str = "") -> bool:
         self.updateZoneFromWidgets()
 
-        if self.zoneData.saveToFile(path):
-            msg = f"[Saved zones to {self.zoneData.path}]"
-            self.statusBar().showMessage(msg, 10 * 1000)
+        self.zoneData.path = path
+        if path == "":
+            return False
+
+        # write a snapshot of the zones in the background
+        data = copy.deepcopy(self.zoneData.toList())
+        # while saves are queued the file can still change, so only skip when idle
+        if (self.saver.isIdle()
+                and data == self.lastSavedData
+                and path == self.lastSavedPath
+                and os.path.exists(path)):
             return True
+        self.requestedSave = (data, path)
+        self.saver.save(path, lambda: ZonesData.writeFile(data, path))
+        return True
+
+    def handleSaveFinished(self, path: str):
+        # the file contains the last requested snapshot once no other save follows
+        if self.saver.isIdle():
+            self.lastSavedData, self.lastSavedPath = self.requestedSave
+        msg = f"[Saved zones to {path}]"
+        self.statusBar().showMessage(msg, 10 * 1000)
+
+    def handleSaveFailed(self, path: str, error: str):
+        self.lastSavedData = None
+        msg = f"[Could not save zones to {path}: {error}]"
+        self.statusBar().showMessage(msg, 10 * 1000)
+
+    def setAutosave(self, enable: bool):
+        if enable:
+            self.autosaveTimer.start()
+        else:
+            self.autosaveTimer.stop()
+        self.saveStatusLabel.setAutosave(enable)
 
-        return False
+    def onAutosave(self):
+        # only save zones that already have a file
+        if self.zoneData.path != "":
+            self.save(self.zoneData.path)
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        # finish saves that are still running
+        self.autosaveTimer.stop()
+        self.saver.shutdown()
+        return super().closeEvent(event)
 
     def updateZoneFromWidgets(self):
         '''
         Save data from widgets into self.zoneData
         '''
         self.zoneData.zones = []
-        for w in self.getZoneWidgets():
-            w.update()
+        for w in self.getZoneRows():
+            w.updateZone()
             self.zoneData.zones.append(w.zone)
 
     def updateWindowTitle(self):
@@ -0,0 +1,119 @@
+"""
+Loading of ROS map images into NumPy arrays without Qt.
+Binary PGM files (P5), the format written by map_server, are memory-mapped so that
+only the parts of a map that are actually accessed are read from disk.
+"""
+import os
+import struct
+import numpy as np
+from typing import Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_pgm_header(path: str):
+    """
+    Parses the header of a binary PGM (P5) file.
+        Parameters:
+            path (str): path to the image file
+        Returns:
+            header (tuple): (width, height, maxval, offset) with 'offset' being the
+                position of the first pixel byte in the file, or None if the file
+                is not a binary PGM
+    """
+    with open(path, "rb") as f:
+        if f.read(2) != b"P5":
+            return None
+
+        fields = []
+        offset = 2
+        while len(fields) < 3:
+            char = f.read(1)
+            offset += 1
+            if char == b"":
+                raise ValueError(f"'{path}' has an incomplete PGM header")
+            if char == b"#":
+                # comments run until the end of the line
+                comment = f.readline()
+                offset += len(comment)
+            elif char.isspace():
+                continue
+            else:
+                field = char
+                while True:
+                    char = f.read(1)
+                    offset += 1
+                    if not char.isdigit():
+                        break
+                    field += char
+                fields.append(int(field))
+                # the pixel data starts after a single whitespace character
+                # following maxval
+                if len(fields) < 3 and char == b"#":
+                    comment = f.readline()
+                    offset += len(comment)
+
+    width, height, maxval = fields
+    return width, height, maxval, offset
+
+
+def read_pgm(path: str, mmap: bool = True) -> np.ndarray:
+    """
+    Reads a binary PGM (P5) image.
+        Parameters:
+            path (str): path to the image file
+            mmap (bool): if True (default), the pixel data is memory-mapped read-only
+                instead of being read into memory
+        Returns:
+            image (array_like): (height, width) array of uint8, or of uint16 if the
+                maximum gray value is above 255
+    """
+    header = read_pgm_header(path)
+    if header is None:
+        raise ValueError(f"'{path}' is not a binary PGM (P5) file")
+    width, height, maxval, offset = header
+
+    # 16 bit PGMs are stored most significant byte first
+    dtype = np.dtype(np.uint8) if maxval < 256 else np.dtype(">u2")
+    if os.path.getsize(path) < offset + width * height * dtype.itemsize:
+        raise ValueError(f"'{path}' is truncated")
+
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(height, width))
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return np.fromfile(f, dtype=dtype, count=width * height).reshape(height, width)
+
+
+def read_image_shape(path: str) -> Tuple[int, int]:
+    """
+    Returns the (height, width) of a map image. The size of binary PGM and PNG files
+    is read from their header, other formats are decoded.
+    """
+    header = read_pgm_header(path)
+    if header is not None:
+        width, height, _, _ = header
+        return height, width
+
+    with open(path, "rb") as f:
+        data = f.read(24)
+    # the IHDR chunk with the size always comes first
+    if len(data) == 24 and data[:8] == PNG_SIGNATURE and data[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", data[16:24])
+        return height, width
+
+    return load_map_image(path).shape[:2]
+
+
+def load_map_image(path: str, mmap: bool = True) -> np.ndarray:
+    """
+    Loads a map image as a NumPy array. Binary PGM files are read with read_pgm,
+    all other formats are decoded with scikit-image.
+    """
+    if read_pgm_header(path) is not None:
+        return read_pgm(path, mmap)
+
+    import skimage.io as io
+
+    return io.imread(path)
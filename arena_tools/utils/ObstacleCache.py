@@ -0,0 +1,123 @@
+"""
+Cache of generated obstacle files, keyed on the content of the map.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+from arena_tools.utils.Serialization import write_atomic
+
+
+class ObstacleFileCache:
+    """
+    A directory of obstacle files named after the hash of everything that
+    determines their content: the bytes of the map image, the relevant fields of
+    the map yaml file and the conversion options. When the total size of the cache
+    exceeds 'max_size' bytes, the least recently used files are removed.
+    The cache is best-effort: errors reading or writing it (e.g. a read-only home
+    directory or a full disk) are printed and the obstacle file is used without it.
+    """
+
+    # change when the generated obstacle files change for the same input
+    VERSION = 1
+    # fields of the map yaml file the obstacles depend on
+    MAP_FIELDS = ["resolution", "negate", "free_thresh", "origin"]
+    DEFAULT_MAX_SIZE = 1024**3
+
+    def __init__(self, cache_dir: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir if cache_dir is not None else self.default_dir()
+        self.max_size = max_size
+
+    @staticmethod
+    def default_dir() -> str:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        return os.path.join(cache_home, "arena_tools", "obstacle_files")
+
+    def key(self, image_path: str, map_metadata: dict, **options) -> str:
+        """
+        Computes the cache key of an obstacle file.
+            Parameters:
+                image_path (str): path to the map image
+                map_metadata (dict): the content of the map yaml file
+                options: the conversion options, e.g. use_map_origin
+            Returns:
+                key (str): hex digest identifying the obstacle file
+        """
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+        parameters = {field: map_metadata.get(field) for field in self.MAP_FIELDS}
+        parameters.update(options)
+        parameters["version"] = self.VERSION
+        digest.update(json.dumps(parameters, sort_keys=True).encode())
+
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".xml")
+
+    def get(self, key: str, destination: str) -> bool:
+        """
+        Copies a cached obstacle file to 'destination'.
+        Returns False if there is no obstacle file for the key or it cannot be read.
+        """
+        try:
+            shutil.copyfile(self.path(key), destination)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Could not read cached obstacle file {self.path(key)}: {e}", file=sys.stderr)
+            return False
+        # the modification time marks the last use for the eviction
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def put(self, key: str, source: str) -> bool:
+        """
+        Adds a copy of the obstacle file 'source' to the cache.
+        Returns False if the cache cannot be written.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # copy to a temporary file first so that no other process ever reads a
+            # partially written obstacle file. Unlike tempfile.mkstemp, write_atomic
+            # creates the file with the permissions of the umask, so that users
+            # sharing the cache can read each other's entries
+            with open(source, "rb") as source_file:
+                write_atomic(
+                    self.path(key), lambda file: shutil.copyfileobj(source_file, file), binary=True
+                )
+            self.evict()
+        except OSError as e:
+            print(f"Could not write obstacle file cache {self.cache_dir}: {e}", file=sys.stderr)
+            return False
+        return True
+
+    def evict(self):
+        """Removes the least recently used obstacle files until the cache fits."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".xml"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
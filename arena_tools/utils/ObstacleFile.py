@@ -0,0 +1,884 @@
+"""
+Conversion of ROS occupancy maps into pedestrian scenarios whose obstacles
+separate the free space of the map from unknown and occupied space.
+"""
+import os
+import sys
+import numpy as np
+import xml.etree.ElementTree as xml
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.dom import minidom
+
+
+def add_waypoint(scenario, id, x, y, r):
+    """Adds to a scenario a waypoint named 'id' in (x, y) with radius 'r'"""
+    waypoint = xml.SubElement(scenario, "waypoint")
+    waypoint.set("id", str(id))
+    waypoint.set("x", str(x))
+    waypoint.set("y", str(y))
+    waypoint.set("r", str(r))
+
+
+def add_agent(scenario, x, y, waypoints, n=2, dx=0.5, dy=0.5, type=1):
+    """Adds to a scenario n agents going from (x, y) through the waypoints"""
+    agent = xml.SubElement(scenario, "agent")
+    agent.set("x", str(x))
+    agent.set("y", str(y))
+    agent.set("n", str(n))
+    agent.set("dx", str(dx))
+    agent.set("dy", str(dy))
+    agent.set("type", str(type))
+    for id in waypoints:
+        addwaypoint = xml.SubElement(agent, "addwaypoint")
+        addwaypoint.set("id", str(id))
+
+
+def add_waypoints_and_agent(scenario, agents_info):
+    """Adds to a scenario a set of waypoints and agents going through them"""
+    waypoints = agents_info["waypoints"]
+    for id in waypoints.keys():
+        w = waypoints[id]
+        add_waypoint(scenario, id, w[0], w[1], w[2])
+
+    agents_keys = [key for key in agents_info.keys() if key != "waypoints"]
+    for key in agents_keys:
+        agent = agents_info[key]
+        agent_dx = agent["dx"] if "dx" in agent else 0.5
+        agent_dy = agent["dy"] if "dy" in agent else 0.5
+        agent_type = agent["type"] if "type" in agent else 1
+        add_agent(
+            scenario,
+            agent["x"],
+            agent["y"],
+            agent["w"],
+            n=agent["n"],
+            dx=agent_dx,
+            dy=agent_dy,
+            type=agent_type,
+        )
+
+
+def add_obstacle(scenario, x1, y1, x2, y2):
+    """Adds to a scenario an obstacle going from (x1, y1) to (x2, y2)"""
+    obstacle = xml.SubElement(scenario, "obstacle")
+    obstacle.set("x1", str(x1))
+    obstacle.set("y1", str(y1))
+    obstacle.set("x2", str(x2))
+    obstacle.set("y2", str(y2))
+
+
+def add_pixel_obstacle(scenario, x, y, resolution):
+    """Adds to a scenario a 1x1 obstacle at location (x, y)"""
+    add_obstacle(
+        scenario,
+        x + resolution / 2,
+        y - resolution / 2,
+        x - resolution / 2,
+        y + resolution / 2,
+    )
+
+
+def free_space(map_image, map_metadata):
+    """
+    Returns a binary image that is True wherever the map is free space, i.e.
+    below 'free_thresh' (in the map metadata).
+    """
+    negate = map_metadata["negate"]
+    free_thresh = map_metadata["free_thresh"] * 255
+
+    # ROS maps have white (255) as free space for visualization, colors need to
+    # be inverted before comparing with thresholds (if negate == 0)
+    if ~negate:
+        return 255 - map_image < free_thresh
+    else:
+        return map_image < free_thresh
+
+
+def wall_mask(map_binary):
+    """
+    Returns a binary image marking every occupied or unknown pixel that has at
+    least one free pixel in its 8-neighbourhood.
+        Parameters:
+            map_binary (array_like): binary image, True where space is free
+        Returns:
+            map_walls (array_like): binary image of the same shape, True where an
+                obstacle has to be placed
+    """
+    rows, cols = map_binary.shape
+
+    # 3x3 binary dilation of the free space, built from the shifted neighbours of a
+    # zero-padded copy so that pixels on the image border only see their in-bounds
+    # neighbours
+    padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+    padded[1:-1, 1:-1] = map_binary
+    near_free = np.zeros((rows, cols), dtype=bool)
+    for dx in range(3):
+        for dy in range(3):
+            near_free |= padded[dx:dx + rows, dy:dy + cols]
+
+    return near_free & ~map_binary
+
+
+def wall_coordinates(map_walls, resolution, origin):
+    """
+    Converts the pixels of a wall mask into world coordinates.
+        Parameters:
+            map_walls (array_like): binary image of the wall pixels
+            resolution (float): map resolution in meters per pixel
+            origin (list): the origin [x, y, yaw] of the map
+        Returns:
+            world_x, world_y (array_like): world coordinates of the wall pixels, in
+                row-major pixel order
+    """
+    x, y = np.nonzero(map_walls)
+    return pixel_to_world(x, y, map_walls.shape[0], resolution, origin)
+
+
+def pixel_to_world(x, y, height, resolution, origin):
+    """
+    Converts (possibly fractional) pixel coordinates of a map with 'height' rows
+    into world coordinates.
+    """
+    # conversion between world coordinates and pixel coordinates
+    # (x and y coordinates are inverted, and y is also flipped)
+    world_x = origin[0] + y * resolution
+    world_y = origin[1] - (x - height) * resolution
+
+    return world_x, world_y
+
+
+def pixel_obstacles(map_walls, resolution, origin):
+    """
+    Returns one 1x1 obstacle per wall pixel as an (N, 4) array of x1, y1, x2, y2,
+    matching the obstacles placed by add_pixel_obstacle.
+    """
+    world_x, world_y = wall_coordinates(map_walls, resolution, origin)
+    return pixel_obstacles_at(world_x, world_y, resolution)
+
+
+def pixel_obstacles_at(world_x, world_y, resolution):
+    """Returns 1x1 obstacles centered at the given world coordinates."""
+    return np.stack(
+        [
+            world_x + resolution / 2,
+            world_y - resolution / 2,
+            world_x - resolution / 2,
+            world_y + resolution / 2,
+        ],
+        axis=1,
+    )
+
+
+def iter_pixel_obstacles(map_walls, resolution, origin, chunk_rows=256):
+    """
+    Yields the obstacles of pixel_obstacles in chunks of 'chunk_rows' image rows,
+    so that only the obstacles of one chunk are held in memory at a time.
+    """
+    height = map_walls.shape[0]
+    for first_row in range(0, height, chunk_rows):
+        x, y = np.nonzero(map_walls[first_row:first_row + chunk_rows])
+        world_x, world_y = pixel_to_world(x + first_row, y, height, resolution, origin)
+        yield pixel_obstacles_at(world_x, world_y, resolution)
+
+
+def wall_runs(map_walls):
+    """
+    Finds the maximal horizontal runs of consecutive wall pixels.
+        Parameters:
+            map_walls (array_like): binary image of the wall pixels
+        Returns:
+            rows, starts, ends (array_like): row, first and last column of every
+                run, in row-major order
+    """
+    padded = np.zeros((map_walls.shape[0], map_walls.shape[1] + 2), dtype=bool)
+    padded[:, 1:-1] = map_walls
+    starts = padded[:, 1:-1] & ~padded[:, :-2]
+    ends = padded[:, 1:-1] & ~padded[:, 2:]
+
+    # every run has exactly one start and one end, np.nonzero returns both in
+    # row-major order so they pair up
+    rows, start_cols = np.nonzero(starts)
+    _, end_cols = np.nonzero(ends)
+
+    return rows, start_cols, end_cols
+
+
+def trace_diagonal_chains(map_walls):
+    """
+    Links wall pixels that only touch each other diagonally into chains.
+    Chains are started from their end points (pixels with at most one diagonal
+    neighbour) first, so a simple staircase is returned as a single chain.
+        Parameters:
+            map_walls (array_like): binary image of the wall pixels
+        Returns:
+            chains (list): lists of (x, y) pixel coordinates
+    """
+    remaining = set(zip(*[axis.tolist() for axis in np.nonzero(map_walls)]))
+
+    def neighbours(pixel):
+        x, y = pixel
+        return [
+            n for n in ((x - 1, y - 1), (x - 1, y + 1), (x + 1, y - 1), (x + 1, y + 1))
+            if n in remaining
+        ]
+
+    starts = sorted(remaining, key=lambda pixel: (len(neighbours(pixel)) > 1, pixel))
+    chains = []
+    for start in starts:
+        if start not in remaining:
+            continue
+        remaining.remove(start)
+        chain = [start]
+        candidates = neighbours(start)
+        while len(candidates) > 0:
+            pixel = min(candidates)
+            remaining.remove(pixel)
+            chain.append(pixel)
+            candidates = neighbours(pixel)
+        chains.append(chain)
+
+    return chains
+
+
+def simplify_polyline(points, tolerance):
+    """
+    Simplifies a polyline with the Ramer-Douglas-Peucker algorithm.
+        Parameters:
+            points (array_like): (N, 2) array of vertices
+            tolerance (float): maximal distance of a removed vertex to the
+                simplified polyline
+        Returns:
+            points (array_like): the retained vertices, including both end points
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while len(stack) > 0:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        direction = points[last] - points[first]
+        offsets = points[first + 1:last] - points[first]
+        distances = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0])
+        distances /= np.linalg.norm(direction)
+        farthest = np.argmax(distances)
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return points[keep]
+
+
+def wall_segments(map_walls, resolution, origin, diagonal_tolerance=None):
+    """
+    Coalesces the wall pixels into line obstacles. Collinear wall pixels are merged
+    into maximal horizontal and vertical segments through the pixel centers, which
+    reach to the outer pixel edges so that the segments of a corner meet.
+        Parameters:
+            map_walls (array_like): binary image of the wall pixels
+            resolution (float): map resolution in meters per pixel
+            origin (list): the origin [x, y, yaw] of the map
+            diagonal_tolerance (float): if None (default), wall pixels that are
+                not part of a horizontal or vertical segment are kept as 1x1
+                obstacles. Otherwise these pixels are linked into diagonal chains
+                that are simplified so that no pixel center is further away than
+                the tolerance (in meters) from the resulting segments.
+        Returns:
+            obstacles (array_like): (N, 4) array of x1, y1, x2, y2
+    """
+    height = map_walls.shape[0]
+    segments = []
+
+    # horizontal segments, from runs of the image rows
+    rows, starts, ends = wall_runs(map_walls)
+    long_runs = ends > starts
+    rows, starts, ends = rows[long_runs], starts[long_runs], ends[long_runs]
+    x1, y1 = pixel_to_world(rows, starts - 0.5, height, resolution, origin)
+    x2, y2 = pixel_to_world(rows, ends + 0.5, height, resolution, origin)
+    segments.append(np.stack([x1, y1, x2, y2], axis=1))
+
+    # vertical segments, from runs of the image columns
+    cols, starts, ends = wall_runs(map_walls.T)
+    long_runs = ends > starts
+    cols, starts, ends = cols[long_runs], starts[long_runs], ends[long_runs]
+    x1, y1 = pixel_to_world(starts - 0.5, cols, height, resolution, origin)
+    x2, y2 = pixel_to_world(ends + 0.5, cols, height, resolution, origin)
+    segments.append(np.stack([x1, y1, x2, y2], axis=1))
+
+    # pixels without horizontal or vertical wall neighbours are covered by neither
+    padded = np.zeros((map_walls.shape[0] + 2, map_walls.shape[1] + 2), dtype=bool)
+    padded[1:-1, 1:-1] = map_walls
+    isolated = map_walls & ~(
+        padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
+    )
+
+    if diagonal_tolerance is None:
+        segments.append(pixel_obstacles(isolated, resolution, origin))
+        return np.concatenate(segments)
+
+    single_pixels = np.zeros(isolated.shape, dtype=bool)
+    for chain in trace_diagonal_chains(isolated):
+        if len(chain) == 1:
+            single_pixels[chain[0]] = True
+            continue
+        points = np.array(chain, dtype=float)
+        points = simplify_polyline(points, diagonal_tolerance / resolution)
+        # extend both ends by half a pixel diagonal to reach the pixel corners
+        points[0] -= (np.array(chain[1]) - chain[0]) / 2
+        points[-1] += (np.array(chain[-1]) - chain[-2]) / 2
+        x, y = pixel_to_world(points[:, 0], points[:, 1], height, resolution, origin)
+        segments.append(np.stack([x[:-1], y[:-1], x[1:], y[1:]], axis=1))
+    segments.append(pixel_obstacles(single_pixels, resolution, origin))
+
+    return np.concatenate(segments)
+
+
+def scenario_from_map(
+    map_image,
+    map_metadata,
+    use_map_origin=False,
+    merge_walls=False,
+    diagonal_tolerance=None,
+):
+    """
+    Builds a pedestrian scenario having obstacles to separate free space in the map
+    from unknown and occupied space. Everything below 'free_thresh' (in the map
+    metadata) is considered free space.
+        Parameters:
+            map_image (array_like): the map ternary image
+            map_metadata (dictionary): the metadata extracted from the map YAML
+                file
+            use_map_origin (bool): if True reads the map origin from
+                map_metadata, otherwise sets it to [0, 0, 0] (default).
+                Integration with pedestrian_ros works better in the latter case.
+            merge_walls (bool): if True coalesces the wall pixels into line
+                segments (see wall_segments), otherwise places one 1x1 obstacle
+                per wall pixel (default).
+            diagonal_tolerance (float): see wall_segments, only used if
+                merge_walls is True
+        Returns:
+            scenario (ElementTree): a pedestrian scenario as xml element tree
+            map_walls (array_like): a binary image showing the locations on the
+                map where obstacles have been placed
+    """
+    obstacles, map_walls = obstacles_from_map(
+        map_image, map_metadata, use_map_origin, merge_walls, diagonal_tolerance
+    )
+
+    scenario = xml.Element("scenario")
+    for chunk in obstacles:
+        for x1, y1, x2, y2 in chunk.tolist():
+            add_obstacle(scenario, x1, y1, x2, y2)
+
+    return scenario, map_walls
+
+
+def obstacles_from_map(
+    map_image,
+    map_metadata,
+    use_map_origin=False,
+    merge_walls=False,
+    diagonal_tolerance=None,
+):
+    """
+    Computes the obstacles of scenario_from_map without building an xml tree.
+        Parameters:
+            see scenario_from_map
+        Returns:
+            obstacles (iterable): (N, 4) arrays of x1, y1, x2, y2, generated lazily
+                in chunks
+            map_walls (array_like): a binary image showing the locations on the
+                map where obstacles have been placed
+    """
+    resolution = map_metadata["resolution"]
+    origin = map_metadata["origin"] if use_map_origin else [0.0, 0.0, 0.0]
+
+    map_walls = wall_mask(free_space(map_image, map_metadata))
+    if merge_walls:
+        obstacles = [wall_segments(map_walls, resolution, origin, diagonal_tolerance)]
+    else:
+        obstacles = iter_pixel_obstacles(map_walls, resolution, origin)
+
+    return obstacles, map_walls
+
+
+def write_xml(tree, file_path, indent="  "):
+    """Takes an xml tree and writes it to a file, indented"""
+    indented_xml = minidom.parseString(xml.tostring(tree)).toprettyxml(
+        indent=indent
+    )
+
+    with open(file_path, "w") as f:
+        f.write(indented_xml)
+
+
+def format_obstacles(obstacles, indent="  "):
+    """
+    Serializes obstacles into obstacle elements of a pedestrian scenario.
+        Parameters:
+            obstacles (array_like): (N, 4) array of x1, y1, x2, y2
+            indent (str): indentation of the obstacle elements, None writes them
+                without line breaks
+        Returns:
+            fragment (str): the obstacle elements
+    """
+    prefix = "" if indent is None else "\n" + indent
+    return "".join(
+        f'{prefix}<obstacle x1="{x1!r}" y1="{y1!r}" x2="{x2!r}" y2="{y2!r}"/>'
+        for x1, y1, x2, y2 in obstacles.tolist()
+    )
+
+
+def write_scenario(file_path, obstacles, indent="  "):
+    """
+    Writes a pedestrian scenario incrementally, one chunk of obstacles at a time,
+    so that memory usage does not depend on the number of obstacles.
+        Parameters:
+            file_path (str): path of the scenario file
+            obstacles (iterable): (N, 4) arrays of x1, y1, x2, y2
+            indent (str): indentation of the obstacle elements, None writes the
+                whole scenario on a single line
+    """
+    write_scenario_fragments(
+        file_path, (format_obstacles(chunk, indent) for chunk in obstacles), indent
+    )
+
+
+def write_scenario_fragments(file_path, fragments, indent="  "):
+    """
+    Writes a pedestrian scenario from already serialized obstacle elements (see
+    format_obstacles).
+    """
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n<scenario>")
+        for fragment in fragments:
+            f.write(fragment)
+        f.write("</scenario>" if indent is None else "\n</scenario>")
+
+
+def map_tiles(map_image, tile_rows):
+    """
+    Splits a map image into bands of 'tile_rows' rows, each with a halo of one
+    row above and below (where available) so that the wall pixels of a band can
+    be found without looking at the rest of the image.
+        Returns:
+            tiles (iterable): tuples (tile, first_row, rows), with 'tile' being the
+                band including its halo, 'first_row' the index of the first image
+                row of the band and 'rows' the number of rows of the band
+    """
+    height = map_image.shape[0]
+    for first_row in range(0, height, tile_rows):
+        rows = min(tile_rows, height - first_row)
+        halo_first = max(0, first_row - 1)
+        halo_last = min(height, first_row + rows + 1)
+        yield map_image[halo_first:halo_last], first_row, rows
+
+
+def convert_tile(
+    tile, first_row, rows, height, map_metadata, origin, indent, serialize=True
+):
+    """
+    Finds the wall pixels of one band of map_tiles and, if 'serialize' is True,
+    serializes their 1x1 obstacles.
+        Returns:
+            tile_walls (array_like): the wall pixels of the band, without halo
+            fragment (str): the obstacle elements of the band (see
+                format_obstacles), or None if 'serialize' is False
+    """
+    halo_above = 1 if first_row > 0 else 0
+    tile_walls = wall_mask(free_space(tile, map_metadata))
+    tile_walls = tile_walls[halo_above:halo_above + rows]
+
+    if not serialize:
+        return tile_walls, None
+
+    resolution = map_metadata["resolution"]
+    x, y = np.nonzero(tile_walls)
+    world_x, world_y = pixel_to_world(x + first_row, y, height, resolution, origin)
+    fragment = format_obstacles(pixel_obstacles_at(world_x, world_y, resolution), indent)
+
+    return tile_walls, fragment
+
+
+def tiled_scenario_fragments(
+    map_image,
+    map_metadata,
+    map_walls,
+    use_map_origin=False,
+    merge_walls=False,
+    diagonal_tolerance=None,
+    indent="  ",
+    workers=None,
+    tile_rows=None,
+):
+    """
+    Generates the serialized obstacles of scenario_from_map by processing bands
+    of the map image in parallel worker processes. The result is identical to the
+    single process conversion.
+    If merge_walls is False, the workers also serialize the obstacles of their band
+    and the fragments are yielded in image order. Otherwise, the workers only find
+    the wall pixels and the segments are computed on the complete wall mask.
+        Parameters:
+            map_image, map_metadata, use_map_origin, merge_walls,
+                diagonal_tolerance: see scenario_from_map
+            map_walls (array_like): binary image with the shape of map_image that
+                is filled with the wall pixels while the fragments are generated
+            indent (str): see format_obstacles
+            workers (int): number of worker processes, defaults to the number of
+                CPUs
+            tile_rows (int): number of image rows per band, defaults to a value
+                that gives every worker several bands
+        Returns:
+            fragments (iterable): serialized obstacle elements
+    """
+    workers = workers or os.cpu_count() or 1
+    height = map_image.shape[0]
+    resolution = map_metadata["resolution"]
+    origin = map_metadata["origin"] if use_map_origin else [0.0, 0.0, 0.0]
+    if tile_rows is None:
+        tile_rows = max(64, -(-height // (4 * workers)))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # only keep a few bands in flight, so that finished fragments do not pile
+        # up faster than they can be written
+        pending = deque()
+        for tile, first_row, rows in map_tiles(map_image, tile_rows):
+            future = executor.submit(
+                convert_tile,
+                tile,
+                first_row,
+                rows,
+                height,
+                map_metadata,
+                origin,
+                indent,
+                not merge_walls,
+            )
+            pending.append((future, first_row, rows))
+            if len(pending) >= 2 * workers:
+                yield from _collect_tile(pending.popleft(), map_walls)
+        while len(pending) > 0:
+            yield from _collect_tile(pending.popleft(), map_walls)
+
+    if merge_walls:
+        yield format_obstacles(
+            wall_segments(map_walls, resolution, origin, diagonal_tolerance), indent
+        )
+
+
+def _collect_tile(pending_tile, map_walls):
+    future, first_row, rows = pending_tile
+    tile_walls, fragment = future.result()
+    map_walls[first_row:first_row + rows] = tile_walls
+    if fragment is not None:
+        yield fragment
+
+
+def create_obstacle_file(
+    map_path: str,
+    map_name: str,
+    use_map_origin: bool,
+    scenario_path: str,
+    scenario_name: str,
+    merge_walls: bool = False,
+    diagonal_tolerance: float = None,
+    compact: bool = False,
+    workers: int = 1,
+    verbose: bool = True,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    cache_size: int = None,
+):
+    import yaml
+    import os.path
+    from arena_tools.utils.MapImage import load_map_image
+    from arena_tools.utils.ObstacleCache import ObstacleFileCache
+
+    with open(os.path.join(map_path, map_name)) as file:
+        map_metadata = yaml.safe_load(file)
+
+    image_path = os.path.join(map_path, map_metadata["image"])
+    scenario_file = os.path.join(scenario_path, scenario_name)
+
+    if use_cache:
+        cache = ObstacleFileCache(cache_dir, cache_size or ObstacleFileCache.DEFAULT_MAX_SIZE)
+        cache_key = cache.key(
+            image_path,
+            map_metadata,
+            use_map_origin=use_map_origin,
+            merge_walls=merge_walls,
+            diagonal_tolerance=diagonal_tolerance,
+            compact=compact,
+        )
+        if cache.get(cache_key, scenario_file):
+            if verbose:
+                print("Reused cached scene for " + os.path.join(map_path, map_name))
+            return
+
+    map_image = load_map_image(image_path)
+
+    if verbose:
+        print("Loaded map in " + os.path.join(map_path, map_name) + " with metadata:")
+        print(map_metadata)
+
+    indent = None if compact else "  "
+    if workers == 1:
+        obstacles, map_walls = obstacles_from_map(
+            map_image, map_metadata, use_map_origin, merge_walls, diagonal_tolerance
+        )
+        fragments = (format_obstacles(chunk, indent) for chunk in obstacles)
+    else:
+        map_walls = np.zeros(map_image.shape[:2], dtype=bool)
+        fragments = tiled_scenario_fragments(
+            map_image,
+            map_metadata,
+            map_walls,
+            use_map_origin,
+            merge_walls,
+            diagonal_tolerance,
+            indent,
+            workers,
+        )
+
+    if verbose:
+        print("Writing scene in " + scenario_file + "...")
+
+    write_scenario_fragments(scenario_file, fragments, indent)
+
+    if use_cache:
+        cache.put(cache_key, scenario_file)
+
+    # uncomment for a visualization of where the obstacles have been placed
+    # import skimage.io as io
+    # io.imsave(os.path.join(scenario_path, "walls.png"), map_walls * 255)
+
+    if verbose:
+        print("Done.")
+
+
+def find_maps(patterns, map_name="map.yaml"):
+    """
+    Collects map yaml files.
+        Parameters:
+            patterns (list): paths of map yaml files, directories that are
+                searched recursively for files called 'map_name', or glob
+                patterns (supporting '**')
+            map_name (str): file name of the map yaml files in directories
+        Returns:
+            maps (list): sorted absolute paths of the map yaml files
+    """
+    import glob
+    import os.path
+
+    maps = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "**", map_name), recursive=True)
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        maps.update(os.path.abspath(match) for match in matches if os.path.isfile(match))
+
+    return sorted(maps)
+
+
+def is_up_to_date(map_yaml: str, scenario: str) -> bool:
+    """Checks if a scenario file is newer than the map yaml file and its image."""
+    import yaml
+    import os.path
+
+    if not os.path.exists(scenario):
+        return False
+
+    with open(map_yaml) as file:
+        map_metadata = yaml.safe_load(file)
+    image = os.path.join(os.path.dirname(map_yaml), map_metadata["image"])
+
+    scenario_time = os.path.getmtime(scenario)
+    return scenario_time >= max(os.path.getmtime(map_yaml), os.path.getmtime(image))
+
+
+def convert_map(map_yaml: str, scenario: str, **kwargs) -> float:
+    """
+    Runs create_obstacle_file for a map yaml file without printing progress.
+        Parameters:
+            map_yaml (str): path to the map yaml file
+            scenario (str): path of the scenario file
+            kwargs: further arguments of create_obstacle_file
+        Returns:
+            duration (float): the conversion time in seconds
+    """
+    import os
+    import time
+
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(scenario), exist_ok=True)
+    create_obstacle_file(
+        os.path.dirname(map_yaml),
+        os.path.basename(map_yaml),
+        scenario_path=os.path.dirname(scenario),
+        scenario_name=os.path.basename(scenario),
+        verbose=False,
+        **kwargs,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    import argparse
+    import os.path
+
+    parser = argparse.ArgumentParser(
+        description="Create pedestrian scenarios with the walls of ROS maps."
+    )
+    parser.add_argument(
+        "maps",
+        nargs="+",
+        help="map yaml files, directories to search for them or glob patterns",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="obstacles.xml",
+        help="path of the scenario files, relative to the directory of each map "
+        "(default: obstacles.xml)",
+    )
+    parser.add_argument(
+        "--map-name",
+        default="map.yaml",
+        help="file name of the map yaml files in directories (default: map.yaml)",
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true", help="also convert up to date maps"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of maps converted in parallel, 0 uses all CPUs",
+    )
+    parser.add_argument(
+        "--use-map-origin", action="store_true", help="use the origin of the maps"
+    )
+    parser.add_argument(
+        "--merge-walls", action="store_true", help="merge wall pixels into segments"
+    )
+    parser.add_argument(
+        "--diagonal-tolerance",
+        type=float,
+        default=None,
+        help="also merge diagonal wall pixels, with this tolerance in meters",
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="write the scenarios without indentation"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes per map, 0 uses all CPUs",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="do not reuse cached scenarios"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="directory of the scenario cache (default: ~/.cache/arena_tools/obstacle_files)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="maximal size of the scenario cache in MiB (default: 1024)",
+    )
+    args = parser.parse_args()
+
+    maps = find_maps(args.maps, args.map_name)
+    if len(maps) == 0:
+        print("No maps found.")
+        return 1
+
+    jobs = []
+    for map_yaml in maps:
+        scenario = os.path.normpath(os.path.join(os.path.dirname(map_yaml), args.output))
+        try:
+            up_to_date = not args.force and is_up_to_date(map_yaml, scenario)
+        except (OSError, KeyError, TypeError):
+            # let the conversion report what is wrong with the map
+            up_to_date = False
+        if up_to_date:
+            print(f"{map_yaml}: up to date")
+        else:
+            jobs.append((map_yaml, scenario))
+
+    options = dict(
+        use_map_origin=args.use_map_origin,
+        merge_walls=args.merge_walls,
+        diagonal_tolerance=args.diagonal_tolerance,
+        compact=args.compact,
+        workers=args.workers or None,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size * 1024**2,
+    )
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs or None) as executor:
+        futures = [
+            executor.submit(convert_map, map_yaml, scenario, **options)
+            for map_yaml, scenario in jobs
+        ]
+        for (map_yaml, scenario), future in zip(jobs, futures):
+            try:
+                duration = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{map_yaml}: failed ({e})")
+            else:
+                print(f"{map_yaml}: wrote {scenario} in {duration:.2f} s")
+
+    print(f"{len(jobs) - failed} converted, {len(maps) - len(jobs)} up to date, {failed} failed")
+    return 1 if failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# Regarding the code in this file
+# BSD 3-Clause License
+
+# Copyright(c) 2020, Francesco Verdoja
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+# 1. Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#         SERVICES
+#         LOSS OF USE, DATA, OR PROFITS
+#         OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
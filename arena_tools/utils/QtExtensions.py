@@ -1,36 +1,67 @@
 from PyQt5 import QtGui, QtCore, QtWidgets
+import time
 import numpy as np
+import concurrent.futures
 from arena_tools.utils.HelperFunctions import *
-from typing import Optional
+from arena_tools.utils.MapImage import read_pgm, read_pgm_header
+from arena_tools.utils.SpatialIndex import SpatialHashGrid
+from typing import List, Optional
 
 
-class KeyPressEater(QtCore.QObject):
+def snapshot_drag_positions(pressedItem: QtWidgets.QGraphicsItem):
     '''
-    This class can be used to intercept all key presses happening in the application
-    and then choose to handle it or relay it to the application.
-    All Events will be passed to the given handleEventFunction.
-    It should return True if the event was handled otherwise False
+    Saves the positions of the items that are moved when 'pressedItem' is dragged:
+    the selected items and the pressed item itself (it may not be selected yet).
     '''
+    for item in pressedItem.scene().selectedItems() + [pressedItem]:
+        if hasattr(item, "oldItemPos"):
+            item.oldItemPos = item.scenePos()
+
+
+def update_spatial_index(item: QtWidgets.QGraphicsItem):
+    '''
+    Updates the position of 'item' in the point index of its ArenaQGraphicsScene.
+    '''
+    scene = item.scene()
+    if isinstance(scene, ArenaQGraphicsScene):
+        pos = item.scenePos()
+        scene.pointIndex.insert(item, pos.x(), pos.y())
 
-    def __init__(self, handleEventFunction, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        app = QtWidgets.QApplication.instance()  # get current application
-        app.installEventFilter(self)
-        self.handleEventFunction = handleEventFunction
+
+class SceneKeyDispatcher(QtCore.QObject):
+    '''
+    A single application wide event filter for a QGraphicsScene. Key events are passed
+    to the handleEvent method of the selected items of the scene, which should return
+    True if the event was handled. All other events are let through right away.
+    The filter is removed together with the scene.
+    '''
+
+    def __init__(self, scene: QtWidgets.QGraphicsScene):
+        super().__init__(scene)
+        self.scene = scene
+        QtWidgets.QApplication.instance().installEventFilter(self)
 
     def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
-        return self.handleEventFunction(event)
+        if event.type() not in [QtCore.QEvent.Type.KeyPress, QtCore.QEvent.Type.KeyRelease]:
+            return False
+
+        handled = False
+        for item in self.scene.selectedItems():
+            # items handling the event can remove themselves and others from the scene
+            if item.scene() is self.scene and hasattr(item, "handleEvent"):
+                handled = item.handleEvent(event) or handled
+        return handled
 
 
 class ArenaGraphicsPathItem(QtWidgets.QGraphicsPathItem):
     '''
-    A QGraphicsPathItem that is connected to a QGraphicsScene and two QDoubleSpinBoxes
-    that hold the position of this item.
+    A QGraphicsPathItem that belongs to a row of an editor side bar (e.g. a pedestrian agent),
+    which is notified when the item is moved.
     '''
 
-    def __init__(self, parentWidget, *args, **kwargs):
+    def __init__(self, parentRow, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.parentWidget = parentWidget
+        self.parentRow = parentRow
         self.setFlags(
             QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemIsSelectable |
             QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges
@@ -53,11 +84,11 @@ class ArenaGraphicsPathItem(QtWidgets.QGraphicsPathItem):
         self.textItem = QtWidgets.QGraphicsTextItem("")
         self.textItem.setZValue(5)  # place text item above everything else
         self.textItem.setScale(0.035)
-        parentWidget.graphicsScene.addItem(self.textItem)
+        parentRow.graphicsScene.addItem(self.textItem)
         self.updateTextItemPos()
 
-        # catch key presses for interacting with the item in the scene
-        self.keyPressEater = KeyPressEater(self.handleEvent)
+        # key presses are passed to handleEvent by the SceneKeyDispatcher of the scene
+        # while the item is selected
 
         self.oldItemPos = self.scenePos()
 
@@ -89,11 +120,13 @@ class ArenaGraphicsPathItem(QtWidgets.QGraphicsPathItem):
         self.setFlag(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, False)
         super().setPos(x, y)
         self.setFlag(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
+        update_spatial_index(self)
 
     def itemChange(self, change, value):
-        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionChange:
+        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
             self.updateTextItemPos()
-            self.parentWidget.handleItemChange()
+            update_spatial_index(self)
+            self.parentRow.handleItemChange()
 
         return super().itemChange(change, value)
 
@@ -104,10 +137,7 @@ class ArenaGraphicsPathItem(QtWidgets.QGraphicsPathItem):
 
         self.oldMousePos = mouse_event.scenePos()
         self.oldItemPos = self.scenePos()
-        # save positions for all items in scene
-        for item in self.scene().items():
-            if hasattr(item, "oldItemPos"):
-                item.oldItemPos = item.scenePos()
+        snapshot_drag_positions(self)
         self.oldItemRotation = self.rotation()
         modifier = QtWidgets.QApplication.keyboardModifiers()
         if modifier == QtCore.Qt.KeyboardModifier.ControlModifier:
@@ -139,7 +169,7 @@ class ArenaGraphicsPathItem(QtWidgets.QGraphicsPathItem):
         return super().mouseReleaseEvent(mouse_event)
 
     def mouseDoubleClickEvent(self, mouse_event):
-        self.parentWidget.handleMouseDoubleClick()
+        self.parentRow.handleMouseDoubleClick()
 
     def handleEvent(self, event):
         # delete item when selected and DELETE key pressed
@@ -152,7 +182,7 @@ class ArenaGraphicsPathItem(QtWidgets.QGraphicsPathItem):
         return False
 
     def remove(self):
-        self.parentWidget.remove()
+        self.parentRow.remove()
 
 
 class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
@@ -161,13 +191,18 @@ class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
     that hold the position of this item.
     '''
 
-    def __init__(self, xSpinBox: QtWidgets.QDoubleSpinBox = None, ySpinBox: QtWidgets.QDoubleSpinBox = None, *args, handlePositionChangeMethod=None, **kwargs):
+    def __init__(
+        self, xSpinBox: QtWidgets.QDoubleSpinBox = None, ySpinBox: QtWidgets.QDoubleSpinBox = None,
+        *args, handlePositionChangeMethod=None, handlePositionChangedMethod=None, **kwargs
+    ):
         """
         args:
             - xSpinBox: a spin box for the X-coordinate that shall be connected to this item
             - ySpinBox: a spin box for the Y-coordinate that shall be connected to this item
             - handlePositionChangeMethod: A method of the parent widget that should be called when this items position changes.
                 It should take a QPointF as argument.
+            - handlePositionChangedMethod: Like handlePositionChangeMethod, but called with the
+                new position after the item has been moved.
         """
         super().__init__(*args, **kwargs)
         self.setFlags(
@@ -196,6 +231,10 @@ class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
         self.ySpinBox = ySpinBox
 
         self.handlePositionChangeMethod = handlePositionChangeMethod
+        self.handlePositionChangedMethod = handlePositionChangedMethod
+
+        # ArenaArrowItems starting or ending at this item
+        self.arrows = []
 
         self.oldItemPos = self.scenePos()
         self.ctrlPressed = False
@@ -218,6 +257,7 @@ class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
         super().setPos(x, y)
         self.updateTextItemPos()
         self.setFlag(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
+        update_spatial_index(self)
 
     def itemChange(self, change, value):
         if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionChange:
@@ -228,10 +268,13 @@ class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
                 self.xSpinBox.setValue(self.pos().x())
                 self.ySpinBox.setValue(self.pos().y())
 
-            # update the arrow position if arrow exists in parent
-            for item in self.scene().items():
-                if isinstance(item, ArenaArrowItem):
-                    item.updatePosition()
+        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
+            update_spatial_index(self)
+            # update the arrows attached to this item
+            for arrow in self.arrows:
+                arrow.updatePosition()
+            if self.handlePositionChangedMethod is not None:
+                self.handlePositionChangedMethod(self.scenePos())
 
         return super().itemChange(change, value)
 
@@ -242,10 +285,7 @@ class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
 
         self.oldMousePos = mouse_event.scenePos()
         self.oldItemPos = self.scenePos()
-        # save positions for all items in scene
-        for item in self.scene().items():
-            if hasattr(item, "oldItemPos"):
-                item.oldItemPos = item.scenePos()
+        snapshot_drag_positions(self)
         self.oldItemRotation = self.rotation()
         modifier = QtWidgets.QApplication.keyboardModifiers()
         if modifier == QtCore.Qt.KeyboardModifier.ControlModifier:
@@ -279,27 +319,24 @@ class ArenaGraphicsEllipseItem(QtWidgets.QGraphicsEllipseItem):
 
 class WaypointGraphicsEllipseItem(ArenaGraphicsEllipseItem):
     '''
-    This item is meant to visualize a waypoint and is connected to a parent WaypointWidget.
+    This item is meant to visualize a waypoint and is connected to a parent WaypointRow.
     '''
 
-    def __init__(self, waypointWidget, *args, **kwargs):
+    def __init__(self, waypointRow, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.waypointWidget = waypointWidget
+        self.waypointRow = waypointRow
 
         # set color
         brush = QtGui.QBrush(QtGui.QColor("blue"), QtCore.Qt.BrushStyle.SolidPattern)
         self.setBrush(brush)
 
-        self.keyPressEater = KeyPressEater(self.handleEvent)
-
     def setPosNoEvent(self, x, y):
         super().setPosNoEvent(x, y)
-        self.waypointWidget.pedestrianAgentWidget.drawWaypointPath()
+        self.waypointRow.pedestrianAgentRow.scheduleWaypointPathRedraw()
 
     def itemChange(self, change, value):
-        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionChange:
-            self.waypointWidget.updateSpinBoxesFromGraphicsItem()
-            self.waypointWidget.pedestrianAgentWidget.drawWaypointPath()
+        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
+            self.waypointRow.handleItemChange()
 
         return super().itemChange(change, value)
 
@@ -313,32 +350,29 @@ class WaypointGraphicsEllipseItem(ArenaGraphicsEllipseItem):
         return False
 
     def remove(self):
-        self.waypointWidget.remove()
+        self.waypointRow.remove()
 
 
 class PointGraphicsEllipseItem(ArenaGraphicsEllipseItem):
     '''
-    This item is meant to visualize a waypoint and is connected to a parent PointWidget.
+    This item is meant to visualize a waypoint and is connected to a parent PointRow.
     '''
 
-    def __init__(self, pointWidget, *args, **kwargs):
+    def __init__(self, pointRow, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.pointWidget = pointWidget
+        self.pointRow = pointRow
 
         # set color
         brush = QtGui.QBrush(QtGui.QColor(139, 137, 138), QtCore.Qt.BrushStyle.SolidPattern)
         self.setBrush(brush)
 
-        self.keyPressEater = KeyPressEater(self.handleEvent)
-
     def setPosNoEvent(self, x, y):
         super().setPosNoEvent(x, y)
-        self.pointWidget.polygonWidget.drawPolygon()
+        self.pointRow.polygonRow.drawPolygon()
 
     def itemChange(self, change, value):
-        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionChange:
-            self.pointWidget.updateSpinBoxesFromGraphicsItem()
-            self.pointWidget.polygonWidget.drawPolygon()
+        if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
+            self.pointRow.handleItemChange()
 
         return super().itemChange(change, value)
 
@@ -352,7 +386,7 @@ class PointGraphicsEllipseItem(ArenaGraphicsEllipseItem):
         return False
 
     def remove(self):
-        self.pointWidget.remove()
+        self.pointRow.remove()
 
 
 class SubgoalEllipseItem(ArenaGraphicsEllipseItem):
@@ -368,8 +402,6 @@ class SubgoalEllipseItem(ArenaGraphicsEllipseItem):
         brush = QtGui.QBrush(QtGui.QColor("blue"), QtCore.Qt.BrushStyle.SolidPattern)
         self.setBrush(brush)
 
-        self.keyPressEater = KeyPressEater(self.handleEvent)
-
     def setPosNoEvent(self, x, y):
         super().setPosNoEvent(x, y)
         self.pathCreator.drawWaypointPath()
@@ -411,29 +443,25 @@ class ArenaQGraphicsPolygonItem(QtWidgets.QGraphicsPolygonItem):
         # handles for resizing
         self.handle_size = 0.3  # length of one side of a rectangular handle
         self.handles = []  # list of QRectangle
+        # centers of the handles, for looking them up at once
+        self.handleCenters = np.zeros((0, 2))
         self.updateHandlesPos()
         self.point_index = -1
 
     def handleAt(self, point):
         """
-        Returns the index of the resize handle below the given point.
+        Returns the index of the resize handle below the given point, -1 if there is none.
         """
-        valid_handles = []
-        for i, handle in enumerate(self.handles):
-            if handle.contains(point):
-                valid_handles.append(i)
+        if len(self.handleCenters) == 0:
+            return -1
+        diff = self.handleCenters - (point.x(), point.y())
+        valid_handles = np.all(np.abs(diff) <= self.handle_size / 2.0, axis=1)
+        if not valid_handles.any():
+            return -1
 
         # select handle which center is closest to *point*
-        min_diff = float("inf")
-        selected_handle_idx = -1
-        for handle_idx in valid_handles:
-            diff = point - self.handles[handle_idx].center()
-            diff_len = np.linalg.norm([diff.x(), diff.y()])
-            if diff_len < min_diff:
-                min_diff = diff_len
-                selected_handle_idx = handle_idx
-
-        return selected_handle_idx
+        diff_len = np.where(valid_handles, np.hypot(diff[:, 0], diff[:, 1]), np.inf)
+        return int(np.argmin(diff_len))
 
     def mousePressEvent(self, mouse_event):
         """
@@ -487,6 +515,8 @@ class ArenaQGraphicsPolygonItem(QtWidgets.QGraphicsPolygonItem):
         for point in self.polygon():
             rect = QtCore.QRectF(point.x() - d / 2.0, point.y() - d / 2.0, d, d)
             self.handles.append(rect)
+        centers = [[point.x(), point.y()] for point in self.polygon()]
+        self.handleCenters = np.array(centers).reshape(-1, 2)
 
     def itemChange(self, change, value):
         if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionChange:
@@ -515,10 +545,18 @@ class ArenaQGraphicsPolygonItem(QtWidgets.QGraphicsPolygonItem):
 
 
 class ArenaArrowItem(QtWidgets.QGraphicsPathItem):
+    '''
+    An arrow from startItem to endItem. The arrow registers itself with items that have an
+    'arrows' list (like ArenaGraphicsEllipseItem), which update it when they are moved.
+    '''
+
     def __init__(self, startItem, endItem, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.startItem = startItem
         self.endItem = endItem
+        for item in [startItem, endItem]:
+            if hasattr(item, "arrows"):
+                item.arrows.append(self)
 
         # Arrow styling
         pen = QtGui.QPen(QtCore.Qt.GlobalColor.black)
@@ -552,6 +590,274 @@ class ArenaArrowItem(QtWidgets.QGraphicsPathItem):
         self.setPath(path)
 
 
+class MapImageLoader(QtCore.QObject):
+    '''
+    Signals of MapImageTask, emitted from a QThreadPool worker thread and delivered
+    in the thread of this object.
+    '''
+    # request id, image, size of an image pixel in map pixels (x, y)
+    previewLoaded = QtCore.pyqtSignal(int, QtGui.QImage, float, float)
+    # request id, MapTilePyramid
+    imageLoaded = QtCore.pyqtSignal(int, object)
+    # request id, error message
+    loadFailed = QtCore.pyqtSignal(int, str)
+    _threadPool = None
+
+    @staticmethod
+    def threadPool() -> QtCore.QThreadPool:
+        '''
+        Returns the pool the map images are decoded in. It is separate from the global
+        QThreadPool: QImage conversions in the GUI thread split their work into the global
+        pool and wait for it while holding the GIL, so its threads must not be occupied
+        by tasks that need the GIL.
+        '''
+        if MapImageLoader._threadPool is None:
+            MapImageLoader._threadPool = QtCore.QThreadPool()
+        return MapImageLoader._threadPool
+
+
+class MapTilePyramid:
+    '''
+    A map image as a mipmap pyramid of tiles. Level 0 has the full resolution, every
+    further level half the width and height of the previous one, down to a single tile.
+    - levels: list of 2D lists of QImage tiles, indexed [level][row][column]
+    - scales: list of (x, y) sizes of a pixel of each level in full resolution pixels
+    '''
+
+    def __init__(self, image: QtGui.QImage, tileSize: int):
+        self.width = image.width()
+        self.height = image.height()
+        self.tileSize = tileSize
+        self.levels = []
+        self.scales = []
+        while True:
+            self.levels.append([
+                [image.copy(
+                    x, y, min(tileSize, image.width() - x), min(tileSize, image.height() - y)
+                )
+                 for x in range(0, image.width(), tileSize)]
+                for y in range(0, image.height(), tileSize)
+            ])
+            self.scales.append((self.width / image.width(), self.height / image.height()))
+            if image.width() <= tileSize and image.height() <= tileSize:
+                break
+            image = image.scaled(
+                max(1, image.width() // 2), max(1, image.height() // 2),
+                QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation
+            )
+
+    def levelForScale(self, levelOfDetail: float) -> int:
+        '''
+        Returns the level to draw when one full resolution pixel covers
+        'levelOfDetail' device pixels.
+        '''
+        if levelOfDetail >= 1.0 or levelOfDetail <= 0.0:
+            return 0
+        return min(int(np.floor(np.log2(1.0 / levelOfDetail))), len(self.levels) - 1)
+
+
+class MapImageTask(QtCore.QRunnable):
+    '''
+    Decodes a map image, flips it vertically and splits it into a MapTilePyramid in a
+    MapImageLoader.threadPool worker thread. If the image is larger than previewSize, a subsampled
+    preview is emitted first.
+    '''
+
+    def __init__(
+        self, loader: MapImageLoader, requestId: int, imagePath: str, previewSize: int,
+        tileSize: int
+    ):
+        super().__init__()
+        self.loader = loader
+        self.requestId = requestId
+        self.imagePath = imagePath
+        self.previewSize = previewSize
+        self.tileSize = tileSize
+
+    def run(self):
+        try:
+            self.loadPreview()
+            reader = QtGui.QImageReader(self.imagePath)
+            image = reader.read()
+            if image.isNull():
+                raise Exception(reader.errorString())
+            pyramid = MapTilePyramid(image.mirrored(False, True), self.tileSize)
+            self.loader.imageLoaded.emit(self.requestId, pyramid)
+        except Exception as e:
+            self.loader.loadFailed.emit(self.requestId, str(e))
+
+    def loadPreview(self):
+        reader = QtGui.QImageReader(self.imagePath)
+        size = reader.size()
+        step = int(np.ceil(max(size.width(), size.height()) / self.previewSize))
+        if not size.isValid() or step <= 1:
+            return
+
+        header = read_pgm_header(self.imagePath)
+        if header is not None:
+            # subsample the memory-mapped pixels, this only reads the needed rows
+            _, _, maxval, _ = header
+            pixels = read_pgm(self.imagePath)[::-step, ::step]
+            if maxval != 255:
+                pixels = (pixels.astype(np.uint32) * 255 // maxval).astype(np.uint8)
+            pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+            height, width = pixels.shape
+            # copy so the image does not reference the array
+            preview = QtGui.QImage(
+                pixels.data, width, height, width, QtGui.QImage.Format_Grayscale8
+            ).copy()
+        else:
+            reader.setScaledSize(size / step)
+            preview = reader.read()
+            if preview.isNull():
+                return
+            preview = preview.mirrored(False, True)
+
+        self.loader.previewLoaded.emit(
+            self.requestId, preview,
+            size.width() / preview.width(), size.height() / preview.height()
+        )
+
+
+class ArenaMapItem(QtWidgets.QGraphicsObject):
+    '''
+    Displays a ROS map in the scene. The item coordinates are the pixels of the map
+    image, scaled by the map resolution.
+    The map image is decoded in MapImageLoader.threadPool into a MapTilePyramid; for large
+    maps a low resolution preview is displayed until it is ready. Painting only draws
+    the tiles intersecting the exposed rect, from the level matching the current zoom.
+    Tiles are converted to QPixmaps when they are first drawn and kept in the QPixmapCache.
+    In an ArenaQGraphicsScene the map is drawn as part of the scene background, so views
+    can cache it with QGraphicsView.CacheBackground.
+    If the image can't be loaded, loadFailed is emitted and loadError holds the message.
+    '''
+    # image path, error message
+    loadFailed = QtCore.pyqtSignal(str, str)
+    PREVIEW_SIZE = 1024  # maximum width and height of the preview in pixels
+    TILE_SIZE = 512
+    PIXMAP_CACHE_LIMIT = 256 * 1024  # KiB
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setZValue(-1.0)  # make sure map is always in the background
+        self.setFlag(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+        if QtGui.QPixmapCache.cacheLimit() < self.PIXMAP_CACHE_LIMIT:
+            QtGui.QPixmapCache.setCacheLimit(self.PIXMAP_CACHE_LIMIT)
+        self.resolution = 1.0
+        self.imagePath = ""
+        self.loadError = ""  # error message of the last load, empty if there was none
+        self.requestId = 0
+        self.size = QtCore.QSizeF(0, 0)
+        self.preview = None
+        self.pyramid = None
+        self.loader = MapImageLoader()
+        self.loader.previewLoaded.connect(self.handlePreviewLoaded)
+        self.loader.imageLoaded.connect(self.handleImageLoaded)
+        self.loader.loadFailed.connect(self.handleLoadFailed)
+
+    def load(self, imagePath: str, resolution: float, origin: List[float]):
+        '''
+        Starts loading the map image. Results of earlier calls that arrive later are ignored.
+        '''
+        self.requestId += 1
+        self.imagePath = imagePath
+        self.loadError = ""
+        self.resolution = resolution
+        self.preview = None
+        self.pyramid = None
+        self.setSize(QtCore.QSizeF(0, 0))
+        self.setPos(origin[0], origin[1])
+        self.setTransform(QtGui.QTransform.fromScale(resolution, resolution))
+        MapImageLoader.threadPool().start(
+            MapImageTask(self.loader, self.requestId, imagePath, self.PREVIEW_SIZE, self.TILE_SIZE)
+        )
+
+    def setSize(self, size: QtCore.QSizeF):
+        if size != self.size:
+            self.prepareGeometryChange()
+            self.size = size
+        self.update()
+        if self.scene() is not None:
+            # the map is part of the (cached) background
+            self.scene().invalidate(
+                self.sceneBoundingRect(), QtWidgets.QGraphicsScene.SceneLayer.BackgroundLayer
+            )
+
+    def isBackground(self) -> bool:
+        return isinstance(self.scene(), ArenaQGraphicsScene)
+
+    def boundingRect(self) -> QtCore.QRectF:
+        return QtCore.QRectF(QtCore.QPointF(0, 0), self.size)
+
+    def handlePreviewLoaded(self, requestId: int, image: QtGui.QImage, stepX: float, stepY: float):
+        if requestId != self.requestId or self.pyramid is not None:
+            return
+        self.preview = QtGui.QPixmap.fromImage(image)
+        self.setSize(QtCore.QSizeF(image.width() * stepX, image.height() * stepY))
+
+    def handleImageLoaded(self, requestId: int, pyramid: MapTilePyramid):
+        if requestId != self.requestId:
+            return
+        self.pyramid = pyramid
+        self.preview = None
+        self.setSize(QtCore.QSizeF(pyramid.width, pyramid.height))
+
+    def handleLoadFailed(self, requestId: int, error: str):
+        if requestId != self.requestId:
+            return
+        self.loadError = error or "unknown error"
+        self.loadFailed.emit(self.imagePath, self.loadError)
+
+    def tilePixmap(self, level: int, row: int, column: int) -> QtGui.QPixmap:
+        key = f"ArenaMapItem {id(self)} {self.requestId} {level} {row} {column}"
+        pixmap = QtGui.QPixmapCache.find(key)
+        if pixmap is None or pixmap.isNull():
+            pixmap = QtGui.QPixmap.fromImage(self.pyramid.levels[level][row][column])
+            QtGui.QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def paint(
+        self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionGraphicsItem, widget=None
+    ):
+        if not self.isBackground():
+            self.paintMap(painter, option.exposedRect)
+
+    def paintMap(self, painter: QtGui.QPainter, exposedRect: QtCore.QRectF):
+        '''
+        Paints the part of the map inside 'exposedRect' (item coordinates), the painter
+        has to be set up with the item transform.
+        '''
+        if self.pyramid is None:
+            if self.preview is not None:
+                painter.drawPixmap(
+                    self.boundingRect(), self.preview, QtCore.QRectF(self.preview.rect())
+                )
+            return
+
+        pyramid = self.pyramid
+        level = pyramid.levelForScale(
+            QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        )
+        tiles = pyramid.levels[level]
+        scaleX, scaleY = pyramid.scales[level]
+        tileWidth, tileHeight = pyramid.tileSize * scaleX, pyramid.tileSize * scaleY
+
+        exposed = exposedRect.intersected(self.boundingRect())
+        firstColumn = max(0, int(exposed.left() // tileWidth))
+        lastColumn = min(len(tiles[0]) - 1, int(exposed.right() // tileWidth))
+        firstRow = max(0, int(exposed.top() // tileHeight))
+        lastRow = min(len(tiles) - 1, int(exposed.bottom() // tileHeight))
+        for row in range(firstRow, lastRow + 1):
+            for column in range(firstColumn, lastColumn + 1):
+                pixmap = self.tilePixmap(level, row, column)
+                target = QtCore.QRectF(
+                    column * tileWidth, row * tileHeight,
+                    pixmap.width() * scaleX, pixmap.height() * scaleY
+                )
+                painter.drawPixmap(target, pixmap, QtCore.QRectF(pixmap.rect()))
+
+
 class ModeWindow(QtWidgets.QMessageBox):
     '''
     A Window that pops up to indicate that a special mode has been activated.
@@ -592,7 +898,7 @@ class ActiveModeWindow(ModeWindow):
         self.setText("Click anywhere on the map to add a waypoint.\nPress ESC to finish.")
 
     def disable(self):
-        self.connectedWidget.addWaypointModeActive = False
+        self.connectedWidget.setAddWaypointMode(False)
         self.hide()
 
 
@@ -774,15 +1080,351 @@ class ArenaQDoubleSpinBox(QtWidgets.QDoubleSpinBox):
         self.setValue(new_value)
 
 
+class ArenaTreeRow:
+    '''
+    A row of an ArenaTreeModel. The model keeps 'model', 'rowParent' and 'row' (the position
+    among the siblings) up to date. Rows with children set 'rowChildren' to a list.
+    Subclasses return the values of their columns in rowValues and apply edits in setRowData.
+    '''
+    model = None
+    rowParent = None
+    row = 0
+    rowChildren = ()
+
+    def rowValues(self) -> list:
+        '''
+        Returns the values of the columns, None for empty cells.
+        Floats are shown with two decimals and are edited with a spin box.
+        '''
+        return []
+
+    def rowData(self, column: int, role: int):
+        values = self.rowValues()
+        if column >= len(values) or values[column] is None:
+            return None
+        value = values[column]
+        if role == QtCore.Qt.ItemDataRole.EditRole:
+            return value
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return f"{value:.2f}" if isinstance(value, float) else value
+        return None
+
+    def setRowData(self, column: int, value) -> bool:
+        return False
+
+    def rowFlags(self, column: int) -> QtCore.Qt.ItemFlags:
+        flags = QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+        if isinstance(self.rowData(column, QtCore.Qt.ItemDataRole.EditRole), float):
+            flags |= QtCore.Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def rowChanged(self):
+        '''
+        Call when the values of this row have changed.
+        '''
+        if self.model is not None:
+            self.model.rowChanged(self)
+
+    def insertChildRows(self, position: int, rows: list):
+        if self.model is not None:
+            self.model.insertRowObjects(self, position, rows)
+        else:
+            self.rowChildren[position:position] = rows
+            ArenaTreeModel.adoptRows(self, self.rowChildren, position, None)
+
+    def appendChildRows(self, rows: list):
+        self.insertChildRows(len(self.rowChildren), rows)
+
+    def removeChildRow(self, row):
+        if self.model is not None:
+            self.model.removeRowObject(row)
+        else:
+            del self.rowChildren[row.row]
+            ArenaTreeModel.adoptRows(self, self.rowChildren, row.row, None)
+
+
+class ArenaTreeModel(QtCore.QAbstractItemModel):
+    '''
+    A tree model of ArenaTreeRow objects for the side bars of the editors.
+    The views only create widgets for the visible rows (and an editor for the edited cell),
+    so the side bars stay fast with thousands of rows.
+    - headers: the titles of the columns
+    '''
+
+    def __init__(self, headers: List[str], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.headers = headers
+        self.rows: List[ArenaTreeRow] = []  # top level rows
+
+    @staticmethod
+    def adoptRows(parentRow: ArenaTreeRow, siblings: List[ArenaTreeRow], start: int, model):
+        '''
+        Updates the tree attributes of 'siblings' from 'start' on
+        and sets the model of their descendants.
+        '''
+        for i in range(start, len(siblings)):
+            row = siblings[i]
+            row.rowParent = parentRow
+            row.row = i
+            if row.model is not model:
+                ArenaTreeModel.setModelRecursive(row, model)
+
+    @staticmethod
+    def setModelRecursive(row: ArenaTreeRow, model):
+        row.model = model
+        for child in row.rowChildren:
+            ArenaTreeModel.setModelRecursive(child, model)
+
+    def childRows(self, parentRow: ArenaTreeRow) -> List[ArenaTreeRow]:
+        return self.rows if parentRow is None else parentRow.rowChildren
+
+    def rowFromIndex(self, index: QtCore.QModelIndex) -> ArenaTreeRow:
+        return index.internalPointer() if index.isValid() else None
+
+    def indexOf(self, row: ArenaTreeRow, column: int = 0) -> QtCore.QModelIndex:
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(row.row, column, row)
+
+    def index(
+        self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()
+    ) -> QtCore.QModelIndex:
+        children = self.childRows(self.rowFromIndex(parent))
+        if row < 0 or row >= len(children) or column < 0 or column >= len(self.headers):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.indexOf(index.internalPointer().rowParent)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self.childRows(self.rowFromIndex(parent)))
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return len(self.headers)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        return index.internalPointer().rowData(index.column(), role)
+
+    def setData(
+        self, index: QtCore.QModelIndex, value, role: int = QtCore.Qt.ItemDataRole.EditRole
+    ) -> bool:
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.EditRole:
+            return False
+        row = index.internalPointer()
+        if not row.setRowData(index.column(), value):
+            return False
+        self.rowChanged(row)
+        return True
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        if not index.isValid():
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        return index.internalPointer().rowFlags(index.column())
+
+    def headerData(
+        self, section: int, orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        if (
+            orientation == QtCore.Qt.Orientation.Horizontal
+            and role == QtCore.Qt.ItemDataRole.DisplayRole
+        ):
+            return self.headers[section]
+        return None
+
+    def rowChanged(self, row: ArenaTreeRow):
+        self.dataChanged.emit(self.indexOf(row, 0), self.indexOf(row, len(self.headers) - 1))
+
+    def insertRowObjects(self, parentRow: ArenaTreeRow, position: int, rows: List[ArenaTreeRow]):
+        if len(rows) == 0:
+            return
+        self.beginInsertRows(self.indexOf(parentRow), position, position + len(rows) - 1)
+        siblings = self.childRows(parentRow)
+        siblings[position:position] = rows
+        self.adoptRows(parentRow, siblings, position, self)
+        self.endInsertRows()
+
+    def appendRowObjects(self, parentRow: ArenaTreeRow, rows: List[ArenaTreeRow]):
+        self.insertRowObjects(parentRow, len(self.childRows(parentRow)), rows)
+
+    def removeRowObject(self, row: ArenaTreeRow):
+        parentRow = row.rowParent
+        position = row.row
+        self.beginRemoveRows(self.indexOf(parentRow), position, position)
+        siblings = self.childRows(parentRow)
+        del siblings[position]
+        self.adoptRows(parentRow, siblings, position, self)
+        self.setModelRecursive(row, None)
+        self.endRemoveRows()
+
+    def setRowObjects(self, rows: List[ArenaTreeRow]):
+        '''
+        Replaces all top level rows at once.
+        '''
+        self.beginResetModel()
+        for row in self.rows:
+            self.setModelRecursive(row, None)
+        self.rows = list(rows)
+        self.adoptRows(None, self.rows, 0, self)
+        self.endResetModel()
+
+
+class ArenaItemDelegate(QtWidgets.QStyledItemDelegate):
+    '''
+    Edits the float values of an ArenaTreeModel with an ArenaQDoubleSpinBox that only exists
+    while the cell is edited. Changes are applied while the value changes, like the spin boxes
+    that were connected to the graphics items.
+    '''
+
+    def createEditor(
+        self, parent: QtWidgets.QWidget, option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex
+    ) -> QtWidgets.QWidget:
+        if isinstance(index.data(QtCore.Qt.ItemDataRole.EditRole), float):
+            editor = ArenaQDoubleSpinBox(parent)
+            editor.setFrame(False)
+            editor.valueChanged.connect(lambda: self.commitData.emit(editor))
+            return editor
+        return super().createEditor(parent, option, index)
+
+    def setEditorData(self, editor: QtWidgets.QWidget, index: QtCore.QModelIndex):
+        if isinstance(editor, ArenaQDoubleSpinBox):
+            # showing the value is not an edit
+            editor.blockSignals(True)
+            editor.setValue(index.data(QtCore.Qt.ItemDataRole.EditRole))
+            editor.blockSignals(False)
+        else:
+            super().setEditorData(editor, index)
+
+    def setModelData(
+        self, editor: QtWidgets.QWidget, model: QtCore.QAbstractItemModel,
+        index: QtCore.QModelIndex
+    ):
+        if isinstance(editor, ArenaQDoubleSpinBox):
+            model.setData(index, editor.value(), QtCore.Qt.ItemDataRole.EditRole)
+        else:
+            super().setModelData(editor, model, index)
+
+
+class ArenaTreeView(QtWidgets.QTreeView):
+    '''
+    A QTreeView for an ArenaTreeModel, with rows of the same height so that scrolling does
+    not depend on the number of rows.
+    '''
+
+    def __init__(self, model: ArenaTreeModel, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setModel(model)
+        self.setItemDelegate(ArenaItemDelegate(self))
+        self.setUniformRowHeights(True)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.DoubleClicked |
+            QtWidgets.QAbstractItemView.EditTrigger.EditKeyPressed |
+            QtWidgets.QAbstractItemView.EditTrigger.SelectedClicked
+        )
+
+    def selectedRowObjects(self) -> List[ArenaTreeRow]:
+        return [self.model().rowFromIndex(index) for index in self.selectionModel().selectedRows()]
+
+    def currentRowObject(self) -> ArenaTreeRow:
+        return self.model().rowFromIndex(self.currentIndex())
+
+
 class ArenaQGraphicsScene(QtWidgets.QGraphicsScene):
+    '''
+    A QGraphicsScene that draws its ArenaMapItems as background, below all other items.
+    The positions of the agents, waypoints and points are kept in a spatial index (pointIndex),
+    which the items update when they are moved.
+    '''
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.mapItems: List[ArenaMapItem] = []
+        self.pointIndex = SpatialHashGrid(cell_size=1.0)
+        # key presses for interacting with the selected items
+        self.keyDispatcher = SceneKeyDispatcher(self)
+
+    def addItem(self, item: QtWidgets.QGraphicsItem):
+        super().addItem(item)
+        if isinstance(item, ArenaMapItem) and item not in self.mapItems:
+            self.mapItems.append(item)
+            self.invalidate(
+                item.sceneBoundingRect(), QtWidgets.QGraphicsScene.SceneLayer.BackgroundLayer
+            )
+        if isinstance(item, (ArenaGraphicsPathItem, ArenaGraphicsEllipseItem)):
+            update_spatial_index(item)
+
+    def removeItem(self, item: QtWidgets.QGraphicsItem):
+        self.pointIndex.remove(item)
+        if item in self.mapItems:
+            self.mapItems.remove(item)
+            self.invalidate(
+                item.sceneBoundingRect(), QtWidgets.QGraphicsScene.SceneLayer.BackgroundLayer
+            )
+        super().removeItem(item)
+
+    def drawBackground(self, painter: QtGui.QPainter, rect: QtCore.QRectF):
+        super().drawBackground(painter, rect)
+        for item in self.mapItems:
+            if not item.isVisible():
+                continue
+            painter.save()
+            painter.setTransform(item.sceneTransform(), True)
+            item.paintMap(painter, item.mapRectFromScene(rect))
+            painter.restore()
 
     def removeSelected(self):
         for item in self.selectedItems():
             if isinstance(item, ArenaGraphicsPathItem):
                 item.remove()
 
+    def pointItemAt(
+        self, pos: QtCore.QPointF, maxDistance: float, accept=None
+    ) -> Optional[QtWidgets.QGraphicsItem]:
+        '''
+        Returns the visible agent, waypoint or point item closest to 'pos',
+        if it is at most 'maxDistance' away.
+        args:
+            - accept: optional function that tells if an item can be returned
+        '''
+        def acceptItem(item):
+            return item.isVisible() and (accept is None or accept(item))
+        return self.pointIndex.nearest(pos.x(), pos.y(), maxDistance, acceptItem)
+
+    def pointItemsIn(self, rect: QtCore.QRectF) -> List[QtWidgets.QGraphicsItem]:
+        '''
+        Returns the visible agent, waypoint and point items whose position is inside 'rect'.
+        '''
+        rect = rect.normalized()
+        items = self.pointIndex.query_rect(rect.left(), rect.top(), rect.right(), rect.bottom())
+        return [item for item in items if item.isVisible()]
+
+    def selectIn(self, rect: QtCore.QRectF, extend: bool = False):
+        '''
+        Selects the items in 'rect': the agents, waypoints and points are looked up in the
+        point index, the other items (e.g. polygons) are selected if they intersect 'rect'.
+        args:
+            - extend: keep the current selection instead of clearing it
+        '''
+        items = [
+            item for item in self.items(rect, QtCore.Qt.ItemSelectionMode.IntersectsItemShape)
+            if item not in self.pointIndex
+        ]
+        items += self.pointItemsIn(rect)
+        if not extend:
+            self.clearSelection()
+        for item in items:
+            if item.flags() & QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemIsSelectable:
+                item.setSelected(True)
+
 
 class ArenaQGraphicsView(QtWidgets.QGraphicsView):
     '''
@@ -790,17 +1432,41 @@ class ArenaQGraphicsView(QtWidgets.QGraphicsView):
     - can be dragged by mouse
     - can be zoomed by mouse wheel
     - sends mouse click positions (except clicks from dragging)
+    - selects the agent, waypoint or point closest to a click if nothing is in add mode
+    - selects the items in a rectangle dragged with the right mouse button
+    - caches the background, which contains the map in an ArenaQGraphicsScene
+    - can show the time needed to paint the viewport (setFrameTimeOverlay)
     '''
     clickedPos = QtCore.pyqtSignal(QtCore.QPointF)
+    PICK_DISTANCE = 8  # pixels
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self, *args, updateMode=QtWidgets.QGraphicsView.ViewportUpdateMode.SmartViewportUpdate,
+        **kwargs
+    ):
+        '''
+        args:
+            - updateMode: the QGraphicsView.ViewportUpdateMode. The default only repaints the
+                changed regions, use FullViewportUpdate to repaint everything on every change.
+        '''
         super().__init__(*args, **kwargs)
         self.setDragMode(QtWidgets.QGraphicsView.DragMode.ScrollHandDrag)
         self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
         self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
         self.setSceneRect(-100, -100, 200, 200)
         self.zoomFactor = 1.0
-        self.setViewportUpdateMode(QtWidgets.QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        self.setViewportUpdateMode(updateMode)
+        self.setCacheMode(QtWidgets.QGraphicsView.CacheModeFlag.CacheBackground)
+
+        # frame time overlay
+        self.frameTimeLabel = QtWidgets.QLabel(self)
+        self.frameTimeLabel.setStyleSheet(
+            "background-color: rgba(255, 255, 255, 200); padding: 2px;"
+        )
+        self.frameTimeLabel.move(5, 5)
+        self.frameTimeLabel.hide()
+        self.frameTimes = []  # paint times in ms since the overlay was last updated
+        self.lastFrameTimeUpdate = 0.0
 
         # add coordinate system lines
         pen = QtGui.QPen()
@@ -813,25 +1479,134 @@ class ArenaQGraphicsView(QtWidgets.QGraphicsView):
         self.fitInView(rect, mode=QtCore.Qt.AspectRatioMode.KeepAspectRatio)
 
         self.lastMousePos = QtCore.QPointF()
+        self.pickedItem = None
+        # rectangle selection with the right mouse button, the items are selected on release
+        self.rubberBand = QtWidgets.QRubberBand(
+            QtWidgets.QRubberBand.Shape.Rectangle, self.viewport()
+        )
+        self.rubberBandOrigin = None
+
+    def pickDistance(self) -> float:
+        '''
+        Returns the distance in scene coordinates within which clicks select or snap to items.
+        '''
+        return self.PICK_DISTANCE / abs(self.transform().m11())
+
+    def pickItem(self, event: QtGui.QMouseEvent) -> bool:
+        '''
+        Selects the item closest to a click next to it, which makes small items easy to select
+        when zoomed out. Returns True if an item was selected.
+        '''
+        scene = self.scene()
+        # while something is in add mode, clicks next to items add new ones
+        if not isinstance(scene, ArenaQGraphicsScene) or self.receivers(self.clickedPos) > 0:
+            return False
+        # clicks directly on an item are handled by the item,
+        # even if an arrow or line is on top of it
+        if any(
+            isinstance(item, (ArenaGraphicsPathItem, ArenaGraphicsEllipseItem))
+            for item in self.items(event.pos())
+        ):
+            return False
+        item = scene.pointItemAt(self.mapToScene(event.pos()), self.pickDistance())
+        if item is None:
+            return False
+        if not event.modifiers() & QtCore.Qt.KeyboardModifier.ControlModifier:
+            scene.clearSelection()
+        item.setSelected(True)
+        self.pickedItem = item
+        return True
+
+    def startRubberBand(self, event: QtGui.QMouseEvent) -> bool:
+        '''
+        Starts a rectangle selection on the background of an ArenaQGraphicsScene.
+        Unlike the RubberBandDrag of QGraphicsView, which selects all items in the rectangle
+        on every mouse move, the items are selected once on release with the point index.
+        Returns True if the rectangle selection was started.
+        '''
+        if not isinstance(self.scene(), ArenaQGraphicsScene):
+            return False
+        # presses on items are handled by the items
+        if any(
+            item.flags() & QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+            for item in self.items(event.pos())
+        ):
+            return False
+        self.rubberBandOrigin = event.pos()
+        self.rubberBand.setGeometry(QtCore.QRect(event.pos(), QtCore.QSize()))
+        self.rubberBand.show()
+        return True
+
+    def finishRubberBand(self, event: QtGui.QMouseEvent):
+        rect = QtCore.QRect(self.rubberBandOrigin, event.pos()).normalized()
+        self.rubberBand.hide()
+        self.rubberBandOrigin = None
+        extend = bool(event.modifiers() & QtCore.Qt.KeyboardModifier.ControlModifier)
+        self.scene().selectIn(self.mapToScene(rect).boundingRect(), extend)
 
     def mousePressEvent(self, event: QtGui.QMouseEvent):
         self.lastMousePos = event.pos()
+        self.pickedItem = None
         if event.buttons() & QtCore.Qt.MouseButton.RightButton:
             self.setDragMode(QtWidgets.QGraphicsView.DragMode.RubberBandDrag)
+            if self.startRubberBand(event):
+                return
         if event.buttons() & QtCore.Qt.MouseButton.LeftButton:
             self.setDragMode(QtWidgets.QGraphicsView.DragMode.ScrollHandDrag)
+            if self.pickItem(event):
+                return
 
         return super().mousePressEvent(event)
 
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent):
+        if self.rubberBandOrigin is not None:
+            rect = QtCore.QRect(self.rubberBandOrigin, event.pos())
+            self.rubberBand.setGeometry(rect.normalized())
+            return
+        return super().mouseMoveEvent(event)
+
     def mouseReleaseEvent(self, event):
+        if self.pickedItem is not None:
+            # the click selected an item
+            self.pickedItem = None
+            return
+        rubberBand = self.rubberBandOrigin is not None
+        if rubberBand:
+            self.finishRubberBand(event)
         # only emit signal if mouse was not dragged
         diff = event.pos() - self.lastMousePos
         diff_len = diff.x() + diff.y()
         if abs(diff_len) < 2.0:
             pos = self.mapToScene(event.pos())
             self.clickedPos.emit(pos)
+        if rubberBand:
+            return
         return super().mouseReleaseEvent(event)
 
+    def setFrameTimeOverlay(self, enable: bool):
+        self.frameTimes = []
+        self.frameTimeLabel.setText("paint: - ms")
+        self.frameTimeLabel.adjustSize()
+        self.frameTimeLabel.setVisible(enable)
+
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        if not self.frameTimeLabel.isVisible():
+            return super().paintEvent(event)
+
+        start = time.perf_counter()
+        super().paintEvent(event)
+        now = time.perf_counter()
+        self.frameTimes.append((now - start) * 1000)
+        # update the label a few times per second
+        if now - self.lastFrameTimeUpdate > 0.25:
+            average, maximum = np.mean(self.frameTimes), np.max(self.frameTimes)
+            self.frameTimeLabel.setText(
+                f"paint: {average:.1f} ms avg, {maximum:.1f} ms max, {len(self.frameTimes)} frames"
+            )
+            self.frameTimeLabel.adjustSize()
+            self.frameTimes = []
+            self.lastFrameTimeUpdate = now
+
     def wheelEvent(self, event):
         """
         Zoom in or out of the view.
@@ -857,6 +1632,111 @@ class ArenaQGraphicsView(QtWidgets.QGraphicsView):
         delta = newPos - oldPos
         self.translate(delta.x(), delta.y())
 
+
+class BackgroundSaver(QtCore.QObject):
+    '''
+    Runs save functions one after another in a worker thread, so that serializing and
+    writing large files does not block the GUI. The save functions should only work on
+    a snapshot of the data taken in the GUI thread.
+    If saves are requested while a save is running, only the last one is run afterwards.
+    '''
+    saveStarted = QtCore.pyqtSignal(str)
+    saveFinished = QtCore.pyqtSignal(str)
+    saveFailed = QtCore.pyqtSignal(str, str)  # path, error message
+    # emitted by the worker thread, delivered in the thread of this object
+    _done = QtCore.pyqtSignal(str, str)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="save"
+        )
+        self.busy = False
+        self.pending = None
+        self._done.connect(self.handleDone)
+
+    def save(self, path: str, saveFunction):
+        '''
+        Calls saveFunction() in the worker thread.
+        '''
+        if self.busy:
+            self.pending = (path, saveFunction)
+            return
+        self.busy = True
+        self.saveStarted.emit(path)
+        self.executor.submit(self.run, path, saveFunction)
+
+    def isIdle(self) -> bool:
+        '''
+        Returns True if no save is running or waiting. While saveFinished or saveFailed is
+        emitted this is only True if there is no pending save after the finished one.
+        '''
+        return not self.busy and self.pending is None
+
+    def run(self, path: str, saveFunction):
+        try:
+            saveFunction()
+        except Exception as e:
+            self._done.emit(path, str(e) or type(e).__name__)
+        else:
+            self._done.emit(path, "")
+
+    def handleDone(self, path: str, error: str):
+        self.busy = False
+        if error:
+            self.saveFailed.emit(path, error)
+        else:
+            self.saveFinished.emit(path)
+        if self.pending is not None:
+            path, saveFunction = self.pending
+            self.pending = None
+            self.save(path, saveFunction)
+
+    def shutdown(self):
+        '''
+        Waits for the running save and runs a pending save in the calling thread.
+        '''
+        self.executor.shutdown(wait=True)
+        if self.pending is not None:
+            path, saveFunction = self.pending
+            self.pending = None
+            self.run(path, saveFunction)
+
+
+class SaveStatusLabel(QtWidgets.QLabel):
+    '''
+    A label for the status bar that shows the state of a BackgroundSaver.
+    '''
+
+    def __init__(self, saver: BackgroundSaver, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.autosave = False
+        saver.saveStarted.connect(self.handleSaveStarted)
+        saver.saveFinished.connect(self.handleSaveFinished)
+        saver.saveFailed.connect(self.handleSaveFailed)
+
+    def setAutosave(self, enable: bool):
+        self.autosave = enable
+        self.setText(self.withAutosave(self.text().replace(" (autosave)", "")))
+
+    def withAutosave(self, text: str) -> str:
+        return text + " (autosave)" if self.autosave else text
+
+    def handleSaveStarted(self, path: str):
+        self.setStyleSheet("color: darkorange")
+        self.setText(self.withAutosave("Saving..."))
+
+    def handleSaveFinished(self, path: str):
+        self.setStyleSheet("color: green")
+        self.setText(self.withAutosave(f"Saved {time.strftime('%H:%M:%S')}"))
+        self.setToolTip(path)
+
+    def handleSaveFailed(self, path: str, error: str):
+        self.setStyleSheet("color: red")
+        self.setText(self.withAutosave("Save failed"))
+        self.setToolTip(f"{path}: {error}")
+
+
 class ComboBoxDialog(QtWidgets.QDialog):
     def __init__(
             self, 
@@ -943,7 +1823,6 @@ class LineEditDialog(QtWidgets.QDialog):
 class CustomPropertyWidget(QtWidgets.QWidget):
     def __init__(self, pedestrianAgentEditor, property_name:Optional[str]="", property_value:Optional[str]="", property_type:Optional[str]="str", **kwargs):
         super().__init__(**kwargs)
-        from ..ScenarioEditor.ArenaScenarioEditor import PedestrianAgentWidget
         from ..ScenarioEditor.Pedestrian.PedestrianEditor import PedestrianAgentEditor
         self.id = 0
         self.pedestrianAgentEditor:PedestrianAgentEditor = pedestrianAgentEditor
@@ -0,0 +1,146 @@
+"""
+Codecs for reading and writing data files, selected by file extension.
+Faster backends are used when they are installed: the libyaml bindings of PyYAML,
+orjson for JSON and msgpack for the binary '.msgpack' format.
+"""
+import os
+import json
+import uuid
+import yaml
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# libyaml based loader and dumper, falling back to the pure Python implementations
+YamlSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlSafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+YamlDumper = getattr(yaml, "CDumper", yaml.Dumper)
+
+
+def yaml_load(stream) -> Any:
+    """Drop-in replacement for yaml.safe_load using libyaml if available."""
+    return yaml.load(stream, Loader=YamlSafeLoader)
+
+
+def yaml_safe_dump(data, stream=None, **kwargs):
+    """Drop-in replacement for yaml.safe_dump using libyaml if available."""
+    return yaml.dump(data, stream, Dumper=YamlSafeDumper, **kwargs)
+
+
+def write_atomic(path: str, write, binary: bool = False):
+    """
+    Writes a file by calling 'write' with a temporary file in the same directory, which
+    then replaces 'path'. Readers never see a partially written file and the previous
+    file is kept if 'write' fails.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    # os.open applies the umask like open() does, unlike tempfile.mkstemp
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o666)
+    try:
+        with os.fdopen(fd, "wb" if binary else "w") as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class Codec:
+    """
+    Reads and writes a file format. 'binary' tells whether the files have to be
+    opened in binary mode.
+    """
+    binary = False
+
+    def dump(self, data, file):
+        raise NotImplementedError
+
+    def load(self, file) -> Any:
+        raise NotImplementedError
+
+    def save(self, data, path: str):
+        write_atomic(path, lambda file: self.dump(data, file), self.binary)
+
+    def read(self, path: str) -> Any:
+        with open(path, "rb" if self.binary else "r") as file:
+            return self.load(file)
+
+
+class JsonCodec(Codec):
+    """
+    JSON, using orjson if available. Both write the same indented UTF-8 text, so a file
+    does not change when it is saved on a machine without orjson.
+    """
+    binary = True
+
+    def dump(self, data, file):
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            file.write(orjson.dumps(data, option=option))
+        else:
+            # orjson only indents by 2 spaces
+            file.write(json.dumps(data, indent=2, ensure_ascii=False).encode())
+
+    def load(self, file) -> Any:
+        if orjson is not None:
+            return orjson.loads(file.read())
+        return json.load(file)
+
+
+class YamlCodec(Codec):
+    """YAML, using the libyaml bindings of PyYAML if available."""
+
+    def dump(self, data, file):
+        yaml.dump(data, file, Dumper=YamlDumper, default_flow_style=None)
+
+    def load(self, file) -> Any:
+        return yaml_load(file)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack, a compact binary format. Requires the msgpack package."""
+    binary = True
+
+    def dump(self, data, file):
+        if msgpack is None:
+            raise Exception("the msgpack package is required for '.msgpack' files")
+        msgpack.pack(data, file)
+
+    def load(self, file) -> Any:
+        if msgpack is None:
+            raise Exception("the msgpack package is required for '.msgpack' files")
+        return msgpack.unpack(file)
+
+
+codecs: Dict[str, Codec] = {
+    ".json": JsonCodec(),
+    ".yaml": YamlCodec(),
+    ".msgpack": MsgpackCodec(),
+}
+
+
+def register_codec(file_extension: str, codec: Codec):
+    """Makes 'codec' handle files with the given extension (including the dot)."""
+    codecs[file_extension] = codec
+
+
+def get_codec(path: str) -> Codec:
+    _, file_extension = os.path.splitext(path)
+    if file_extension not in codecs:
+        endings = ", ".join(f"'{ending[1:]}'" for ending in codecs)
+        raise Exception(f"wrong format. file needs to have one of the file endings {endings}.")
+    return codecs[file_extension]
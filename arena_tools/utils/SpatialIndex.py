@@ -0,0 +1,116 @@
+"""
+Spatial index over points in the plane, independent of Qt.
+The editors use it to look up the agents, waypoints and zone vertices near a position
+without going through all items of a scene.
+"""
+import math
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class SpatialHashGrid:
+    """
+    A uniform grid of square cells, each holding the keys of the points inside it.
+    Inserting, moving and removing a point only touches its old and new cell, and
+    queries only look at the cells overlapping the queried area. The cell size should
+    be in the order of the usual query radius.
+    """
+
+    def __init__(self, cell_size: float = 1.0):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.positions: Dict[Hashable, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.positions
+
+    def cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, key: Hashable, x: float, y: float):
+        """Adds a point or moves it if 'key' is already in the grid."""
+        if key in self.positions:
+            self.move(key, x, y)
+            return
+        self.positions[key] = (x, y)
+        self.cells.setdefault(self.cell(x, y), set()).add(key)
+
+    def move(self, key: Hashable, x: float, y: float):
+        old_cell = self.cell(*self.positions[key])
+        new_cell = self.cell(x, y)
+        self.positions[key] = (x, y)
+        if old_cell == new_cell:
+            return
+        self.discard_from_cell(old_cell, key)
+        self.cells.setdefault(new_cell, set()).add(key)
+
+    def remove(self, key: Hashable):
+        """Removes a point, does nothing if 'key' is not in the grid."""
+        position = self.positions.pop(key, None)
+        if position is not None:
+            self.discard_from_cell(self.cell(*position), key)
+
+    def discard_from_cell(self, cell: Tuple[int, int], key: Hashable):
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+
+    def clear(self):
+        self.cells = {}
+        self.positions = {}
+
+    def cells_in_rect(self, x_min: float, y_min: float, x_max: float, y_max: float):
+        """Yields the key sets of the occupied cells overlapping the rectangle."""
+        column_min, row_min = self.cell(x_min, y_min)
+        column_max, row_max = self.cell(x_max, y_max)
+        num_cells = (column_max - column_min + 1) * (row_max - row_min + 1)
+        if num_cells > len(self.cells):
+            # large rectangle, only look at the occupied cells
+            for (column, row), keys in self.cells.items():
+                if column_min <= column <= column_max and row_min <= row <= row_max:
+                    yield keys
+            return
+        for column in range(column_min, column_max + 1):
+            for row in range(row_min, row_max + 1):
+                keys = self.cells.get((column, row))
+                if keys is not None:
+                    yield keys
+
+    def query_rect(self, x_min: float, y_min: float, x_max: float, y_max: float) -> List[Hashable]:
+        """Returns the keys of all points inside the rectangle (borders included)."""
+        result = []
+        for keys in self.cells_in_rect(x_min, y_min, x_max, y_max):
+            for key in keys:
+                x, y = self.positions[key]
+                if x_min <= x <= x_max and y_min <= y <= y_max:
+                    result.append(key)
+        return result
+
+    def nearest(
+        self, x: float, y: float, max_distance: float, accept: Callable[[Hashable], bool] = None
+    ) -> Optional[Hashable]:
+        """
+        Returns the key of the point closest to (x, y) that is at most 'max_distance' away,
+        or None if there is no such point.
+            Parameters:
+                accept (callable): optional filter, only keys for which it returns True
+                    are considered
+        """
+        best_key = None
+        best_distance = max_distance * max_distance
+        cells = self.cells_in_rect(
+            x - max_distance, y - max_distance, x + max_distance, y + max_distance
+        )
+        for keys in cells:
+            for key in keys:
+                key_x, key_y = self.positions[key]
+                distance = (key_x - x) ** 2 + (key_y - y) ** 2
+                if distance <= best_distance and (accept is None or accept(key)):
+                    best_key = key
+                    best_distance = distance
+        return best_key
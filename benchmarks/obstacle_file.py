@@ -0,0 +1,109 @@
+"""
+Benchmark of the map to obstacle conversion used by createObstacleFile.
+
+Compares the vectorized scenario_from_map against the original per-pixel loop on a
+synthetic occupancy map and checks that both produce the same scenario. Also reports
+the obstacle count when the walls are merged into segments.
+Run with:
+    python -m benchmarks.obstacle_file [size]
+"""
+import sys
+import time
+import numpy as np
+import xml.etree.ElementTree as xml
+
+from arena_tools.utils.ObstacleFile import add_pixel_obstacle, scenario_from_map
+
+
+def legacy_scenario_from_map(map_image, map_metadata, use_map_origin=False):
+    """The original per-pixel implementation of scenario_from_map."""
+
+    def get_window(image, x, y):
+        sz = image.shape
+        x_min = np.maximum(0, x - 1)
+        x_max = np.minimum(sz[0], x + 2)
+        y_min = np.maximum(0, y - 1)
+        y_max = np.minimum(sz[1], y + 2)
+        return image[x_min:x_max, y_min:y_max]
+
+    resolution = map_metadata["resolution"]
+    negate = map_metadata["negate"]
+    free_thresh = map_metadata["free_thresh"] * 255
+    origin = map_metadata["origin"] if use_map_origin else [0.0, 0.0, 0.0]
+
+    if ~negate:
+        map_binary = 255 - map_image < free_thresh
+    else:
+        map_binary = map_image < free_thresh
+
+    scenario = xml.Element("scenario")
+
+    sz = map_binary.shape
+    map_walls = np.zeros(sz, dtype=bool)
+
+    x_free = np.nonzero(np.sum(map_binary, axis=1))[0]
+    x_min = np.maximum(0, x_free[0] - 1)
+    x_max = np.minimum(sz[0], x_free[-1] + 2)
+    y_free = np.nonzero(np.sum(map_binary, axis=0))[0]
+    y_min = np.maximum(0, y_free[0] - 1)
+    y_max = np.minimum(sz[1], y_free[-1] + 2)
+
+    for x in range(x_min, x_max):
+        for y in range(y_min, y_max):
+            is_free = map_binary[x, y]
+            window = get_window(map_binary, x, y)
+            if ~is_free.any() and np.any(window) and np.any(~window):
+                world_x = origin[0] + y * resolution
+                world_y = origin[1] - (x - sz[0]) * resolution
+
+                add_pixel_obstacle(scenario, world_x, world_y, resolution)
+                map_walls[x, y] = True
+
+    return scenario, map_walls
+
+
+def synthetic_map(size: int, seed: int = 0) -> np.ndarray:
+    """A square map with an outer wall, random rectangular rooms and unknown space."""
+    rng = np.random.default_rng(seed)
+    image = np.full((size, size), 205, dtype=np.uint8)  # unknown
+    image[size // 10:-size // 10, size // 10:-size // 10] = 254  # free
+    for _ in range(size // 20):
+        x, y = rng.integers(0, size, 2)
+        w, h = rng.integers(2, max(3, size // 10), 2)
+        image[x:x + w, y:y + h] = 0  # occupied
+    return image
+
+
+def main(size: int = 400):
+    map_image = synthetic_map(size)
+    map_metadata = {
+        "resolution": 0.05,
+        "negate": 0,
+        "free_thresh": 0.196,
+        "origin": [-3.0, -2.5, 0.0],
+    }
+
+    start = time.perf_counter()
+    legacy_scenario, legacy_walls = legacy_scenario_from_map(map_image, map_metadata, True)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scenario, walls = scenario_from_map(map_image, map_metadata, True)
+    vectorized_time = time.perf_counter() - start
+
+    assert np.array_equal(legacy_walls, walls)
+    assert xml.tostring(legacy_scenario) == xml.tostring(scenario)
+
+    start = time.perf_counter()
+    merged_scenario, _ = scenario_from_map(map_image, map_metadata, True, merge_walls=True)
+    merged_time = time.perf_counter() - start
+
+    print(f"map size:    {size}x{size}, {int(walls.sum())} obstacles")
+    print(f"legacy:      {legacy_time:.3f} s")
+    print(f"vectorized:  {vectorized_time:.3f} s")
+    print(f"speedup:     {legacy_time / vectorized_time:.1f}x")
+    print(f"merged:      {merged_time:.3f} s, {len(merged_scenario)} obstacles")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,107 @@
+"""
+Benchmark of opening large scenarios in the scenario editor.
+
+Compares ArenaScenarioEditor.loadArenaScenario against the original implementation,
+which removed and recreated every agent one by one and reloaded the map on every open.
+Requires PyQt5 and arena_simulation_setup, uses the offscreen platform unless
+QT_QPA_PLATFORM is set.
+Run with:
+    python -m benchmarks.scenario_loading [number of pedestrians]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# the platform has to be set before Qt is imported
+from PyQt5 import QtWidgets  # noqa: E402
+
+from arena_tools.ScenarioEditor.ArenaScenarioEditor import ArenaScenarioEditor  # noqa: E402
+from arena_tools.ScenarioEditor.Robot.Robot import Robot  # noqa: E402
+from arena_tools.utils.QtExtensions import MapImageLoader  # noqa: E402
+from benchmarks.scenario_serialization import synthetic_scenario  # noqa: E402
+
+
+def legacy_update_widgets(editor: ArenaScenarioEditor):
+    """The original implementation of updateWidgetsFromArenaScenario."""
+    for w in editor.getPedestrianAgentRows():
+        w.remove()
+    for agent in editor.arenaScenario.pedestrianAgents:
+        editor.addPedestrianAgentRow(agent)
+    for w in editor.getRobotAgentRows():
+        w.remove()
+    for agent in editor.arenaScenario.robotAgents:
+        editor.addRobotAgentRow(agent)
+    editor.mapData = None
+    editor.setMap(editor.arenaScenario.mapPath)
+
+
+def write_map(tmp_dir: str, size: int = 2000) -> str:
+    image = np.full((size, size), 254, dtype=np.uint8)
+    image[[0, -1], :] = 0
+    image[:, [0, -1]] = 0
+    with open(os.path.join(tmp_dir, "map.pgm"), "wb") as f:
+        f.write(f"P5\n{size} {size}\n255\n".encode())
+        f.write(image.tobytes())
+    path = os.path.join(tmp_dir, "map.yaml")
+    with open(path, "w") as f:
+        f.write("image: map.pgm\nresolution: 0.05\norigin: [-50.0, -50.0, 0.0]\n")
+    return path
+
+
+def open_scenario(
+    app: QtWidgets.QApplication, editor: ArenaScenarioEditor, path: str, legacy: bool
+) -> float:
+    start = time.perf_counter()
+    if legacy:
+        editor.currentSavePath = path
+        editor.arenaScenario.loadFromFile(path)
+        legacy_update_widgets(editor)
+    else:
+        editor.loadArenaScenario(path)
+    # include the deferred layout and deletion work
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def wait_for_map(app: QtWidgets.QApplication):
+    # decoding the map in the background would slow down the timed part
+    MapImageLoader.threadPool().waitForDone()
+    app.processEvents()
+
+
+def main(num_pedestrians: int = 1000, num_robots: int = 10):
+    app = QtWidgets.QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_path = write_map(tmp_dir)
+        scenario = synthetic_scenario(num_pedestrians)
+        for i in range(num_robots):
+            scenario.robotAgents.append(Robot(f"Robot {i}"))
+        scenario.mapPath = map_path
+        path = os.path.join(tmp_dir, "scenario.json")
+        scenario.path = path
+        scenario.saveToFile()
+
+        print(f"{num_pedestrians} pedestrians, {num_robots} robots")
+        for name, legacy in [("old", True), ("new", False)]:
+            editor = ArenaScenarioEditor()
+            # do not open the world selection dialog
+            editor.show_select_world_dialog = lambda *args, **kwargs: None
+            editor.show()
+            editor.setMap(map_path)
+            wait_for_map(app)
+            first = open_scenario(app, editor, path, legacy)
+            # the old implementation loads the map again
+            wait_for_map(app)
+            reopen = open_scenario(app, editor, path, legacy)
+            print(f"{name:4} open {first:7.3f} s   reopen {reopen:7.3f} s")
+            editor.close()
+            editor.deleteLater()
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
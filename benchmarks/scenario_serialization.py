@@ -0,0 +1,85 @@
+"""
+Benchmark of saving and loading large scenarios with the codecs of
+arena_tools.utils.Serialization.
+Run with:
+    python -m benchmarks.scenario_serialization [number of pedestrians]
+"""
+import os
+import sys
+import time
+import tempfile
+import json
+import yaml
+import numpy as np
+
+from arena_tools.ScenarioEditor.ArenaScenario import ArenaScenario
+from arena_tools.ScenarioEditor.Pedestrian.Pedestrian import Pedestrian
+from arena_tools.utils.Serialization import codecs
+
+
+def synthetic_scenario(
+    num_pedestrians: int, num_waypoints: int = 10, seed: int = 0
+) -> ArenaScenario:
+    rng = np.random.default_rng(seed)
+    scenario = ArenaScenario()
+    for i in range(num_pedestrians):
+        agent = Pedestrian(f"Pedestrian {i}")
+        agent.id = i
+        agent.pos = rng.uniform(-50, 50, 3)
+        agent.waypoints = list(rng.uniform(-50, 50, (num_waypoints, 3)))
+        agent.addCustomProperty("vmax", float(rng.uniform(0.5, 1.5)))
+        scenario.pedestrianAgents.append(agent)
+    return scenario
+
+
+def main(num_pedestrians: int = 5000):
+    scenario = synthetic_scenario(num_pedestrians)
+    print(f"{num_pedestrians} pedestrians")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # the implementation before the codecs: stdlib json and pure Python PyYAML
+        data = scenario.toDict()
+        for name, dump, load in [
+            ("json", lambda f: json.dump(data, f, indent=4), json.load),
+            ("yaml", lambda f: yaml.dump(data, f, default_flow_style=None), yaml.safe_load),
+        ]:
+            path = os.path.join(tmp_dir, "baseline." + name)
+            start = time.perf_counter()
+            with open(path, "w") as f:
+                dump(f)
+            save_time = time.perf_counter() - start
+            start = time.perf_counter()
+            with open(path) as f:
+                load(f)
+            load_time = time.perf_counter() - start
+            size = os.path.getsize(path) / 1024**2
+            print(
+                f"{name + ' (old)':12} save {save_time:6.3f} s   "
+                f"load {load_time:6.3f} s   {size:6.2f} MiB"
+            )
+
+        for file_extension in codecs:
+            path = os.path.join(tmp_dir, "scenario" + file_extension)
+            try:
+                start = time.perf_counter()
+                scenario.path = path
+                scenario.saveToFile()
+                save_time = time.perf_counter() - start
+            except Exception as e:
+                print(f"{file_extension[1:]:12} skipped ({e})")
+                continue
+
+            loaded = ArenaScenario()
+            start = time.perf_counter()
+            loaded.loadFromFile(path)
+            load_time = time.perf_counter() - start
+
+            assert loaded.pedestrianAgents == scenario.pedestrianAgents
+            size = os.path.getsize(path) / 1024**2
+            print(
+                f"{file_extension[1:]:12} save {save_time:6.3f} s   "
+                f"load {load_time:6.3f} s   {size:6.2f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
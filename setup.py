@@ -25,7 +25,8 @@ setup(
     entry_points={
         'console_scripts': [
             'zones_editor = arena_tools.ZonesEditor.__main__:main',
-            'scenario_editor = arena_tools.ScenarioEditor.__main__:main'
+            'scenario_editor = arena_tools.ScenarioEditor.__main__:main',
+            'obstacle_file = arena_tools.utils.ObstacleFile:main'
         ],
     },
 )
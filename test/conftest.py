@@ -0,0 +1,4 @@
+import os
+
+# the Qt tests run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
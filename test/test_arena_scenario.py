@@ -0,0 +1,159 @@
+import copy
+
+import numpy as np
+
+from arena_tools.ScenarioEditor.ArenaScenario import ArenaScenario, matchByName
+from arena_tools.ScenarioEditor.Pedestrian.Pedestrian import Pedestrian
+from arena_tools.ScenarioEditor.Robot.Robot import Robot
+
+
+def pedestrian_dict(name, x, waypoints=2, **custom_properties):
+    d = {
+        'name': name,
+        'id': 0,
+        'pos': [x, 0.0, 0.0],
+        'type': 'adult',
+        'model': 'actor1',
+        'waypoints': [[x + i, 1.0, 0.0] for i in range(waypoints)],
+    }
+    d.update(custom_properties)
+    return d
+
+
+def scenario_dict():
+    return {
+        'robots': [{'start': [0.0, 0.0, 0.7], 'goal': [5.0, 5.0, 0.7]}],
+        'obstacles': {
+            'dynamic': [
+                pedestrian_dict('Pedestrian 1', 1.0),
+                pedestrian_dict('Pedestrian 2', 2.0, vmax=1.0),
+                pedestrian_dict('Pedestrian 3', 3.0),
+            ],
+        },
+    }
+
+
+def load_scenarios(change):
+    '''Returns a scenario and a copy that 'change' has been applied to.'''
+    d = scenario_dict()
+    other = copy.deepcopy(d)
+    change(other)
+    return ArenaScenario.fromDict(d), ArenaScenario.fromDict(other)
+
+
+def names(agents):
+    return [agent.name for agent in agents]
+
+
+def changed_names(agent_diff):
+    return [(a.name, b.name) for a, b in agent_diff.changed]
+
+
+def test_identical_scenarios():
+    scenario, other = load_scenarios(lambda d: None)
+    diff = scenario.diff(other)
+
+    assert not diff
+    assert not diff.pedestrianAgents and not diff.robotAgents
+    assert not diff.mapChanged
+
+
+def test_identical_agents_as_objects():
+    # agents added in the editor are Pedestrian objects instead of views of the store
+    scenario, other = load_scenarios(lambda d: None)
+    other.pedestrianAgents = [Pedestrian.fromDict(a.toDict()) for a in other.pedestrianAgents]
+
+    assert not scenario.diff(other)
+
+
+def test_moved_agent():
+    def change(d):
+        d['obstacles']['dynamic'][1]['pos'][0] += 0.5
+
+    scenario, other = load_scenarios(change)
+    diff = scenario.diff(other)
+
+    assert diff
+    assert changed_names(diff.pedestrianAgents) == [('Pedestrian 2', 'Pedestrian 2')]
+    assert diff.pedestrianAgents.added == [] and diff.pedestrianAgents.removed == []
+    assert not diff.robotAgents
+
+
+def test_moved_waypoint():
+    def change(d):
+        d['obstacles']['dynamic'][2]['waypoints'][1][1] = -1.0
+
+    scenario, other = load_scenarios(change)
+
+    changed = changed_names(scenario.diff(other).pedestrianAgents)
+    assert changed == [('Pedestrian 3', 'Pedestrian 3')]
+
+
+def test_added_and_removed_agents():
+    def change(d):
+        agents = d['obstacles']['dynamic']
+        del agents[0]
+        agents.append(pedestrian_dict('Pedestrian 4', 4.0))
+
+    scenario, other = load_scenarios(change)
+    diff = scenario.diff(other).pedestrianAgents
+
+    assert names(diff.removed) == ['Pedestrian 1']
+    assert names(diff.added) == ['Pedestrian 4']
+    assert diff.changed == []
+
+
+def test_waypoint_count_changed():
+    def change(d):
+        d['obstacles']['dynamic'][0]['waypoints'].append([9.0, 9.0, 0.0])
+
+    scenario, other = load_scenarios(change)
+
+    changed = changed_names(scenario.diff(other).pedestrianAgents)
+    assert changed == [('Pedestrian 1', 'Pedestrian 1')]
+
+
+def test_waypoints_assigned_in_editor():
+    scenario, other = load_scenarios(lambda d: None)
+    other.pedestrianAgents[2].waypoints = [np.array([0.0, 0.0, 0.0])]
+
+    changed = changed_names(scenario.diff(other).pedestrianAgents)
+    assert changed == [('Pedestrian 3', 'Pedestrian 3')]
+
+
+def test_custom_property_changed():
+    def change(d):
+        agents = d['obstacles']['dynamic']
+        agents[1]['vmax'] = 2.0
+        agents[2]['group'] = 1
+
+    scenario, other = load_scenarios(change)
+
+    assert changed_names(scenario.diff(other).pedestrianAgents) == [
+        ('Pedestrian 2', 'Pedestrian 2'),
+        ('Pedestrian 3', 'Pedestrian 3'),
+    ]
+
+
+def test_robot_and_map_changed():
+    scenario, other = load_scenarios(lambda d: None)
+    other.robotAgents[0].goal = np.array([5.0, 6.0, 0.7])
+    other.robotAgents.append(Robot('Robot 2'))
+    other.mapPath = 'other_map.yaml'
+    diff = scenario.diff(other)
+
+    assert diff.mapChanged
+    assert changed_names(diff.robotAgents) == [('Robot', 'Robot')]
+    assert names(diff.robotAgents.added) == ['Robot 2']
+    assert not diff.pedestrianAgents
+
+
+def test_match_by_name_with_duplicates():
+    agents = [Pedestrian(name) for name in ['a', 'b', 'a', 'c']]
+    other_agents = [Pedestrian(name) for name in ['a', 'd', 'b', 'a', 'a']]
+
+    indices, other_indices, removed, added = matchByName(agents, other_agents)
+
+    assert list(zip(indices, other_indices)) == [(0, 0), (1, 2), (2, 3)]
+    assert removed == [3]
+    assert added == [1, 4]
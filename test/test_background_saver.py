@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+pytest.importorskip('pytestqt')
+
+from arena_tools.utils.QtExtensions import BackgroundSaver, SaveStatusLabel  # noqa: E402
+from arena_tools.utils.Serialization import write_atomic  # noqa: E402
+
+
+class SaveRecorder:
+    '''Records the signals of a BackgroundSaver.'''
+
+    def __init__(self, saver):
+        self.signals = []
+        saver.saveStarted.connect(lambda path: self.signals.append(('started', path)))
+        saver.saveFinished.connect(lambda path: self.signals.append(('finished', path)))
+        saver.saveFailed.connect(lambda path, error: self.signals.append(('failed', path, error)))
+
+
+def write_text(path, text, release=None):
+    '''Returns a save function that writes 'text', after 'release' is set if given.'''
+    def save():
+        if release is not None:
+            release.wait(5)
+        if text is None:
+            raise OSError('disk full')
+        write_atomic(path, lambda file: file.write(text))
+    return save
+
+
+@pytest.fixture
+def saver(qtbot):
+    saver = BackgroundSaver()
+    yield saver
+    saver.shutdown()
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_failed_save_followed_by_queued_save(qtbot, saver, tmp_path):
+    path = str(tmp_path / 'zones.yaml')
+    recorder = SaveRecorder(saver)
+    release = threading.Event()
+
+    saver.save(path, write_text(path, None, release))
+    saver.save(path, write_text(path, 'second'))
+    assert not saver.isIdle()
+    release.set()
+    qtbot.waitUntil(saver.isIdle)
+
+    assert read(path) == 'second'
+    assert recorder.signals == [
+        ('started', path),
+        ('failed', path, 'disk full'),
+        ('started', path),
+        ('finished', path),
+    ]
+
+
+def test_failed_queued_save_keeps_previous_file(qtbot, saver, tmp_path):
+    path = str(tmp_path / 'zones.yaml')
+    recorder = SaveRecorder(saver)
+    release = threading.Event()
+
+    saver.save(path, write_text(path, 'first', release))
+    saver.save(path, write_text(path, None))
+    release.set()
+    qtbot.waitUntil(saver.isIdle)
+
+    assert read(path) == 'first'
+    signals = [signal[0] for signal in recorder.signals]
+    assert signals == ['started', 'finished', 'started', 'failed']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['zones.yaml']
+
+
+def test_only_last_queued_save_runs(qtbot, saver, tmp_path):
+    path = str(tmp_path / 'zones.yaml')
+    recorder = SaveRecorder(saver)
+    release = threading.Event()
+
+    saver.save(path, write_text(path, 'first', release))
+    for text in ['second', 'third', 'fourth']:
+        saver.save(path, write_text(path, text))
+    release.set()
+    qtbot.waitUntil(saver.isIdle)
+
+    assert read(path) == 'fourth'
+    signals = [signal[0] for signal in recorder.signals]
+    assert signals == ['started', 'finished', 'started', 'finished']
+
+
+def test_shutdown_runs_pending_save(qtbot, tmp_path):
+    path = str(tmp_path / 'zones.yaml')
+    saver = BackgroundSaver()
+    release = threading.Event()
+
+    saver.save(path, write_text(path, 'first', release))
+    saver.save(path, write_text(path, 'second'))
+    release.set()
+    saver.shutdown()
+
+    assert read(path) == 'second'
+
+
+def test_status_label(qtbot, saver, tmp_path):
+    path = str(tmp_path / 'zones.yaml')
+    label = SaveStatusLabel(saver)
+    qtbot.addWidget(label)
+    label.setAutosave(True)
+
+    saver.save(path, write_text(path, None))
+    qtbot.waitUntil(saver.isIdle)
+    assert label.text() == 'Save failed (autosave)'
+    assert label.toolTip() == f'{path}: disk full'
+
+    saver.save(path, write_text(path, 'saved'))
+    qtbot.waitUntil(saver.isIdle)
+    assert label.text().startswith('Saved') and label.text().endswith('(autosave)')
+    assert label.toolTip() == path
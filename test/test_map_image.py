@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from arena_tools.utils.MapImage import load_map_image, read_image_shape, read_pgm, read_pgm_header
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_header_with_comments(tmp_path):
+    image = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    header = b'P5\n# CREATOR: map_saver\n4 # width\n3\n# maxval\n255\n'
+    path = write_file(tmp_path / 'map.pgm', header + image.tobytes())
+
+    assert read_pgm_header(path) == (4, 3, 255, len(header))
+    for mmap in [True, False]:
+        np.testing.assert_array_equal(read_pgm(path, mmap), image)
+
+
+def test_matches_scikit_image(tmp_path):
+    io = pytest.importorskip('skimage.io')
+    image = np.random.default_rng(0).integers(0, 256, (20, 30), dtype=np.uint8)
+    path = write_file(tmp_path / 'map.pgm', b'P5 30 20 255\n' + image.tobytes())
+
+    np.testing.assert_array_equal(load_map_image(path), io.imread(path))
+
+
+def test_16_bit_big_endian(tmp_path):
+    image = np.array([[0, 1, 256], [1000, 4095, 65535]], dtype='>u2')
+    path = write_file(tmp_path / 'map.pgm', b'P5\n3 2\n65535\n' + image.tobytes())
+
+    for mmap in [True, False]:
+        result = read_pgm(path, mmap)
+        assert result.shape == (2, 3)
+        np.testing.assert_array_equal(result.astype(np.uint32), image.astype(np.uint32))
+
+
+def test_truncated_file(tmp_path):
+    path = write_file(tmp_path / 'map.pgm', b'P5\n4 3\n255\n' + bytes(11))
+
+    with pytest.raises(ValueError, match='truncated'):
+        read_pgm(path)
+
+
+def test_incomplete_header(tmp_path):
+    path = write_file(tmp_path / 'map.pgm', b'P5\n4 3')
+
+    with pytest.raises(ValueError, match='incomplete'):
+        read_pgm_header(path)
+
+
+def test_not_a_binary_pgm(tmp_path):
+    path = write_file(tmp_path / 'map.pgm', b'P2\n2 1\n255\n0 255\n')
+
+    assert read_pgm_header(path) is None
+    with pytest.raises(ValueError):
+        read_pgm(path)
+
+
+def test_image_shape_from_header(tmp_path):
+    pgm = write_file(tmp_path / 'map.pgm', b'P5\n# comment\n300 200\n255\n')
+    # only the header of a PNG is read
+    png = write_file(
+        tmp_path / 'map.png',
+        b'\x89PNG\r\n\x1a\n' + bytes([0, 0, 0, 13]) + b'IHDR'
+        + (640).to_bytes(4, 'big') + (480).to_bytes(4, 'big')
+    )
+
+    assert read_image_shape(pgm) == (200, 300)
+    assert read_image_shape(png) == (480, 640)
+
+
+def test_image_shape_of_other_formats(tmp_path):
+    io = pytest.importorskip('skimage.io')
+    path = str(tmp_path / 'map.bmp')
+    io.imsave(path, np.arange(35, dtype=np.uint8).reshape(5, 7) * 7)
+
+    assert read_image_shape(path) == (5, 7)
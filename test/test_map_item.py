@@ -0,0 +1,223 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pytestqt')
+
+from PyQt5 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+from arena_tools.utils.QtExtensions import (  # noqa: E402
+    ArenaMapItem,
+    ArenaQGraphicsScene,
+    ArenaQGraphicsView,
+    MapImageLoader,
+    MapTilePyramid,
+)
+
+
+def write_pgm(path, image):
+    with open(path, 'wb') as f:
+        f.write(f'P5\n{image.shape[1]} {image.shape[0]}\n255\n'.encode())
+        f.write(image.tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def item(qtbot):
+    scene = ArenaQGraphicsScene()
+    item = ArenaMapItem()
+    scene.addItem(item)
+    yield item
+    MapImageLoader.threadPool().waitForDone()
+
+
+def test_load_bad_path(qtbot, item, tmp_path):
+    path = str(tmp_path / 'missing.pgm')
+
+    with qtbot.waitSignal(item.loadFailed) as blocker:
+        item.load(path, 0.05, [0.0, 0.0, 0.0])
+
+    assert blocker.args[0] == path
+    assert blocker.args[1] != ''
+    assert item.loadError == blocker.args[1]
+    assert item.pyramid is None
+    assert item.boundingRect().isEmpty()
+
+
+def test_load_invalid_image(qtbot, item, tmp_path):
+    path = tmp_path / 'map.pgm'
+    path.write_bytes(b'P5\n100 100\n255\n' + bytes(10))
+
+    with qtbot.waitSignal(item.loadFailed):
+        item.load(str(path), 0.05, [0.0, 0.0, 0.0])
+
+    assert item.loadError != ''
+
+
+def test_load_after_failure(qtbot, item, tmp_path):
+    with qtbot.waitSignal(item.loadFailed):
+        item.load(str(tmp_path / 'missing.pgm'), 0.05, [0.0, 0.0, 0.0])
+
+    image = np.random.default_rng(0).integers(0, 256, (30, 40), dtype=np.uint8)
+    path = write_pgm(tmp_path / 'map.pgm', image)
+    with qtbot.assertNotEmitted(item.loadFailed):
+        item.load(path, 0.5, [1.0, 2.0, 0.0])
+        qtbot.waitUntil(lambda: item.pyramid is not None)
+
+    assert item.loadError == ''
+    assert (item.pyramid.width, item.pyramid.height) == (40, 30)
+    assert item.sceneBoundingRect().getRect() == (1.0, 2.0, 20.0, 15.0)
+
+
+def test_failure_of_earlier_request_is_ignored(qtbot, item, tmp_path):
+    image = np.zeros((10, 10), dtype=np.uint8)
+    path = write_pgm(tmp_path / 'map.pgm', image)
+
+    with qtbot.assertNotEmitted(item.loadFailed):
+        item.load(str(tmp_path / 'missing.pgm'), 0.05, [0.0, 0.0, 0.0])
+        item.load(path, 0.05, [0.0, 0.0, 0.0])
+        qtbot.waitUntil(lambda: item.pyramid is not None)
+        # let the result of the first request arrive
+        MapImageLoader.threadPool().waitForDone()
+        qtbot.wait(10)
+
+    assert item.loadError == ''
+
+
+def test_tile_pyramid_levels():
+    image = QtGui.QImage(1100, 700, QtGui.QImage.Format_Grayscale8)
+    image.fill(128)
+    pyramid = MapTilePyramid(image, 512)
+
+    assert [(len(tiles), len(tiles[0])) for tiles in pyramid.levels] == [(2, 3), (1, 2), (1, 1)]
+    assert [pyramid.levels[0][1][2].width(), pyramid.levels[0][1][2].height()] == [76, 188]
+    assert pyramid.scales[1] == (2.0, 2.0)
+    assert pyramid.scales[2] == (1100 / 275, 700 / 175)
+    levels = [pyramid.levelForScale(scale) for scale in [2.0, 1.0, 0.6, 0.5, 0.3, 0.01]]
+    assert levels == [0, 0, 0, 1, 1, 2]
+
+
+def render_map(scene, item, width, height):
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(255, 0, 0))
+    painter = QtGui.QPainter(image)
+    scene.render(painter, QtCore.QRectF(0, 0, width, height), item.sceneBoundingRect())
+    painter.end()
+    pointer = image.constBits()
+    pointer.setsize(image.sizeInBytes())
+    pixels = np.frombuffer(pointer, dtype=np.uint8).reshape(height, image.bytesPerLine() // 4, 4)
+    return pixels[:, :width, :3].copy()
+
+
+def test_render_tiles(qtbot, tmp_path):
+    image = np.random.default_rng(1).integers(0, 256, (150, 200), dtype=np.uint8)
+    path = write_pgm(tmp_path / 'map.pgm', image)
+    scene = ArenaQGraphicsScene()
+    item = ArenaMapItem()
+    item.TILE_SIZE = 64
+    scene.addItem(item)
+
+    item.load(path, 1.0, [0.0, 0.0, 0.0])
+    qtbot.waitUntil(lambda: item.pyramid is not None)
+    assert len(item.pyramid.levels[0]) == 3 and len(item.pyramid.levels[0][0]) == 4
+
+    # the image is flipped, so that its first row is at the top of a view with the y axis up
+    pixels = render_map(scene, item, 200, 150)
+    np.testing.assert_array_equal(pixels[:, :, 0], image[::-1])
+    np.testing.assert_array_equal(pixels[:, :, 1], image[::-1])
+
+
+def test_preview_of_large_image(qtbot, tmp_path):
+    image = np.zeros((100, 60), dtype=np.uint8)
+    image[:50] = 255
+    path = write_pgm(tmp_path / 'map.pgm', image)
+    item = ArenaMapItem()
+    item.PREVIEW_SIZE = 25
+
+    # the preview arrives before the full image
+    with qtbot.waitSignal(item.loader.previewLoaded) as blocker:
+        item.load(path, 0.5, [0.0, 0.0, 0.0])
+    requestId, preview, stepX, stepY = blocker.args
+    qtbot.waitUntil(lambda: item.pyramid is not None)
+
+    assert requestId == item.requestId
+    assert (preview.width(), preview.height()) == (15, 25)
+    assert (stepX, stepY) == (4.0, 4.0)
+    # flipped like the full image
+    assert QtGui.qGray(preview.pixel(0, 0)) == 0
+    assert QtGui.qGray(preview.pixel(0, 24)) == 255
+    assert item.preview is None
+    assert item.boundingRect().size() == QtCore.QSizeF(60, 100)
+
+
+def load_map(qtbot, scene, tmp_path, image):
+    item = ArenaMapItem()
+    scene.addItem(item)
+    item.load(write_pgm(tmp_path / 'map.pgm', image), 1.0, [0.0, 0.0, 0.0])
+    qtbot.waitUntil(lambda: item.pyramid is not None)
+    return item
+
+
+@pytest.mark.parametrize('sceneType', [QtWidgets.QGraphicsScene, ArenaQGraphicsScene])
+def test_map_is_painted_once(qtbot, tmp_path, sceneType):
+    # in an ArenaQGraphicsScene the map is painted as background instead of as an item
+    image = np.full((20, 30), 100, dtype=np.uint8)
+    scene = sceneType()
+    item = load_map(qtbot, scene, tmp_path, image)
+    painted = []
+    paintMap = item.paintMap
+    item.paintMap = lambda *args: painted.append(True) or paintMap(*args)
+
+    pixels = render_map(scene, item, 30, 20)
+
+    assert len(painted) == 1
+    assert (pixels == 100).all()
+
+
+def test_removed_map_is_not_painted(qtbot, tmp_path):
+    scene = ArenaQGraphicsScene()
+    item = load_map(qtbot, scene, tmp_path, np.zeros((20, 30), dtype=np.uint8))
+    rect = item.sceneBoundingRect()
+
+    scene.removeItem(item)
+    image = QtGui.QImage(30, 20, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(255, 255, 255))
+    painter = QtGui.QPainter(image)
+    scene.render(painter, QtCore.QRectF(0, 0, 30, 20), rect)
+    painter.end()
+
+    assert scene.mapItems == []
+    assert QtGui.qGray(image.pixel(15, 10)) == 255
+
+
+def test_view_update_mode(qtbot):
+    view = ArenaQGraphicsView(ArenaQGraphicsScene())
+    qtbot.addWidget(view)
+    fullUpdate = QtWidgets.QGraphicsView.ViewportUpdateMode.FullViewportUpdate
+    full = ArenaQGraphicsView(ArenaQGraphicsScene(), updateMode=fullUpdate)
+    qtbot.addWidget(full)
+
+    modes = QtWidgets.QGraphicsView.ViewportUpdateMode
+    assert view.viewportUpdateMode() == modes.SmartViewportUpdate
+    assert full.viewportUpdateMode() == modes.FullViewportUpdate
+    assert view.cacheMode() & QtWidgets.QGraphicsView.CacheModeFlag.CacheBackground
+
+
+def test_frame_time_overlay(qtbot):
+    view = ArenaQGraphicsView(ArenaQGraphicsScene())
+    qtbot.addWidget(view)
+    view.resize(200, 150)
+    view.show()
+    qtbot.waitExposed(view)
+
+    view.setFrameTimeOverlay(True)
+    assert view.frameTimeLabel.text() == 'paint: - ms'
+    view.lastFrameTimeUpdate = 0.0
+    view.viewport().update()
+    qtbot.waitUntil(lambda: view.frameTimeLabel.text().endswith('frames'))
+    assert view.frameTimeLabel.text().startswith('paint: ')
+
+    view.setFrameTimeOverlay(False)
+    view.viewport().update()
+    qtbot.wait(10)
+    assert not view.frameTimeLabel.isVisible()
+    assert view.frameTimes == []
@@ -0,0 +1,102 @@
+import os
+import stat
+
+from arena_tools.utils.ObstacleCache import ObstacleFileCache
+
+MAP_METADATA = {
+    'image': 'map.pgm',
+    'resolution': 0.05,
+    'negate': 0,
+    'free_thresh': 0.196,
+    'origin': [-3.0, -2.5, 0.0],
+}
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ObstacleFileCache(str(tmp_path / 'cache'))
+    image = write_file(tmp_path / 'map.pgm', b'P5 1 1 255\n\x00')
+    key = cache.key(image, MAP_METADATA, use_map_origin=False)
+    destination = str(tmp_path / 'obstacles.xml')
+
+    assert not cache.get(key, destination)
+    assert not os.path.exists(destination)
+
+    cache.put(key, write_file(tmp_path / 'source.xml', b'<scenario/>'))
+    assert cache.get(key, destination)
+    with open(destination, 'rb') as f:
+        assert f.read() == b'<scenario/>'
+    # no temporary files are left behind
+    assert os.listdir(cache.cache_dir) == [key + '.xml']
+
+
+def test_key_depends_on_map_and_options(tmp_path):
+    cache = ObstacleFileCache(str(tmp_path / 'cache'))
+    image = write_file(tmp_path / 'map.pgm', b'P5 1 1 255\n\x00')
+    key = cache.key(image, MAP_METADATA, use_map_origin=False)
+
+    assert cache.key(image, dict(MAP_METADATA), use_map_origin=False) == key
+    # fields the obstacles do not depend on
+    assert cache.key(image, dict(MAP_METADATA, image='other.pgm'), use_map_origin=False) == key
+
+    keys = {key, cache.key(image, MAP_METADATA, use_map_origin=True)}
+    changed_values = {
+        'resolution': 0.1, 'negate': 1, 'free_thresh': 0.2, 'origin': [0.0, 0.0, 0.0],
+    }
+    assert set(changed_values) == set(ObstacleFileCache.MAP_FIELDS)
+    for field, value in changed_values.items():
+        keys.add(cache.key(image, dict(MAP_METADATA, **{field: value}), use_map_origin=False))
+
+    write_file(image, b'P5 1 1 255\n\xff')
+    keys.add(cache.key(image, MAP_METADATA, use_map_origin=False))
+    assert len(keys) == 7
+
+
+def test_eviction_of_least_recently_used(tmp_path):
+    cache = ObstacleFileCache(str(tmp_path / 'cache'), max_size=250)
+    source = write_file(tmp_path / 'source.xml', bytes(100))
+    destination = str(tmp_path / 'obstacles.xml')
+
+    cache.put('a', source)
+    cache.put('b', source)
+    os.utime(cache.path('a'), (1, 1))
+    os.utime(cache.path('b'), (2, 2))
+    # reading 'a' marks it as used
+    assert cache.get('a', destination)
+    cache.put('c', source)
+
+    assert sorted(os.listdir(cache.cache_dir)) == ['a.xml', 'c.xml']
+    assert not cache.get('b', destination)
+
+
+def test_entries_honour_umask(tmp_path):
+    cache = ObstacleFileCache(str(tmp_path / 'cache'))
+    source = write_file(tmp_path / 'source.xml', b'<scenario/>')
+    umask = os.umask(0o022)
+    try:
+        cache.put('a', source)
+    finally:
+        os.umask(umask)
+
+    assert stat.S_IMODE(os.stat(cache.path('a')).st_mode) == 0o644
+
+
+def test_errors_are_not_raised(tmp_path, capsys):
+    # a file where the cache directory should be, it cannot be written like a read-only disk
+    cache = ObstacleFileCache(write_file(tmp_path / 'cache', b''))
+    source = write_file(tmp_path / 'source.xml', b'<scenario/>')
+
+    assert not cache.put('a', source)
+    assert 'Could not write obstacle file cache' in capsys.readouterr().err
+    assert not cache.get('a', str(tmp_path / 'obstacles.xml'))
+
+    # an entry that cannot be read
+    cache = ObstacleFileCache(str(tmp_path / 'other_cache'))
+    os.makedirs(cache.path('b'))
+    assert not cache.get('b', str(tmp_path / 'obstacles.xml'))
+    assert 'Could not read cached obstacle file' in capsys.readouterr().err
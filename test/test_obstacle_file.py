@@ -0,0 +1,365 @@
+import os
+import numpy as np
+import pytest
+import xml.etree.ElementTree as xml
+
+from arena_tools.utils.ObstacleFile import (
+    add_obstacle,
+    add_pixel_obstacle,
+    create_obstacle_file,
+    iter_pixel_obstacles,
+    obstacles_from_map,
+    pixel_obstacles,
+    pixel_to_world,
+    scenario_from_map,
+    simplify_polyline,
+    tiled_scenario_fragments,
+    trace_diagonal_chains,
+    wall_mask,
+    wall_runs,
+    wall_segments,
+    write_scenario,
+    write_scenario_fragments,
+    write_xml,
+)
+
+MAP_METADATA = {
+    'resolution': 0.05,
+    'negate': 0,
+    'free_thresh': 0.196,
+    'origin': [-3.0, -2.5, 0.0],
+}
+
+
+def legacy_scenario_from_map(map_image, map_metadata, use_map_origin=False):
+    """Per-pixel implementation of scenario_from_map before it was vectorized."""
+
+    def get_window(image, x, y):
+        sz = image.shape
+        x_min = np.maximum(0, x - 1)
+        x_max = np.minimum(sz[0], x + 2)
+        y_min = np.maximum(0, y - 1)
+        y_max = np.minimum(sz[1], y + 2)
+        return image[x_min:x_max, y_min:y_max]
+
+    resolution = map_metadata['resolution']
+    negate = map_metadata['negate']
+    free_thresh = map_metadata['free_thresh'] * 255
+    origin = map_metadata['origin'] if use_map_origin else [0.0, 0.0, 0.0]
+
+    if ~negate:
+        map_binary = 255 - map_image < free_thresh
+    else:
+        map_binary = map_image < free_thresh
+
+    scenario = xml.Element('scenario')
+
+    sz = map_binary.shape
+    map_walls = np.zeros(sz, dtype=bool)
+
+    x_free = np.nonzero(np.sum(map_binary, axis=1))[0]
+    x_min = np.maximum(0, x_free[0] - 1)
+    x_max = np.minimum(sz[0], x_free[-1] + 2)
+    y_free = np.nonzero(np.sum(map_binary, axis=0))[0]
+    y_min = np.maximum(0, y_free[0] - 1)
+    y_max = np.minimum(sz[1], y_free[-1] + 2)
+
+    for x in range(x_min, x_max):
+        for y in range(y_min, y_max):
+            is_free = map_binary[x, y]
+            window = get_window(map_binary, x, y)
+            if ~is_free.any() and np.any(window) and np.any(~window):
+                world_x = origin[0] + y * resolution
+                world_y = origin[1] - (x - sz[0]) * resolution
+
+                add_pixel_obstacle(scenario, world_x, world_y, resolution)
+                map_walls[x, y] = True
+
+    return scenario, map_walls
+
+
+def synthetic_map(rows, cols, seed=0):
+    """Unknown space around a free area with random occupied rectangles."""
+    rng = np.random.default_rng(seed)
+    image = np.full((rows, cols), 205, dtype=np.uint8)
+    image[rows // 10:-rows // 10, cols // 10:-cols // 10] = 254
+    for _ in range(8):
+        x, y = rng.integers(0, rows), rng.integers(0, cols)
+        w, h = rng.integers(1, 8, 2)
+        image[x:x + w, y:y + h] = 0
+    return image
+
+
+def test_scenario_from_map_matches_per_pixel_loop():
+    for seed, shape in enumerate([(40, 40), (37, 53), (64, 20)]):
+        map_image = synthetic_map(*shape, seed=seed)
+        for use_map_origin in [False, True]:
+            legacy_scenario, legacy_walls = legacy_scenario_from_map(
+                map_image, MAP_METADATA, use_map_origin
+            )
+            scenario, walls = scenario_from_map(map_image, MAP_METADATA, use_map_origin)
+
+            assert np.array_equal(walls, legacy_walls)
+            assert xml.tostring(scenario) == xml.tostring(legacy_scenario)
+
+
+def test_wall_mask_on_image_border():
+    # free pixels on the border only have in-bounds neighbours
+    map_binary = np.zeros((4, 5), dtype=bool)
+    map_binary[0, 0] = True
+    map_binary[3, 4] = True
+
+    expected = np.zeros((4, 5), dtype=bool)
+    expected[:2, :2] = True
+    expected[2:, 3:] = True
+    expected[0, 0] = expected[3, 4] = False
+    assert np.array_equal(wall_mask(map_binary), expected)
+
+
+def test_iter_pixel_obstacles_matches_pixel_obstacles():
+    map_walls = wall_mask(synthetic_map(50, 30) > 250)
+    origin = MAP_METADATA['origin']
+    chunks = list(iter_pixel_obstacles(map_walls, 0.05, origin, chunk_rows=7))
+
+    assert len(chunks) == 8
+    assert np.array_equal(np.concatenate(chunks), pixel_obstacles(map_walls, 0.05, origin))
+
+
+def walls_at(shape, pixels):
+    map_walls = np.zeros(shape, dtype=bool)
+    for pixel in pixels:
+        map_walls[pixel] = True
+    return map_walls
+
+
+def segment(x1, y1, x2, y2, height, resolution=0.05, origin=(0.0, 0.0, 0.0)):
+    """The obstacle between the (fractional) pixel coordinates (x1, y1) and (x2, y2)."""
+    start = pixel_to_world(x1, y1, height, resolution, origin)
+    end = pixel_to_world(x2, y2, height, resolution, origin)
+    return [start[0], start[1], end[0], end[1]]
+
+
+def sorted_rows(array):
+    return array[np.lexsort(array.T[::-1])]
+
+
+def test_wall_runs():
+    map_walls = walls_at((3, 6), [(0, 0), (0, 1), (0, 3), (2, 2), (2, 3), (2, 4), (2, 5)])
+    rows, starts, ends = wall_runs(map_walls)
+
+    assert rows.tolist() == [0, 0, 2]
+    assert starts.tolist() == [0, 3, 2]
+    assert ends.tolist() == [1, 3, 5]
+
+
+def test_horizontal_run():
+    map_walls = walls_at((6, 8), [(2, y) for y in range(1, 5)])
+    obstacles = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0])
+
+    np.testing.assert_allclose(obstacles, [segment(2, 0.5, 2, 4.5, 6)])
+
+
+def test_vertical_run():
+    map_walls = walls_at((6, 8), [(x, 3) for x in range(1, 6)])
+    obstacles = wall_segments(map_walls, 0.05, [1.0, 2.0, 0.0])
+
+    np.testing.assert_allclose(
+        obstacles, [segment(0.5, 3, 5.5, 3, 6, origin=(1.0, 2.0, 0.0))]
+    )
+
+
+def test_l_junction():
+    # the corner pixel belongs to both segments, which meet at its outer edges
+    map_walls = walls_at((7, 7), [(2, y) for y in range(1, 5)] + [(x, 1) for x in range(3, 6)])
+    obstacles = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0])
+
+    expected = np.array([segment(2, 0.5, 2, 4.5, 7), segment(1.5, 1, 5.5, 1, 7)])
+    np.testing.assert_allclose(sorted_rows(obstacles), sorted_rows(expected))
+
+
+def test_diagonal_without_tolerance():
+    map_walls = walls_at((6, 6), [(i, i) for i in range(4)])
+    obstacles = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0])
+
+    np.testing.assert_allclose(obstacles, pixel_obstacles(map_walls, 0.05, [0.0, 0.0, 0.0]))
+
+
+def test_diagonal_with_tolerance():
+    # a straight diagonal becomes a single segment between the outer pixel corners
+    map_walls = walls_at((6, 6), [(i, i) for i in range(4)])
+    obstacles = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0], diagonal_tolerance=0.01)
+
+    np.testing.assert_allclose(obstacles, [segment(-0.5, -0.5, 3.5, 3.5, 6)])
+
+
+def test_diagonal_corner_with_tolerance():
+    # a diagonal that turns keeps its corner if it is further away than the tolerance
+    pixels = [(4, 0), (3, 1), (2, 2), (3, 3), (4, 4)]
+    map_walls = walls_at((6, 6), pixels)
+
+    kept = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0], diagonal_tolerance=0.01)
+    np.testing.assert_allclose(
+        kept, [segment(4.5, -0.5, 2, 2, 6), segment(2, 2, 4.5, 4.5, 6)]
+    )
+
+    # the corner is 2 pixels away from the line through the end points
+    removed = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0], diagonal_tolerance=0.15)
+    np.testing.assert_allclose(removed, [segment(4.5, -0.5, 4.5, 4.5, 6)])
+
+
+def test_single_pixel_island():
+    map_walls = walls_at((5, 5), [(2, 2)])
+    expected = pixel_obstacles(map_walls, 0.05, [0.0, 0.0, 0.0])
+
+    for tolerance in [None, 0.01]:
+        obstacles = wall_segments(map_walls, 0.05, [0.0, 0.0, 0.0], diagonal_tolerance=tolerance)
+        np.testing.assert_allclose(obstacles, expected)
+
+
+def test_trace_diagonal_chains_from_end_points():
+    map_walls = walls_at((5, 5), [(2, 2), (1, 1), (3, 3), (0, 4)])
+    chains = trace_diagonal_chains(map_walls)
+
+    assert sorted(chains) == [[(0, 4)], [(1, 1), (2, 2), (3, 3)]]
+
+
+def test_simplify_polyline():
+    points = np.array([[0, 0], [1, 1], [2, 2], [3, 1], [4, 0]], dtype=float)
+
+    np.testing.assert_array_equal(simplify_polyline(points, 0.5), points[[0, 2, 4]])
+    np.testing.assert_array_equal(simplify_polyline(points, 2.5), points[[0, 4]])
+    np.testing.assert_array_equal(simplify_polyline(points[:2], 0.5), points[:2])
+
+
+def write_legacy_scenario(file_path, obstacles):
+    """Writes a scenario like create_obstacle_file before it was streamed, with minidom."""
+    scenario = xml.Element('scenario')
+    for x1, y1, x2, y2 in obstacles:
+        add_obstacle(scenario, x1, y1, x2, y2)
+    write_xml(scenario, file_path)
+
+
+def parsed_obstacles(file_path):
+    root = xml.parse(file_path).getroot()
+    assert root.tag == 'scenario'
+    assert all(element.tag == 'obstacle' for element in root)
+    return [
+        (element.attrib, {key: float(value) for key, value in element.attrib.items()})
+        for element in root
+    ]
+
+
+def example_obstacles():
+    obstacles, _ = obstacles_from_map(synthetic_map(40, 30, seed=5), MAP_METADATA, True)
+    obstacles = np.concatenate(list(obstacles))
+    # values whose shortest representation has many digits
+    obstacles[0] = [0.1 + 0.2, -1 / 3, 1e-17, 123456789.123456789]
+    return obstacles
+
+
+@pytest.mark.parametrize('indent', ['  ', None])
+def test_write_scenario_matches_element_tree_writer(tmp_path, indent):
+    obstacles = example_obstacles()
+    legacy_path, path = str(tmp_path / 'legacy.xml'), str(tmp_path / 'scenario.xml')
+    write_legacy_scenario(legacy_path, obstacles)
+    write_scenario(path, np.array_split(obstacles, 3), indent)
+
+    # the same elements with the same attribute values
+    legacy, streamed = parsed_obstacles(legacy_path), parsed_obstacles(path)
+    assert len(streamed) == len(obstacles)
+    assert [values for _, values in streamed] == [values for _, values in legacy]
+    # floats are written with their shortest representation that reads back exactly
+    assert [attrib for attrib, _ in streamed] == [attrib for attrib, _ in legacy]
+    assert [list(values.values()) for _, values in streamed] == obstacles.tolist()
+
+    with open(path, encoding='utf-8') as f, open(legacy_path, encoding='utf-8') as legacy_file:
+        lines, legacy_lines = f.read().split('\n'), legacy_file.read().split('\n')
+    assert lines[0] == "<?xml version='1.0' encoding='utf-8'?>"
+    if indent is None:
+        # the whole scenario on the line after the header
+        assert len(lines) == 2 and lines[1].startswith('<scenario><obstacle ')
+    else:
+        # only the XML declaration differs from the minidom output
+        assert lines[1:] == legacy_lines[1:-1]
+
+
+@pytest.mark.parametrize('indent', ['  ', None])
+def test_write_empty_scenario(tmp_path, indent):
+    legacy_path, path = str(tmp_path / 'legacy.xml'), str(tmp_path / 'scenario.xml')
+    write_legacy_scenario(legacy_path, [])
+    write_scenario(path, [np.zeros((0, 4))], indent)
+
+    assert parsed_obstacles(path) == parsed_obstacles(legacy_path) == []
+
+    # a map without walls
+    map_image = np.full((20, 20), 254, dtype=np.uint8)
+    obstacles, map_walls = obstacles_from_map(map_image, MAP_METADATA, True)
+    write_scenario(path, obstacles, indent)
+    assert not map_walls.any()
+    assert parsed_obstacles(path) == []
+
+
+def write_map(directory, map_image):
+    with open(os.path.join(directory, 'map.pgm'), 'wb') as f:
+        f.write(f'P5\n{map_image.shape[1]} {map_image.shape[0]}\n255\n'.encode())
+        f.write(map_image.tobytes())
+    with open(os.path.join(directory, 'map.yaml'), 'w') as f:
+        f.write(
+            'image: map.pgm\nresolution: 0.05\norigin: [-3.0, -2.5, 0.0]\n'
+            'negate: 0\nfree_thresh: 0.196\noccupied_thresh: 0.65\n'
+        )
+
+
+@pytest.mark.parametrize('merge_walls', [False, True])
+@pytest.mark.parametrize('workers', [2, 3])
+def test_tiled_scenario_fragments_match_single_process(tmp_path, merge_walls, workers):
+    map_image = synthetic_map(90, 70, seed=3)
+    diagonal_tolerance = 0.05 if merge_walls else None
+    expected_path = str(tmp_path / 'expected.xml')
+    obstacles, expected_walls = obstacles_from_map(
+        map_image, MAP_METADATA, True, merge_walls, diagonal_tolerance
+    )
+    write_scenario(expected_path, obstacles)
+
+    # bands of 16 rows cut through the walls of the map
+    map_walls = np.zeros(map_image.shape, dtype=bool)
+    path = str(tmp_path / 'tiled.xml')
+    fragments = tiled_scenario_fragments(
+        map_image, MAP_METADATA, map_walls, True, merge_walls, diagonal_tolerance,
+        workers=workers, tile_rows=16,
+    )
+    write_scenario_fragments(path, fragments)
+
+    assert np.array_equal(map_walls, expected_walls)
+    with open(path, 'rb') as tiled, open(expected_path, 'rb') as expected:
+        assert tiled.read() == expected.read()
+
+
+@pytest.mark.parametrize('merge_walls', [False, True])
+def test_create_obstacle_file_with_workers(tmp_path, merge_walls):
+    # 200 rows give several bands of the default size of 64 rows
+    write_map(str(tmp_path), synthetic_map(200, 60, seed=4))
+    contents = []
+    for workers in [1, 2, 3]:
+        name = f'obstacles_{workers}.xml'
+        create_obstacle_file(
+            str(tmp_path), 'map.yaml', True, str(tmp_path), name,
+            merge_walls=merge_walls, workers=workers, verbose=False, use_cache=False,
+        )
+        with open(tmp_path / name, 'rb') as f:
+            contents.append(f.read())
+
+    assert contents[0] == contents[1] == contents[2]
+
+
+def test_create_obstacle_file_without_writable_cache(tmp_path):
+    write_map(str(tmp_path), synthetic_map(40, 30, seed=6))
+    cache_dir = tmp_path / 'cache'
+    cache_dir.write_bytes(b'')
+
+    create_obstacle_file(
+        str(tmp_path), 'map.yaml', True, str(tmp_path), 'obstacles.xml',
+        verbose=False, cache_dir=str(cache_dir),
+    )
+
+    assert len(parsed_obstacles(str(tmp_path / 'obstacles.xml'))) > 0
@@ -0,0 +1,136 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from arena_tools.ScenarioEditor.Pedestrian.Pedestrian import Pedestrian
+from arena_tools.ScenarioEditor.Pedestrian.PedestrianStore import PedestrianStore, PedestrianView
+
+AGENT_DICTS = [
+    {
+        'name': 'Pedestrian 1',
+        'id': 1,
+        'pos': [1.0, 2.0, 0.0],
+        'type': 'adult',
+        'model': 'actor1',
+        'waypoints': [[3.0, 4.0, 0.0], [5.0, 6.0, 0.5]],
+    },
+    {
+        'name': 'Pedestrian 2',
+        'id': 2,
+        'pos': [-1.0, 0.5],
+        'type': 'child',
+        'model': 'actor2',
+        'waypoints': [],
+        'vmax': 1.5,
+    },
+    {
+        'name': 'Pedestrian 3',
+        'id': 3,
+        'pos': [0.0, 0.0, 1.0],
+        'type': 'adult',
+        'model': 'actor1',
+        'waypoints': [[1.0, 1.0]],
+    },
+]
+
+
+def test_round_trip():
+    store = PedestrianStore.fromDicts(AGENT_DICTS)
+
+    assert len(store) == 3
+    assert store.toDicts() == AGENT_DICTS
+    assert [view.toDict() for view in store.views()] == AGENT_DICTS
+    assert store.getTypes() == ['adult', 'child', 'adult']
+    assert store.types == ['adult', 'child']
+
+
+def test_round_trip_from_pedestrians():
+    agents = [Pedestrian.fromDict(d) for d in AGENT_DICTS]
+    store = PedestrianStore.fromPedestrians(agents)
+
+    assert store.toDicts() == AGENT_DICTS
+    assert store.views() == agents
+
+
+def test_translate():
+    store = PedestrianStore.fromDicts(AGENT_DICTS)
+    store.translate([1.0, -1.0])
+
+    dicts = store.toDicts()
+    assert dicts[0]['pos'] == [2.0, 1.0, 0.0]
+    assert dicts[0]['waypoints'] == [[4.0, 3.0, 0.0], [6.0, 5.0, 0.5]]
+    assert dicts[1]['pos'] == [0.0, -0.5]
+    assert dicts[2]['waypoints'] == [[2.0, 0.0]]
+
+
+def test_translate_selected_agents():
+    store = PedestrianStore.fromDicts(AGENT_DICTS)
+    store.translate([0.0, 0.0, 2.0], indices=[0, 2])
+
+    dicts = store.toDicts()
+    assert dicts[0]['waypoints'] == [[3.0, 4.0, 2.0], [5.0, 6.0, 2.5]]
+    assert dicts[1] == AGENT_DICTS[1]
+    # an offset with more values than a vector keeps the size of the vector
+    assert dicts[2]['pos'] == [0.0, 0.0, 3.0]
+    assert dicts[2]['waypoints'] == [[1.0, 1.0]]
+
+
+def test_translate_after_assigning_waypoints():
+    store = PedestrianStore.fromDicts(AGENT_DICTS)
+    views = store.views()
+    views[1].waypoints = [np.array([0.0, 0.0, 0.0]), np.array([1.0, 1.0, 0.0])]
+    store.translate([1.0, 1.0], indices=[1, 2])
+
+    dicts = store.toDicts()
+    assert dicts[0]['waypoints'] == AGENT_DICTS[0]['waypoints']
+    assert dicts[1]['waypoints'] == [[1.0, 1.0, 0.0], [2.0, 2.0, 0.0]]
+    assert dicts[2]['waypoints'] == [[2.0, 2.0]]
+
+
+def test_view_writes_to_store():
+    store = PedestrianStore.fromDicts(AGENT_DICTS)
+    view = store.views()[0]
+
+    view.pos[0] = 10.0
+    view.waypoints[1][1] = 7.0
+    view.type = 'elder'
+    view.name = 'Renamed'
+
+    d = store.toDicts()[0]
+    assert d['pos'] == [10.0, 2.0, 0.0]
+    assert d['waypoints'][1] == [5.0, 7.0, 0.5]
+    assert d['type'] == 'elder'
+    assert d['name'] == 'Renamed'
+
+
+def test_view_waypoints_are_read_only():
+    view = PedestrianStore.fromDicts(AGENT_DICTS).views()[0]
+
+    with pytest.raises(AttributeError):
+        view.waypoints.append(np.zeros(3))
+
+    view.waypoints = list(view.waypoints) + [np.zeros(3)]
+    assert isinstance(view.waypoints, tuple)
+    assert len(view.waypoints) == 3
+
+
+@pytest.mark.parametrize('copy_agent', [
+    copy.copy,
+    copy.deepcopy,
+    lambda agent: pickle.loads(pickle.dumps(agent)),
+])
+def test_copies_are_detached(copy_agent):
+    store = PedestrianStore.fromDicts(AGENT_DICTS)
+    view = store.views()[1]
+    agent = copy_agent(view)
+
+    assert type(agent) is Pedestrian
+    assert agent == view
+    assert agent.toDict() == AGENT_DICTS[1]
+
+    agent.pos[0] = 100.0
+    agent.custom_properties.append({'group': 1})
+    assert store.toDicts()[1] == AGENT_DICTS[1]
+    assert isinstance(view, PedestrianView)
@@ -0,0 +1,362 @@
+import pytest
+
+pytest.importorskip('pytestqt')
+
+from PyQt5 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+from arena_tools.utils.QtExtensions import (  # noqa: E402
+    ArenaArrowItem,
+    ArenaGraphicsEllipseItem,
+    ArenaQGraphicsPolygonItem,
+    ArenaQGraphicsScene,
+    ArenaQGraphicsView,
+    PointGraphicsEllipseItem,
+    snapshot_drag_positions,
+    update_spatial_index,
+)
+
+
+class KeyItem(QtWidgets.QGraphicsRectItem):
+    '''An item that records the key events it is given.'''
+
+    def __init__(self, handled=False):
+        super().__init__(0, 0, 1, 1)
+        self.setFlag(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
+        self.handled = handled
+        self.keys = []
+
+    def handleEvent(self, event):
+        self.keys.append((event.type(), event.key()))
+        return self.handled
+
+
+class PointRow:
+    '''The parts of a PointRow of the zones editor that its item uses.'''
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.polygonRow = self
+        self.item = PointGraphicsEllipseItem(self, None, None, -0.25, -0.25, 0.5, 0.5)
+        scene.addItem(self.item)
+
+    def drawPolygon(self):
+        pass
+
+    def handleItemChange(self):
+        pass
+
+    def remove(self):
+        self.scene.removeItem(self.item)
+
+
+def send_key(widget, eventType, key):
+    event = QtGui.QKeyEvent(eventType, key, QtCore.Qt.KeyboardModifier.NoModifier)
+    return QtWidgets.QApplication.sendEvent(widget, event)
+
+
+@pytest.fixture
+def widget(qtbot):
+    widget = QtWidgets.QWidget()
+    qtbot.addWidget(widget)
+    return widget
+
+
+def test_key_events_go_to_selected_items(qtbot, widget):
+    scene = ArenaQGraphicsScene()
+    selected, unselected = KeyItem(), KeyItem()
+    for item in [selected, unselected]:
+        scene.addItem(item)
+    selected.setSelected(True)
+
+    send_key(widget, QtCore.QEvent.Type.KeyPress, QtCore.Qt.Key.Key_A)
+    send_key(widget, QtCore.QEvent.Type.KeyRelease, QtCore.Qt.Key.Key_A)
+    QtWidgets.QApplication.sendEvent(widget, QtCore.QEvent(QtCore.QEvent.Type.Enter))
+
+    assert selected.keys == [
+        (QtCore.QEvent.Type.KeyPress, QtCore.Qt.Key.Key_A),
+        (QtCore.QEvent.Type.KeyRelease, QtCore.Qt.Key.Key_A),
+    ]
+    assert unselected.keys == []
+
+
+def test_handled_key_events_are_consumed(qtbot, widget):
+    scene = ArenaQGraphicsScene()
+    items = [KeyItem(), KeyItem(handled=True)]
+    for item in items:
+        scene.addItem(item)
+        item.setSelected(True)
+    received = []
+    widget.keyPressEvent = lambda event: received.append(event.key())
+
+    send_key(widget, QtCore.QEvent.Type.KeyPress, QtCore.Qt.Key.Key_B)
+
+    # every selected item sees the event, even after one of them handled it
+    assert all(len(item.keys) == 1 for item in items)
+    assert received == []
+
+
+def test_delete_removes_selected_points(qtbot, widget):
+    scene = ArenaQGraphicsScene()
+    rows = [PointRow(scene) for _ in range(3)]
+    rows[0].item.setSelected(True)
+    rows[2].item.setSelected(True)
+
+    send_key(widget, QtCore.QEvent.Type.KeyRelease, QtCore.Qt.Key.Key_Delete)
+
+    assert [row.item.scene() is scene for row in rows] == [False, True, False]
+    assert len(scene.pointIndex) == 1
+
+
+def test_dispatcher_is_removed_with_scene(qtbot, widget):
+    scene = ArenaQGraphicsScene()
+    item = KeyItem()
+    scene.addItem(item)
+    item.setSelected(True)
+    dispatcher = scene.keyDispatcher
+    destroyed = []
+    dispatcher.destroyed.connect(lambda: destroyed.append(True))
+
+    scene.removeItem(item)
+    scene.deleteLater()
+    QtWidgets.QApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
+    send_key(widget, QtCore.QEvent.Type.KeyPress, QtCore.Qt.Key.Key_A)
+
+    assert destroyed == [True]
+    assert item.keys == []
+
+
+def ellipse(scene, x, y):
+    item = ArenaGraphicsEllipseItem(None, None, -0.25, -0.25, 0.5, 0.5)
+    scene.addItem(item)
+    item.setPos(x, y)
+    return item
+
+
+@pytest.fixture
+def view(qtbot):
+    view = ArenaQGraphicsView(ArenaQGraphicsScene())
+    qtbot.addWidget(view)
+    view.resize(400, 400)
+    view.show()
+    qtbot.waitExposed(view)
+    view.centerOn(1, 1)
+    return view
+
+
+def send_mouse(
+    view, eventType, scenePos, buttons=QtCore.Qt.MouseButton.LeftButton,
+    modifiers=QtCore.Qt.KeyboardModifier.NoModifier
+):
+    pos = view.mapFromScene(scenePos)
+    # the scene finds the items under the mouse from the global position
+    globalPos = QtCore.QPointF(view.viewport().mapToGlobal(pos))
+    pos = QtCore.QPointF(pos)
+    button = buttons
+    if eventType == QtCore.QEvent.Type.MouseMove:
+        button = QtCore.Qt.MouseButton.NoButton
+    if eventType == QtCore.QEvent.Type.MouseButtonRelease:
+        buttons = QtCore.Qt.MouseButton.NoButton
+    event = QtGui.QMouseEvent(eventType, pos, pos, globalPos, button, buttons, modifiers)
+    QtWidgets.QApplication.sendEvent(view.viewport(), event)
+
+
+def drag(view, path):
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonPress, path[0])
+    for pos in path[1:]:
+        send_mouse(view, QtCore.QEvent.Type.MouseMove, pos)
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonRelease, path[-1])
+
+
+def test_arrow_follows_its_items(qtbot):
+    scene = ArenaQGraphicsScene()
+    start, end, other = ellipse(scene, 0, 0), ellipse(scene, 2, 0), ellipse(scene, 5, 5)
+    arrow = ArenaArrowItem(start, end)
+    scene.addItem(arrow)
+    updates = []
+    updatePosition = arrow.updatePosition
+    arrow.updatePosition = lambda: updates.append(True) or updatePosition()
+
+    assert start.arrows == [arrow] and end.arrows == [arrow] and other.arrows == []
+
+    end.setPos(4, 3)
+    assert len(updates) == 1
+    # the arrow ends at the new position, not the previous one
+    assert arrow.path().elementAt(1).x == 4 and arrow.path().elementAt(1).y == 3
+
+    start.setPos(1, 1)
+    assert arrow.path().elementAt(0).x == 1 and arrow.path().elementAt(0).y == 1
+    other.setPos(6, 6)
+    assert len(updates) == 2
+
+
+def test_snapshot_drag_positions(qtbot):
+    scene = ArenaQGraphicsScene()
+    selected, pressed, unselected = [ellipse(scene, x, 0) for x in [1, 2, 3]]
+    selected.setSelected(True)
+    for item in [selected, pressed, unselected]:
+        item.oldItemPos = QtCore.QPointF(-1, -1)
+
+    snapshot_drag_positions(pressed)
+
+    assert selected.oldItemPos == QtCore.QPointF(1, 0)
+    assert pressed.oldItemPos == QtCore.QPointF(2, 0)
+    assert unselected.oldItemPos == QtCore.QPointF(-1, -1)
+
+
+def test_drag_moves_selected_items(qtbot, view):
+    scene = view.scene()
+    items = [ellipse(scene, x, 1) for x in range(4)]
+    items[0].setSelected(True)
+    items[1].setSelected(True)
+    target = ellipse(scene, 0, -2)
+    arrow = ArenaArrowItem(items[0], target)
+    scene.addItem(arrow)
+
+    drag(view, [QtCore.QPointF(1, 1.1), QtCore.QPointF(1.5, 1.5), QtCore.QPointF(1, 2.1)])
+
+    assert [item.pos() for item in items] == [
+        QtCore.QPointF(0, 2), QtCore.QPointF(1, 2), QtCore.QPointF(2, 1), QtCore.QPointF(3, 1)
+    ]
+    assert not any(item.isDragged for item in items)
+    assert arrow.path().elementAt(0).x == 0 and arrow.path().elementAt(0).y == 2
+    # the point index follows the moved items
+    positions = sorted(scene.pointIndex.positions[item] for item in items)
+    assert positions == [(0, 2), (1, 2), (2, 1), (3, 1)]
+
+
+def test_items_update_the_point_index(qtbot):
+    scene = ArenaQGraphicsScene()
+    item = ellipse(scene, 1, 2)
+    line = scene.addLine(0, 0, 1, 1)
+
+    assert scene.pointIndex.positions == {item: (1, 2)}
+    assert line not in scene.pointIndex
+
+    item.setPos(3, -4)
+    assert scene.pointIndex.positions[item] == (3, -4)
+    item.setPosNoEvent(-5, 0.5)
+    assert scene.pointIndex.positions[item] == (-5, 0.5)
+
+    scene.removeItem(item)
+    assert len(scene.pointIndex) == 0
+    # items outside of an ArenaQGraphicsScene are not indexed
+    item.setPos(1, 1)
+    update_spatial_index(item)
+    assert len(scene.pointIndex) == 0
+
+
+def test_point_item_at(qtbot):
+    scene = ArenaQGraphicsScene()
+    near, far, hidden = ellipse(scene, 1, 1), ellipse(scene, 2, 1), ellipse(scene, 1.1, 1)
+    hidden.setVisible(False)
+
+    assert scene.pointItemAt(QtCore.QPointF(1.2, 1), 0.5) is near
+    assert scene.pointItemAt(QtCore.QPointF(1.2, 1), 0.5, lambda item: item is not near) is None
+    assert scene.pointItemAt(QtCore.QPointF(1.2, 1), 1.0, lambda item: item is not near) is far
+    assert scene.pointItemAt(QtCore.QPointF(5, 5), 1.0) is None
+
+
+def click(view, scenePos):
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonPress, scenePos)
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonRelease, scenePos)
+
+
+def test_click_next_to_item_selects_it(qtbot, view):
+    # zoomed out, the pick distance is larger than the items
+    view.scale(0.05, 0.05)
+    view.centerOn(1, 1)
+    scene = view.scene()
+    items = [ellipse(scene, 0.5, 1), ellipse(scene, 5, 1)]
+    items[1].setSelected(True)
+    assert view.pickDistance() > 0.5
+
+    # the click is outside of the ellipse, but within the pick distance
+    click(view, QtCore.QPointF(1, 1))
+
+    assert scene.selectedItems() == [items[0]]
+    assert view.pickedItem is None
+
+    # too far away, the selection is cleared by the scene
+    click(view, QtCore.QPointF(3, 1))
+    assert scene.selectedItems() == []
+
+
+def test_click_in_add_mode_does_not_select(qtbot, view):
+    scene = view.scene()
+    item = ellipse(scene, 1, 1)
+    clicked = []
+    view.clickedPos.connect(clicked.append)
+
+    pos = QtCore.QPointF(1.25 + view.pickDistance() / 2, 1)
+    click(view, pos)
+
+    assert not item.isSelected()
+    assert len(clicked) == 1 and abs(clicked[0].x() - pos.x()) < 0.05
+
+
+def test_drag_item_below_arrow(qtbot, view):
+    # the arrow and the coordinate lines are on top of the item at the origin,
+    # the press still starts a drag instead of picking the closest item
+    scene = view.scene()
+    items = [ellipse(scene, 0, 0), ellipse(scene, 0.5, 0)]
+    scene.addItem(ArenaArrowItem(items[0], items[1]))
+    view.centerOn(0, 0)
+
+    drag(view, [QtCore.QPointF(0, 0), QtCore.QPointF(0, 0.5), QtCore.QPointF(0, 1)])
+
+    assert items[0].pos() == QtCore.QPointF(0, 1)
+    assert scene.pointIndex.positions[items[0]] == (0, 1)
+
+
+def rubber_band(view, start, end, modifiers=QtCore.Qt.KeyboardModifier.NoModifier):
+    for eventType, pos in [
+        (QtCore.QEvent.Type.MouseButtonPress, start),
+        (QtCore.QEvent.Type.MouseMove, (start + end) / 2),
+        (QtCore.QEvent.Type.MouseMove, end),
+        (QtCore.QEvent.Type.MouseButtonRelease, end),
+    ]:
+        send_mouse(view, eventType, pos, QtCore.Qt.MouseButton.RightButton, modifiers)
+
+
+def test_rubber_band_selects_with_the_point_index(qtbot, view):
+    scene = view.scene()
+    inside = [ellipse(scene, 0.5, 0.5), ellipse(scene, 1.5, 1.2)]
+    outside = [ellipse(scene, 2.5, 0.5), ellipse(scene, -0.7, 1)]
+    hidden = ellipse(scene, 1, 1)
+    hidden.setVisible(False)
+    polygon = ArenaQGraphicsPolygonItem(QtGui.QPolygonF(
+        [QtCore.QPointF(1.8, 1.8), QtCore.QPointF(3, 1.8), QtCore.QPointF(3, 3)]
+    ))
+    scene.addItem(polygon)
+    outside[0].setSelected(True)
+    # the whole scene is not searched for the points
+    queried = []
+    query_rect = scene.pointIndex.query_rect
+    scene.pointIndex.query_rect = lambda *rect: queried.append(rect) or query_rect(*rect)
+
+    rubber_band(view, QtCore.QPointF(0, 0), QtCore.QPointF(2, 2))
+
+    assert set(scene.selectedItems()) == set(inside + [polygon])
+    assert len(queried) == 1
+    assert not view.rubberBand.isVisible()
+
+    # with control the selection is extended
+    control = QtCore.Qt.KeyboardModifier.ControlModifier
+    rubber_band(view, QtCore.QPointF(-1, 0), QtCore.QPointF(-0.5, 2), control)
+    assert set(scene.selectedItems()) == set(inside + [polygon, outside[1]])
+
+    # an empty rectangle clears the selection
+    rubber_band(view, QtCore.QPointF(-1, -1), QtCore.QPointF(-0.9, -0.9))
+    assert scene.selectedItems() == []
+
+
+def test_rubber_band_does_not_start_on_items(qtbot, view):
+    ellipse(view.scene(), 1, 1)
+
+    right = QtCore.Qt.MouseButton.RightButton
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonPress, QtCore.QPointF(1, 1), right)
+    assert view.rubberBandOrigin is None
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonRelease, QtCore.QPointF(1, 1), right)
+
+    send_mouse(view, QtCore.QEvent.Type.MouseButtonPress, QtCore.QPointF(2, 1), right)
+    assert view.rubberBandOrigin is not None
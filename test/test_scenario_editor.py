@@ -0,0 +1,289 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pytestqt')
+pytest.importorskip('arena_simulation_setup')
+pytest.importorskip('arena_robots')
+
+from PyQt5 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+from arena_tools.ScenarioEditor.ArenaScenario import ArenaScenario  # noqa: E402
+from arena_tools.ScenarioEditor.ArenaScenarioEditor import (  # noqa: E402
+    ArenaScenarioEditor,
+    PedestrianAgentRow,
+)
+from arena_tools.ScenarioEditor.Pedestrian.Pedestrian import Pedestrian  # noqa: E402
+from arena_tools.ScenarioEditor.PathCreator import PathCreator  # noqa: E402
+from arena_tools.utils.QtExtensions import ArenaQGraphicsScene, ArenaQGraphicsView  # noqa: E402
+
+
+def pedestrian(name='Pedestrian 1', numWaypoints=5):
+    agent = Pedestrian(name)
+    agent.pos = np.array([1.0, 2.0, 0.0])
+    agent.waypoints = [np.array([float(i), 3.0, 0.0]) for i in range(numWaypoints)]
+    return agent
+
+
+class PathRecorder:
+    '''Counts how often the waypoint path of a row is rebuilt.'''
+
+    def __init__(self, row):
+        self.paths = []
+        setPath = row.waypointPathItem.setPath
+        row.waypointPathItem.setPath = lambda path: self.paths.append(path) or setPath(path)
+
+
+@pytest.fixture
+def view(qtbot):
+    view = ArenaQGraphicsView(ArenaQGraphicsScene())
+    qtbot.addWidget(view)
+    return view
+
+
+def path_points(row):
+    path = row.waypointPathItem.path()
+    return [(path.elementAt(i).x, path.elementAt(i).y) for i in range(path.elementCount())]
+
+
+def test_waypoint_path_is_drawn_once_after_loading(qtbot, view):
+    row = PedestrianAgentRow(0, pedestrian(), view.scene(), view)
+    recorder = PathRecorder(row)
+
+    qtbot.waitUntil(lambda: len(recorder.paths) > 0)
+    qtbot.wait(2 * row.WAYPOINT_PATH_REDRAW_INTERVAL)
+
+    assert len(recorder.paths) == 1
+    assert path_points(row) == [(1.0, 2.0)] + [(float(i), 3.0) for i in range(5)]
+
+
+def test_dragging_many_items_redraws_once(qtbot, view):
+    row = PedestrianAgentRow(0, pedestrian(), view.scene(), view)
+    qtbot.waitUntil(lambda: not row.waypointPathTimer.isActive())
+    recorder = PathRecorder(row)
+
+    # like a drag of the agent and all waypoints, each item is moved with events
+    row.graphicsPathItem.setPos(2.0, 2.0)
+    for w in row.getWaypointRows():
+        w.ellipseItem.setPos(w.ellipseItem.pos() + QtCore.QPointF(1.0, 0.0))
+    assert recorder.paths == []
+    qtbot.waitUntil(lambda: len(recorder.paths) > 0)
+    qtbot.wait(2 * row.WAYPOINT_PATH_REDRAW_INTERVAL)
+
+    assert len(recorder.paths) == 1
+    assert path_points(row) == [(2.0, 2.0)] + [(float(i + 1), 3.0) for i in range(5)]
+    assert row.dirty
+
+
+def test_adding_and_removing_waypoints(qtbot, view):
+    row = PedestrianAgentRow(0, pedestrian(numWaypoints=0), view.scene(), view)
+    qtbot.waitUntil(lambda: not row.waypointPathTimer.isActive())
+    recorder = PathRecorder(row)
+
+    for i in range(10):
+        row.addWaypoint(QtCore.QPointF(i, -1.0))
+    row.removeWaypoint(row.getWaypointRows()[0])
+    qtbot.waitUntil(lambda: len(recorder.paths) > 0)
+
+    assert len(recorder.paths) == 1
+    assert len(path_points(row)) == 10
+
+
+def test_removed_row_does_not_redraw(qtbot, view):
+    row = PedestrianAgentRow(0, pedestrian(), view.scene(), view)
+    recorder = PathRecorder(row)
+
+    row.removeItems()
+    qtbot.wait(2 * row.WAYPOINT_PATH_REDRAW_INTERVAL)
+
+    assert recorder.paths == []
+    assert row.waypointPathItem.scene() is None
+
+
+def pedestrian_dict(i):
+    return {
+        'name': f'Pedestrian {i}',
+        'id': i,
+        'pos': [float(i), 0.0, 0.0],
+        'type': 'adult',
+        'model': 'actor1',
+        'waypoints': [[float(i), 1.0, 0.0], [float(i), 2.0, 0.5]],
+    }
+
+
+SCENARIO = {
+    'robots': [{'start': [0.0, -1.0, 0.7], 'goal': [5.0, 5.0, 0.7]}],
+    'obstacles': {
+        'static': [],
+        'interactive': [],
+        'dynamic': [pedestrian_dict(i) for i in range(3)],
+    },
+}
+
+
+@pytest.fixture
+def scenario_path(tmp_path):
+    scenario = ArenaScenario.fromDict(SCENARIO)
+    scenario.path = str(tmp_path / 'scenario.json')
+    scenario.saveToFile()
+    return scenario.path
+
+
+@pytest.fixture
+def editor(qtbot):
+    editor = ArenaScenarioEditor()
+    # the world selection dialog is modal
+    editor.show_select_world_dialog = lambda *args, **kwargs: None
+    qtbot.addWidget(editor)
+    editor.show()
+    qtbot.waitExposed(editor)
+    yield editor
+    editor.saver.shutdown()
+
+
+def click(view, scenePos):
+    pos = view.mapFromScene(scenePos)
+    # the scene finds the items under the mouse from the global position
+    globalPos = QtCore.QPointF(view.viewport().mapToGlobal(pos))
+    pos = QtCore.QPointF(pos)
+    for eventType, buttons in [
+        (QtCore.QEvent.Type.MouseButtonPress, QtCore.Qt.MouseButton.LeftButton),
+        (QtCore.QEvent.Type.MouseButtonRelease, QtCore.Qt.MouseButton.NoButton),
+    ]:
+        event = QtGui.QMouseEvent(
+            eventType, pos, pos, globalPos, QtCore.Qt.MouseButton.LeftButton, buttons,
+            QtCore.Qt.KeyboardModifier.NoModifier
+        )
+        QtWidgets.QApplication.sendEvent(view.viewport(), event)
+
+
+def test_load_edit_save(qtbot, editor, scenario_path, tmp_path):
+    editor.loadArenaScenario(scenario_path)
+    pedestrians, robots = editor.getPedestrianAgentRows(), editor.getRobotAgentRows()
+    names = [w.pedestrianAgent.name for w in pedestrians]
+    assert names == ['Pedestrian 0', 'Pedestrian 1', 'Pedestrian 2']
+    assert len(robots) == 1
+    assert not editor.isScenarioModified()
+
+    # edit like the spin boxes of the rows, add a waypoint by clicking and delete an agent
+    pedestrians[0].setRowData(1, 10.0)
+    robots[0].goalRow.setRowData(2, 7.0)
+    pedestrians[1].setAddWaypointMode(True)
+    editor.gview.centerOn(-20, 20)
+    click(editor.gview, QtCore.QPointF(-20, 20))
+    pedestrians[1].setAddWaypointMode(False)
+    pedestrians[2].remove()
+    assert editor.isScenarioModified()
+    newWaypoint = pedestrians[1].getWaypointRows()[-1].getPos()
+    assert newWaypoint[:2] == (pytest.approx(-20, abs=0.1), pytest.approx(20, abs=0.1))
+
+    path = str(tmp_path / 'edited.json')
+    assert editor.save(path)
+    qtbot.waitUntil(editor.saver.isIdle)
+
+    saved = ArenaScenario()
+    saved.loadFromFile(path)
+    expected = [pedestrian_dict(0), pedestrian_dict(1)]
+    expected[0]['pos'] = [10.0, 0.0, 0.0]
+    expected[1]['waypoints'].append(list(newWaypoint))
+    assert saved.toDict()['obstacles']['dynamic'] == expected
+    assert saved.toDict()['robots'] == [{'start': [0.0, -1.0, 0.7], 'goal': [5.0, 7.0, 0.7]}]
+    assert not editor.isScenarioModified()
+
+
+def test_reload_reuses_rows(qtbot, editor, scenario_path):
+    editor.loadArenaScenario(scenario_path)
+    rows = editor.getPedestrianAgentRows()
+    rows[0].setRowData(1, 10.0)
+    rows[0].addWaypoint(QtCore.QPointF(3.0, 3.0))
+    rows[1].setAddWaypointMode(True)
+    rows[2].remove()
+    editor.onAddPedestrianAgentClicked()
+
+    editor.loadArenaScenario(scenario_path)
+
+    reloaded = editor.getPedestrianAgentRows()
+    assert reloaded[:2] == rows[:2]
+    assert [w.pedestrianAgent.toDict() for w in reloaded] == SCENARIO['obstacles']['dynamic']
+    assert [len(w.getWaypointRows()) for w in reloaded] == [2, 2, 2]
+    assert reloaded[0].getCurrentAgentPosition() == QtCore.QPointF(0.0, 0.0)
+    assert not any(w.dirty for w in reloaded)
+    assert not editor.isScenarioModified()
+    # add waypoint mode ends with the reload
+    assert editor.gview.receivers(editor.gview.clickedPos) == 0
+    assert editor.gscene.itemIndexMethod() == QtWidgets.QGraphicsScene.ItemIndexMethod.BspTreeIndex
+    # the point index only holds items in the scene:
+    # 3 agents with 2 waypoints, robot with start and goal
+    assert all(item.scene() is editor.gscene for item in editor.gscene.pointIndex.positions)
+    assert len(editor.gscene.pointIndex) == 3 * 3 + 3
+
+
+def test_load_2d_pedestrians(qtbot, editor, scenario_path, tmp_path):
+    dynamic = [pedestrian_dict(i) for i in range(2)]
+    for i, agent in enumerate(dynamic):
+        agent['pos'] = agent['pos'][:2]
+        agent['waypoints'] = [[float(i), float(j + 1)] for j in range(i + 1)]
+    obstacles = {'static': [], 'interactive': [], 'dynamic': dynamic}
+    scenario = ArenaScenario.fromDict({**SCENARIO, 'obstacles': obstacles})
+    scenario.path = str(tmp_path / 'scenario2d.json')
+    scenario.saveToFile()
+
+    def check():
+        rows = editor.getPedestrianAgentRows()
+        assert [(w.getCurrentAgentPosition(), w.z) for w in rows] == [
+            (QtCore.QPointF(0.0, 0.0), 0.0), (QtCore.QPointF(1.0, 0.0), 0.0)
+        ]
+        assert [[wp.getPos() for wp in w.getWaypointRows()] for w in rows] == [
+            [(0.0, 1.0, 0.0)],
+            [(1.0, 1.0, 0.0), (1.0, 2.0, 0.0)],
+        ]
+        assert not editor.isScenarioModified()
+
+    # in new rows
+    editor.loadArenaScenario(scenario.path)
+    check()
+    # and in rows reused from a 3D scenario
+    editor.loadArenaScenario(scenario_path)
+    editor.loadArenaScenario(scenario.path)
+    check()
+
+
+def test_path_creator_selects_outside_of_add_mode(qtbot):
+    creator = PathCreator()
+    qtbot.addWidget(creator)
+    creator.show()
+    qtbot.waitExposed(creator)
+    view = creator.view
+    # zoomed out, the pick distance is larger than the robot
+    view.scale(0.2, 0.2)
+    pos = QtCore.QPointF(-0.25 - view.pickDistance() / 2, 0)
+    view.centerOn(pos)
+
+    click(view, pos)
+    assert creator.robot_ellipse_item.isSelected()
+    assert creator.subgoal_items == []
+
+    creator.setAddWaypointMode(True)
+    click(view, pos)
+    assert len(creator.subgoal_items) == 1
+
+    creator.setAddWaypointMode(False)
+    creator.scene.clearSelection()
+    click(view, QtCore.QPointF(0, -0.25 - view.pickDistance() / 2))
+    assert creator.robot_ellipse_item.isSelected()
+    assert len(creator.subgoal_items) == 1
+
+
+def test_global_config_copies_positions(qtbot, editor, scenario_path):
+    editor.loadArenaScenario(scenario_path)
+    rows = editor.getPedestrianAgentRows()
+    agents = [w.pedestrianAgent for w in rows]
+
+    editor.onPedestrianAgentsGlobalConfigChanged()
+
+    # the agents of the loaded scenario are views of its pedestrian store
+    agents[0].pos[0] = 10.0
+    agents[0].waypoints[0][1] = 10.0
+    assert rows[0].pedestrianAgent is not agents[0]
+    assert rows[0].pedestrianAgent.pos.tolist() == [0.0, 0.0, 0.0]
+    waypoints = [wp.tolist() for wp in rows[0].pedestrianAgent.waypoints]
+    assert waypoints == [[0.0, 1.0, 0.0], [0.0, 2.0, 0.5]]
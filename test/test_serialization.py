@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from arena_tools.utils import Serialization
+from arena_tools.utils.Serialization import get_codec, write_atomic
+
+DATA = {
+    'name': 'scenario',
+    'robots': [{'start': [0.5, -1.25, 0.0], 'goal': [3.0, 4.0, 1.5]}],
+    'pedestrians': [],
+    'count': 3,
+    'enabled': True,
+    'description': None,
+}
+
+
+@pytest.mark.parametrize('extension', ['.json', '.yaml'])
+def test_round_trip(tmp_path, extension):
+    path = str(tmp_path / ('scenario' + extension))
+    codec = get_codec(path)
+    codec.save(DATA, path)
+
+    assert codec.read(path) == DATA
+
+
+def test_json_round_trip_without_orjson(tmp_path, monkeypatch):
+    monkeypatch.setattr(Serialization, 'orjson', None)
+    path = str(tmp_path / 'scenario.json')
+    get_codec(path).save(DATA, path)
+
+    assert get_codec(path).read(path) == DATA
+
+
+def test_json_format_without_orjson(tmp_path, monkeypatch):
+    pytest.importorskip('orjson')
+    data = dict(DATA, name='Fußgänger', nested={'empty': {}, 'list': [[], [1, [2.5]]]})
+    path = str(tmp_path / 'scenario.json')
+    get_codec(path).save(data, path)
+    with open(path, 'rb') as file:
+        with_orjson = file.read()
+
+    monkeypatch.setattr(Serialization, 'orjson', None)
+    get_codec(path).save(data, path)
+    with open(path, 'rb') as file:
+        assert file.read() == with_orjson
+    assert with_orjson.startswith(b'{\n  "name": "Fu\xc3\x9fg\xc3\xa4nger",\n')
+
+
+def test_msgpack_round_trip(tmp_path):
+    pytest.importorskip('msgpack')
+    path = str(tmp_path / 'scenario.msgpack')
+    get_codec(path).save(DATA, path)
+
+    assert get_codec(path).read(path) == DATA
+
+
+def test_msgpack_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(Serialization, 'msgpack', None)
+    path = str(tmp_path / 'scenario.msgpack')
+
+    with pytest.raises(Exception, match='msgpack'):
+        get_codec(path).save(DATA, path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_unknown_extension():
+    with pytest.raises(Exception, match='file endings'):
+        get_codec('scenario.txt')
+
+
+def test_write_atomic_keeps_old_file_on_error(tmp_path):
+    path = str(tmp_path / 'scenario.json')
+    write_atomic(path, lambda file: file.write('old'))
+
+    def failing_write(file):
+        file.write('partial')
+        raise RuntimeError('write failed')
+
+    with pytest.raises(RuntimeError):
+        write_atomic(path, failing_write)
+
+    with open(path) as file:
+        assert file.read() == 'old'
+    assert os.listdir(tmp_path) == ['scenario.json']
@@ -0,0 +1,133 @@
+import pytest
+
+from arena_tools.utils.SpatialIndex import SpatialHashGrid
+
+
+def occupied_cells(grid):
+    return {cell: sorted(keys) for cell, keys in grid.cells.items()}
+
+
+def test_insert_into_cells():
+    grid = SpatialHashGrid(cell_size=2.0)
+    grid.insert('a', 0.5, 0.5)
+    grid.insert('b', 1.9, 1.9)
+    grid.insert('c', -0.1, 2.0)
+
+    assert len(grid) == 3
+    assert 'a' in grid and 'd' not in grid
+    assert occupied_cells(grid) == {(0, 0): ['a', 'b'], (-1, 1): ['c']}
+
+
+def test_move_across_cell_boundaries():
+    grid = SpatialHashGrid(cell_size=1.0)
+    grid.insert('a', 0.2, 0.2)
+    grid.insert('b', 0.8, 0.8)
+
+    # within the same cell
+    grid.move('a', 0.9, 0.1)
+    assert occupied_cells(grid) == {(0, 0): ['a', 'b']}
+
+    # inserting an existing key moves it
+    grid.insert('a', 1.0, 0.1)
+    assert occupied_cells(grid) == {(0, 0): ['b'], (1, 0): ['a']}
+    assert grid.positions['a'] == (1.0, 0.1)
+
+    # the empty cell is removed
+    grid.move('b', -3.5, 2.5)
+    assert occupied_cells(grid) == {(1, 0): ['a'], (-4, 2): ['b']}
+    assert len(grid) == 2
+
+
+def test_remove():
+    grid = SpatialHashGrid(cell_size=1.0)
+    grid.insert('a', 0.5, 0.5)
+    grid.insert('b', 0.6, 0.6)
+    grid.insert('c', 5.5, 0.5)
+
+    grid.remove('c')
+    grid.remove('c')
+    grid.remove('unknown')
+    assert occupied_cells(grid) == {(0, 0): ['a', 'b']}
+
+    grid.remove('a')
+    assert occupied_cells(grid) == {(0, 0): ['b']}
+    assert grid.query_rect(0, 0, 1, 1) == ['b']
+
+    grid.clear()
+    assert len(grid) == 0 and grid.cells == {}
+
+
+def test_invalid_cell_size():
+    with pytest.raises(ValueError):
+        SpatialHashGrid(cell_size=0.0)
+
+
+def points_grid():
+    grid = SpatialHashGrid(cell_size=1.0)
+    for x in range(-5, 6):
+        for y in range(-5, 6):
+            grid.insert((x, y), x + 0.5, y + 0.5)
+    return grid
+
+
+def brute_force_rect(grid, x_min, y_min, x_max, y_max):
+    return sorted(
+        key for key, (x, y) in grid.positions.items()
+        if x_min <= x <= x_max and y_min <= y <= y_max
+    )
+
+
+@pytest.mark.parametrize('rect', [
+    (0.0, 0.0, 1.0, 1.0),
+    (-2.5, -1.5, 2.5, 0.5),  # borders are included
+    (1.7, 1.7, 1.8, 1.8),  # inside a single cell, no points
+    (-3.2, 4.1, 10.0, 20.0),
+])
+def test_query_rect(rect):
+    grid = points_grid()
+
+    assert sorted(grid.query_rect(*rect)) == brute_force_rect(grid, *rect)
+
+
+def test_query_large_rect():
+    # the rectangle covers about 2e12 cells, looping over them would not finish,
+    # so only the occupied cells are looked at
+    grid = points_grid()
+    grid.insert('far', 1000.5, -1000.5)
+    rect = (-1e6, -1e6, 4.5, 1e6)
+
+    expected = sorted(brute_force_rect(grid, *rect), key=str)
+    assert sorted(grid.query_rect(*rect), key=str) == expected
+    assert 'far' in grid.query_rect(-1e6, -1e6, 1e6, 0)
+
+
+def test_nearest():
+    grid = SpatialHashGrid(cell_size=1.0)
+    grid.insert('a', 0.0, 0.0)
+    grid.insert('b', 1.2, 0.0)
+    grid.insert('c', 0.0, -3.0)
+
+    assert grid.nearest(0.7, 0.0, 1.0) == 'b'
+    assert grid.nearest(0.5, 0.0, 1.0) == 'a'
+    assert grid.nearest(0.0, -1.0, 0.5) is None
+    # points in cells further away than the neighbours are found
+    assert grid.nearest(0.0, -1.6, 2.0) == 'c'
+    assert grid.nearest(5.0, 5.0, 1.0) is None
+    assert SpatialHashGrid().nearest(0.0, 0.0, 10.0) is None
+
+
+def test_nearest_with_accept_filter():
+    grid = SpatialHashGrid(cell_size=1.0)
+    grid.insert('a', 0.0, 0.0)
+    grid.insert('b', 0.5, 0.0)
+    grid.insert('c', 1.5, 0.0)
+    checked = []
+
+    def accept(key):
+        checked.append(key)
+        return key != 'b'
+
+    assert grid.nearest(0.6, 0.0, 2.0, accept) == 'a'
+    assert 'b' in checked
+    assert grid.nearest(0.6, 0.0, 2.0, lambda key: key == 'c') == 'c'
+    assert grid.nearest(0.6, 0.0, 2.0, lambda key: False) is None
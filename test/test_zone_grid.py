@@ -0,0 +1,181 @@
+import types
+
+import numpy as np
+import pytest
+import shapely
+
+from arena_tools.ZonesEditor.Zone import Zone, ZoneGrid, ZonesData
+
+
+def square(x, y, size=1.0):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size]]
+
+
+def zones_data(zones, path=''):
+    data = ZonesData()
+    data.path = path
+    data.zones = zones
+    return data
+
+
+def example_zones():
+    return zones_data([
+        Zone('kitchen', ['room', 'food'], [square(0, 0, 2)]),
+        Zone('hall', ['room'], [square(2, 0, 1), square(0, 3, 1)]),
+        Zone('no category', [], [square(0, 0, 4)]),
+        Zone('empty', ['outside'], []),
+    ])
+
+
+def write_pgm(path, shape):
+    with open(path, 'wb') as f:
+        f.write(f'P5\n{shape[1]} {shape[0]}\n255\n'.encode())
+        f.write(bytes(shape[0] * shape[1]))
+    return str(path)
+
+
+def test_rasterize():
+    grid = example_zones().rasterize(0.5, [0.0, 0.0, 0.0], (10, 8))
+
+    assert grid.categories == ['food', 'outside', 'room']
+    assert grid.labels.dtype == np.uint8
+    assert grid.labels.shape == (10, 8)
+    food, room = grid.bit('food'), grid.bit('room')
+    expected = np.zeros((10, 8), dtype=np.uint8)
+    expected[0:4, 0:4] = food | room  # kitchen
+    expected[0:2, 4:6] = room  # first polygon of the hall
+    expected[6:8, 0:2] = room  # second polygon of the hall
+    np.testing.assert_array_equal(grid.labels, expected)
+    assert grid.origin == [0.0, 0.0]
+    assert grid.resolution == 0.5
+
+
+def test_rasterize_cell_centers():
+    # the zone covers the centers of the cells (0, 1) and (0, 2) only
+    data = zones_data([Zone('strip', ['a'], [[[0.6, -0.5], [2.1, -0.5], [2.1, 0.9], [0.6, 0.9]]])])
+    grid = data.rasterize(1.0, [-0.5, -0.5], (2, 4))
+
+    np.testing.assert_array_equal(grid.labels, [[0, 1, 1, 0], [0, 0, 0, 0]])
+
+
+def test_labels_at_and_category_mask():
+    grid = example_zones().rasterize(0.5, [0.0, 0.0], (10, 8))
+    points = [[0.1, 0.1], [2.2, 0.2], [0.5, 3.5], [3.9, 4.9], [-0.1, 0.1], [1.0, 5.0]]
+
+    assert grid.labelsAt(points).tolist() == [5, 4, 4, 0, 0, 0]
+    assert grid.categoryMask(points).tolist() == [
+        [True, False, True],
+        [False, False, True],
+        [False, False, True],
+        [False, False, False],
+        [False, False, False],  # outside of the grid
+        [False, False, False],
+    ]
+    assert grid.labelsAt(np.zeros((0, 2))).tolist() == []
+
+
+def test_label_types():
+    assert ZoneGrid.labelType(0) == np.uint8
+    assert ZoneGrid.labelType(9) == np.uint16
+    assert ZoneGrid.labelType(33) == np.uint64
+    assert ZoneGrid.labelType(64) == np.uint64
+
+
+def test_more_than_64_categories():
+    data = zones_data([Zone(f'zone {i}', [f'category {i}'], [square(i, 0)]) for i in range(65)])
+
+    with pytest.raises(Exception, match='up to 64 categories'):
+        data.rasterize(1.0, [0.0, 0.0], (1, 65))
+
+    data.zones.pop()
+    grid = data.rasterize(1.0, [0.0, 0.0], (1, 64))
+    assert grid.labels.dtype == np.uint64
+    # the highest bit is set for the last category in sorted order
+    expected = [c == 'category 9' for c in grid.categories]
+    assert grid.categoryMask([[9.5, 0.5]])[0].tolist() == expected
+    assert grid.labelsAt([[9.5, 0.5]])[0] == 1 << 63
+
+
+def test_npz_round_trip(tmp_path):
+    grid = example_zones().rasterize(0.5, [-1.0, 2.0, 0.3], (6, 7))
+    path = str(tmp_path / 'zones.grid.npz')
+    grid.save(path)
+    loaded = ZoneGrid.load(path)
+
+    np.testing.assert_array_equal(loaded.labels, grid.labels)
+    assert loaded.labels.dtype == grid.labels.dtype
+    assert loaded.categories == grid.categories
+    assert loaded.resolution == grid.resolution
+    assert loaded.origin == [-1.0, 2.0]
+    assert loaded.digest == grid.digest != ''
+    assert ZoneGrid.pathFor('/maps/zones.yaml') == '/maps/zones.grid.npz'
+
+
+def test_digest_does_not_build_polygons():
+    data = example_zones()
+    digest = data.gridDigest(0.5, [0.0, 0.0], (10, 8))
+
+    assert not any(zone.isPolygonBuilt() for zone in data.zones)
+    # the digest of the built polygons is the same
+    data.buildPolygons()
+    assert data.gridDigest(0.5, [0.0, 0.0], (10, 8)) == digest
+    # closing coordinates don't change it either
+    closed = example_zones()
+    closed.zones[0] = Zone('kitchen', ['room', 'food'], [square(0, 0, 2) + [[0, 0]]])
+    assert closed.gridDigest(0.5, [0.0, 0.0], (10, 8)) == digest
+
+
+def test_digest_changes():
+    data = example_zones()
+    digest = data.gridDigest(0.5, [0.0, 0.0], (10, 8))
+
+    assert data.gridDigest(0.25, [0.0, 0.0], (10, 8)) != digest
+    assert data.gridDigest(0.5, [0.0, 1.0], (10, 8)) != digest
+    assert data.gridDigest(0.5, [0.0, 0.0], (8, 10)) != digest
+
+    data.zones[1].category = ['room', 'outside']
+    assert data.gridDigest(0.5, [0.0, 0.0], (10, 8)) != digest
+    data = example_zones()
+    data.zones[1].polygon = shapely.MultiPolygon([shapely.box(2, 0, 3, 1)])
+    assert data.gridDigest(0.5, [0.0, 0.0], (10, 8)) != digest
+
+
+def test_get_grid_regenerates_when_digest_changes(tmp_path, monkeypatch):
+    zones_path = str(tmp_path / 'zones.yaml')
+    map_data = types.SimpleNamespace(
+        image_path=write_pgm(tmp_path / 'map.pgm', (10, 8)), resolution=0.5, origin=[0.0, 0.0, 0.0]
+    )
+    data = zones_data(example_zones().zones, zones_path)
+    rasterized = []
+    rasterize = ZonesData.rasterize
+
+    def count_rasterize(self, *args):
+        rasterized.append(args)
+        return rasterize(self, *args)
+    monkeypatch.setattr(ZonesData, 'rasterize', count_rasterize)
+
+    grid = data.getGrid(map_data)
+    assert grid.labels.shape == (10, 8)
+    assert len(rasterized) == 1
+    assert ZoneGrid.load(ZoneGrid.pathFor(zones_path)).digest == grid.digest
+
+    # cached in memory and loaded from the file next to the zones
+    assert data.getGrid(map_data) is grid
+    reloaded = zones_data(example_zones().zones, zones_path).getGrid(map_data)
+    np.testing.assert_array_equal(reloaded.labels, grid.labels)
+    assert len(rasterized) == 1
+
+    # changed zones
+    data.zones[0].polygon = shapely.MultiPolygon([shapely.box(3, 4, 4, 5)])
+    changed = data.getGrid(map_data)
+    assert len(rasterized) == 2
+    assert changed.labelsAt([[0.5, 0.5], [3.5, 4.5]]).tolist() == [0, 5]
+    assert ZoneGrid.load(ZoneGrid.pathFor(zones_path)).digest == changed.digest
+
+    # changed map
+    map_data.resolution = 0.25
+    assert data.getGrid(map_data).resolution == 0.25
+    write_pgm(map_data.image_path, (12, 8))
+    assert data.getGrid(map_data).labels.shape == (12, 8)
+    assert data.getGrid(map_data, shape=(3, 3)).labels.shape == (3, 3)
+    assert len(rasterized) == 5
@@ -0,0 +1,225 @@
+import numpy as np
+import pytest
+import shapely
+
+from arena_tools.ZonesEditor.Zone import Zone, ZonesData
+
+
+def square(x, y, size=1.0):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size]]
+
+
+def zones_data(zones):
+    data = ZonesData()
+    data.zones = zones
+    return data
+
+
+def labels(zones):
+    return [zone.label for zone in zones]
+
+
+def example_zones():
+    return zones_data([
+        Zone('kitchen', ['room', 'food'], [square(0, 0, 2)]),
+        # two polygons, the second one overlaps the kitchen
+        Zone('hall', ['room'], [square(5, 0), square(1.5, 1.5)]),
+        Zone('fridge', ['food'], [square(0.5, 0.5, 0.5)]),
+        Zone('nothing', ['room'], []),
+    ])
+
+
+def test_zones_at():
+    data = example_zones()
+    result = data.zonesAt([[0.7, 0.7], [1.7, 1.7], [5.5, 0.5], [3.0, 3.0], [2.0, 1.0]])
+
+    assert [labels(zones) for zones in result] == [
+        ['kitchen', 'fridge'],
+        ['kitchen', 'hall'],
+        ['hall'],
+        [],
+        ['kitchen'],  # on the border
+    ]
+    assert data.zonesAt(np.zeros((0, 2))) == []
+
+
+def test_point_in_several_polygons_of_a_zone():
+    data = zones_data([Zone('overlapping', ['room'], [square(0, 0), square(0.5, 0.5)])])
+
+    assert labels(data.zonesAt([[0.75, 0.75]])[0]) == ['overlapping']
+    assert data.categoryMask([[0.75, 0.75]]).tolist() == [[True]]
+
+
+def test_zones_intersecting():
+    data = example_zones()
+
+    assert labels(data.zonesIntersecting(shapely.box(1.8, 1.8, 6, 3))) == ['kitchen', 'hall']
+    line = shapely.LineString([(0, 0.75), (10, 0.75)])
+    assert labels(data.zonesIntersecting(line)) == ['kitchen', 'hall', 'fridge']
+    assert data.zonesIntersecting(shapely.Point(10, 10)) == []
+
+
+def test_category_mask():
+    data = example_zones()
+    points = [[0.7, 0.7], [1.7, 1.7], [5.5, 0.5], [3.0, 3.0]]
+
+    assert data.categoryMask(points).tolist() == [
+        [True, True], [True, True], [False, True], [False, False]
+    ]
+    # the columns follow the given categories, unknown ones are never set
+    assert data.categoryMask(points, ['room', 'garden']).tolist() == [
+        [True, False], [True, False], [True, False], [False, False]
+    ]
+
+
+def test_tree_is_rebuilt_after_polygon_is_replaced():
+    data = example_zones()
+    kitchen = data.zones[0]
+    assert labels(data.zonesAt([[3.5, 3.5]])[0]) == []
+    tree, _ = data.getTree()
+
+    kitchen.polygon = shapely.MultiPolygon([shapely.box(3, 3, 4, 4)])
+
+    assert labels(data.zonesAt([[3.5, 3.5], [0.2, 0.2]])[0]) == ['kitchen']
+    assert data.zonesAt([[0.2, 0.2]]) == [[]]
+    assert data.getTree()[0] is not tree
+    assert data.categoryMask([[3.5, 3.5]]).tolist() == [[True, True]]
+
+
+def test_tree_is_rebuilt_after_zones_change():
+    data = example_zones()
+    tree, _ = data.getTree()
+    assert data.getTree()[0] is tree
+
+    data.zones.append(Zone('garden', ['outside'], [square(3, 3)]))
+    assert labels(data.zonesAt([[3.5, 3.5]])[0]) == ['garden']
+
+    data.zones[0] = Zone('kitchen', ['room'], [square(10, 10)])
+    assert labels(data.zonesAt([[0.2, 0.2]])[0]) == []
+    assert labels(data.zonesIntersecting(shapely.Point(10.5, 10.5))) == ['kitchen']
+
+    tree, _ = data.getTree()
+    data.invalidate()
+    assert data.getTree()[0] is not tree
+
+
+def legacy_to_dict(label, category, polygon, properties):
+    '''Zone.toDict before the polygons of all zones were exported at once.'''
+    multiPolygon = shapely.MultiPolygon([shapely.Polygon(poly) for poly in polygon])
+    d = {'label': label, 'category': category}
+    d['polygon'] = [
+        [
+            list(coord) for coord in (
+                p.exterior.coords[:-1] if shapely.is_ccw(p.exterior)
+                else p.reverse().exterior.coords[:-1]
+            )
+        ]
+        for p in multiPolygon.geoms
+    ]
+    d.update(properties)
+    return d
+
+
+def random_zones(count, seed=0):
+    '''Zones with up to three star shaped polygons each, half of them clockwise.'''
+    rng = np.random.default_rng(seed)
+    zones = []
+    for i in range(count):
+        polygons = []
+        for _ in range(rng.integers(1, 4)):
+            n = rng.integers(3, 12)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, n))
+            radii = rng.uniform(0.5, 2.0, n)
+            center = rng.uniform(-100, 100, 2)
+            points = center + np.stack([radii * np.cos(angles), radii * np.sin(angles)], axis=1)
+            if rng.random() < 0.5:
+                points = points[::-1]
+            polygons.append(points.tolist())
+        zones.append((f'zone {i}', [f'category {i % 7}'], polygons, {'index': i}))
+    # a zone without polygons
+    zones.append(('empty', ['category 0'], [], {}))
+    return zones
+
+
+@pytest.fixture
+def zones_and_expected():
+    zones = random_zones(3000)
+    return zones, [legacy_to_dict(*zone) for zone in zones]
+
+
+def test_to_list_matches_per_zone_export(zones_and_expected):
+    zones, expected = zones_and_expected
+    data = zones_data([Zone(*zone) for zone in zones])
+
+    assert any(not shapely.is_ccw(shapely.LinearRing(p)) for zone in zones for p in zone[2])
+    assert data.toList() == expected
+    # a single zone exports the same
+    assert data.zones[1].toDict() == expected[1]
+    empty = {'label': 'empty', 'category': ['category 0'], 'polygon': []}
+    assert data.zones[-1].toDict() == expected[-1] == empty
+
+
+def test_to_list_without_orient_polygons(zones_and_expected, monkeypatch):
+    # shapely < 2.1 has no orient_polygons
+    monkeypatch.delattr(shapely, 'orient_polygons', raising=False)
+    zones, expected = zones_and_expected
+    data = zones_data([Zone(*zone) for zone in zones])
+
+    assert not hasattr(shapely, 'orient_polygons')
+    assert data.toList() == expected
+
+
+def test_coordinates_with_z():
+    zone = Zone('kitchen', ['room'], [[[0, 0, 1], [2, 0, 1], [2, 2, 1], [0, 2, 1]]])
+    data = zones_data([zone])
+
+    assert zone.toDict()['polygon'] == [[[0.0, 0.0], [2.0, 0.0], [2.0, 2.0], [0.0, 2.0]]]
+    # query points can have a z coordinate as well
+    assert labels(data.zonesAt([[1.0, 1.5, 3.0], [1.5, 3.0, 1.0]])[0]) == ['kitchen']
+    assert data.zonesAt([1.0, 1.5])[0] == [zone]
+    assert data.categoryMask([[1.0, 1.5, 0.0]]).tolist() == [[True]]
+
+
+@pytest.mark.parametrize('polygon', [
+    [0.0, 1.0, 2.0, 3.0, 4.0, 5.0],  # flat coordinates
+    [[0.0], [1.0], [2.0]],
+    [[0.0, 0.0, 0.0, 0.0], [1.0, 0.0, 0.0, 0.0], [1.0, 1.0, 0.0, 0.0]],
+    [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0]]],
+])
+def test_invalid_coordinates(polygon):
+    with pytest.raises(Exception, match='shape'):
+        Zone('invalid', ['room'], [polygon])
+
+
+def test_polygons_are_built_on_first_use(tmp_path):
+    path = str(tmp_path / 'zones.yaml')
+    ZonesData.writeFile([
+        {'label': 'kitchen', 'category': ['room'], 'polygon': [square(0, 0, 2)], 'color': 'red'},
+        {'label': 'hall', 'category': ['room'], 'polygon': [square(5, 0), square(1.5, 1.5)]},
+        {'label': 'empty', 'category': [], 'polygon': []},
+    ], path)
+
+    def built():
+        return [zone.isPolygonBuilt() for zone in data.zones]
+
+    data = ZonesData(path)
+    assert built() == [False, False, False]
+    assert data.getCategories() == {'room'}
+    assert data.zones[0].properties == {'color': 'red'}
+    data.gridDigest(1.0, [0.0, 0.0], (4, 4))
+    assert built() == [False, False, False]
+
+    # the first query builds all polygons at once
+    assert labels(data.zonesAt([[0.5, 0.5]])[0]) == ['kitchen']
+    assert built() == [True, True, True]
+
+    # and so does exporting
+    data = ZonesData(path)
+    exported = data.toList()
+    assert built() == [True, True, True]
+    assert exported[1]['polygon'] == [square(5, 0), square(1.5, 1.5)]
+
+    # using the polygon of one zone only builds that one
+    data = ZonesData(path)
+    assert data.zones[1].polygon.area == 2.0
+    assert built() == [False, True, False]
@@ -0,0 +1,258 @@
+import threading
+
+import pytest
+
+pytest.importorskip('pytestqt')
+pytest.importorskip('arena_simulation_setup')
+pytest.importorskip('arena_robots')
+
+from PyQt5 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+from arena_tools.ZonesEditor.ZonesEditor import ZonesEditor  # noqa: E402
+from arena_tools.ZonesEditor.Zone import ZonesData  # noqa: E402
+from arena_tools.utils.Serialization import yaml_safe_dump  # noqa: E402
+
+ZONES = [
+    {
+        'label': 'kitchen',
+        'category': ['room'],
+        'polygon': [[[0.0, 0.0], [4.0, 0.0], [4.0, 3.0], [0.0, 3.0]]],
+    },
+    {
+        'label': 'aisles',
+        'category': ['traffic', 'room'],
+        'polygon': [
+            [[5.0, 0.0], [6.0, 0.0], [6.0, 5.0], [5.0, 5.0]],
+            [[7.0, 0.0], [8.0, 0.0], [8.0, 5.0]],
+        ],
+        'speed_limit': 0.5,
+    },
+]
+
+
+@pytest.fixture
+def zones_path(tmp_path):
+    path = tmp_path / 'zones.yaml'
+    with open(path, 'w') as f:
+        yaml_safe_dump(ZONES, f, default_flow_style=False, sort_keys=False)
+    return str(path)
+
+
+@pytest.fixture
+def editor(qtbot, monkeypatch):
+    # the world selection dialog is modal
+    monkeypatch.setattr(ZonesEditor, 'show_select_world_dialog', lambda self: None)
+    editor = ZonesEditor()
+    qtbot.addWidget(editor)
+    yield editor
+    editor.saver.shutdown()
+
+
+def read_zones(path):
+    return ZonesData(path).toList()
+
+
+def test_save_while_failing_save_is_running(qtbot, editor, zones_path, monkeypatch):
+    editor.loadZones(zones_path)
+    editor.getZoneRows()[0].zone.label = 'pantry'
+
+    # the first write blocks until released and then fails
+    release = threading.Event()
+    writes = []
+    writeFile = ZonesData.writeFile
+
+    def failingWriteFile(data, path):
+        writes.append(data[0]['label'])
+        if len(writes) == 1:
+            release.wait(5)
+            raise OSError('disk full')
+        writeFile(data, path)
+
+    monkeypatch.setattr(ZonesData, 'writeFile', staticmethod(failingWriteFile))
+    failed = []
+    editor.saver.saveFailed.connect(lambda path, error: failed.append(error))
+
+    assert editor.save(zones_path)
+    # the same zones again, queued because the first save has not finished
+    assert editor.save(zones_path)
+    release.set()
+    qtbot.waitUntil(editor.saver.isIdle)
+
+    assert failed == ['disk full']
+    assert writes == ['pantry', 'pantry']
+    assert read_zones(zones_path)[0]['label'] == 'pantry'
+    assert editor.lastSavedData == read_zones(zones_path)
+
+    # nothing changed since the last successful save
+    assert editor.save(zones_path)
+    assert editor.saver.isIdle()
+    assert len(writes) == 2
+
+
+def test_failed_save_is_repeated(qtbot, editor, zones_path, monkeypatch):
+    editor.loadZones(zones_path)
+    editor.getZoneRows()[1].zone.label = 'corridor'
+
+    def failingWriteFile(data, path):
+        raise OSError('read-only file system')
+
+    monkeypatch.setattr(ZonesData, 'writeFile', staticmethod(failingWriteFile))
+    editor.save(zones_path)
+    qtbot.waitUntil(editor.saver.isIdle)
+    assert 'read-only file system' in editor.statusBar().currentMessage()
+    assert read_zones(zones_path) == ZONES
+
+    monkeypatch.undo()
+    monkeypatch.setattr(ZonesEditor, 'show_select_world_dialog', lambda self: None)
+    editor.save(zones_path)
+    qtbot.waitUntil(editor.saver.isIdle)
+    assert [zone['label'] for zone in read_zones(zones_path)] == ['kitchen', 'corridor']
+
+
+def test_map_with_missing_image(qtbot, editor, tmp_path):
+    path = tmp_path / 'map.yaml'
+    path.write_text('image: map.pgm\nresolution: 0.05\norigin: [0.0, 0.0, 0.0]\n')
+
+    editor.setMap(str(path))
+    qtbot.waitUntil(lambda: editor.pixmapItem.loadError != '')
+
+    assert 'Could not load map image' in editor.statusBar().currentMessage()
+    assert str(tmp_path / 'map.pgm') in editor.statusBar().currentMessage()
+
+
+def click(view, scenePos):
+    pos = view.mapFromScene(scenePos)
+    # the scene finds the items under the mouse from the global position
+    globalPos = QtCore.QPointF(view.viewport().mapToGlobal(pos))
+    pos = QtCore.QPointF(pos)
+    for eventType, buttons in [
+        (QtCore.QEvent.Type.MouseButtonPress, QtCore.Qt.MouseButton.LeftButton),
+        (QtCore.QEvent.Type.MouseButtonRelease, QtCore.Qt.MouseButton.NoButton),
+    ]:
+        event = QtGui.QMouseEvent(
+            eventType, pos, pos, globalPos, QtCore.Qt.MouseButton.LeftButton, buttons,
+            QtCore.Qt.KeyboardModifier.NoModifier
+        )
+        QtWidgets.QApplication.sendEvent(view.viewport(), event)
+
+
+def click_receivers(editor):
+    return editor.gview.receivers(editor.gview.clickedPos)
+
+
+def points(polygonRow):
+    return [list(p) for p in polygonRow.getPoints()]
+
+
+def test_load_edit_save(qtbot, editor, zones_path, tmp_path):
+    editor.show()
+    qtbot.waitExposed(editor)
+    editor.loadZones(zones_path)
+    kitchen, aisles = editor.getZoneRows()
+    assert [len(w.getPolygonRows()) for w in [kitchen, aisles]] == [1, 2]
+    assert points(aisles.getPolygonRows()[1]) == [[7.0, 0.0], [8.0, 0.0], [8.0, 5.0]]
+
+    # move a point like the spin box of its row, rename a zone and delete a polygon
+    kitchen.getPolygonRows()[0].getPointRows()[1].setRowData(1, 5.0)
+    kitchen.zone.label = 'pantry'
+    aisles.getPolygonRows()[0].remove()
+
+    # draw a new zone, the first click snaps to the corner of the aisles
+    newZone = editor.addZoneRow()
+    newZone.addPolygon()
+    editor.gview.centerOn(10, 5)
+    offset = editor.gview.pickDistance() / 3
+    for pos in [(8 + offset, 5 - offset), (12, 5), (12, 10)]:
+        click(editor.gview, QtCore.QPointF(*pos))
+    editor.disableAddWaypointMode()
+    newPoints = points(newZone.getPolygonRows()[0])
+    assert newPoints[0] == [8.0, 5.0]
+    assert newPoints[1:] == [pytest.approx(p, abs=offset) for p in [[12.0, 5.0], [12.0, 10.0]]]
+
+    path = str(tmp_path / 'edited.yaml')
+    assert editor.save(path)
+    qtbot.waitUntil(editor.saver.isIdle)
+
+    assert read_zones(path) == [
+        {
+            'label': 'pantry',
+            'category': ['room'],
+            'polygon': [[[0.0, 0.0], [5.0, 0.0], [4.0, 3.0], [0.0, 3.0]]],
+        },
+        {
+            'label': 'aisles',
+            'category': ['traffic', 'room'],
+            'polygon': [[[7.0, 0.0], [8.0, 0.0], [8.0, 5.0]]],
+            'speed_limit': 0.5,
+        },
+        {'label': 'Zone 2', 'category': [], 'polygon': [newPoints]},
+    ]
+    assert editor.lastSavedData == read_zones(path)
+
+    # loading the saved file again shows the same zones
+    editor.loadZones(path)
+    assert [w.zone.label for w in editor.getZoneRows()] == ['pantry', 'aisles', 'Zone 2']
+    polygon = editor.getZoneRows()[0].getPolygonRows()[0]
+    assert points(polygon) == [[0.0, 0.0], [5.0, 0.0], [4.0, 3.0], [0.0, 3.0]]
+
+
+def test_add_point_mode_connects_clicks(qtbot, editor, zones_path):
+    editor.loadZones(zones_path)
+    kitchen, aisles = editor.getZoneRows()
+    polygon = kitchen.getPolygonRows()[0]
+    assert click_receivers(editor) == 0
+
+    # enabling or disabling twice connects or disconnects once
+    polygon.setAddPointMode(True)
+    polygon.setAddPointMode(True)
+    assert click_receivers(editor) == 1
+    polygon.setAddPointMode(False)
+    polygon.setAddPointMode(False)
+    assert click_receivers(editor) == 0
+
+    # new polygons start in add point mode, an empty one is removed when it ends
+    aisles.addPolygon()
+    assert click_receivers(editor) == 1
+    editor.disableAddWaypointMode()
+    assert click_receivers(editor) == 0
+    assert len(aisles.getPolygonRows()) == 2
+
+    # removing a row in add point mode disconnects it
+    aisles.addPolygon()
+    polygon.setAddPointMode(True)
+    assert click_receivers(editor) == 2
+    aisles.remove()
+    assert click_receivers(editor) == 1
+    kitchen.getPolygonRows()[0].remove()
+    assert click_receivers(editor) == 0
+
+
+def test_load_zones_replaces_rows(qtbot, editor, zones_path, monkeypatch):
+    editor.loadZones(zones_path)
+    oldRows = editor.getZoneRows()
+    oldRows[0].getPolygonRows()[0].setAddPointMode(True)
+
+    # the rows are created while the scene has no item index
+    indexMethods = []
+    createZoneRow = editor.createZoneRow
+
+    def recordingCreateZoneRow(zone=None):
+        indexMethods.append(editor.gscene.itemIndexMethod())
+        return createZoneRow(zone)
+    monkeypatch.setattr(editor, 'createZoneRow', recordingCreateZoneRow)
+    editor.loadZones(zones_path)
+
+    assert indexMethods == [QtWidgets.QGraphicsScene.ItemIndexMethod.NoIndex] * 2
+    assert editor.gscene.itemIndexMethod() == QtWidgets.QGraphicsScene.ItemIndexMethod.BspTreeIndex
+    rows = editor.getZoneRows()
+    assert len(rows) == 2 and not set(rows) & set(oldRows)
+    assert click_receivers(editor) == 0
+    for row in oldRows:
+        for polygon in row.getPolygonRows():
+            assert polygon.polygonDrawItem.scene() is None
+            assert all(point.ellipseItem.scene() is None for point in polygon.getPointRows())
+    # only the points of the new rows are indexed, and the rebuilt item index finds the new items
+    assert len(editor.gscene.pointIndex) == 4 + 4 + 3
+    drawItem = rows[0].getPolygonRows()[0].polygonDrawItem
+    assert drawItem in editor.gscene.items(QtCore.QPointF(1.0, 1.0))
+    assert editor.zoneModel.rowCount() == 2